@@ -1,5 +1,10 @@
 from sys import displayhook
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.utils import timezone
+
+from .audit import resolve_history_objects
+from .dedupe import merge_people
 
 from .models import (
     BulkRecordAction,
@@ -8,6 +13,8 @@ from .models import (
     ContactEmail,
     ContactText,
     ContactVoice,
+    DistrictRollup,
+    DuplicateCandidate,
     DuesPayment,
     EventType,
     Event,
@@ -32,6 +39,7 @@ from .models import (
     ParticipationLevel,
     PaymentMethod,
     Person,
+    PersonSearch,
     PersonUser,
     Position,
     PositionHistory,
@@ -57,6 +65,39 @@ admin.site.register(ContactEmail)
 
 admin.site.register(ContactVoice)
 
+class DistrictRollupAdmin(admin.ModelAdmin):
+    list_display=('location_name', 'location_field', 'people', 'members', 'quorum', 'voters', 'dues_payers', 'refreshed')
+    list_filter=('location_field',)
+
+admin.site.register(DistrictRollup, DistrictRollupAdmin)
+
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display=('person', 'duplicate', 'score', 'reasons', 'status', 'found')
+    list_filter=('status',)
+    list_select_related=('person', 'duplicate')
+    raw_id_fields=('person', 'duplicate')
+    actions=['merge_duplicates', 'dismiss_duplicates']
+
+    @admin.action(description='Merge each duplicate into the person to keep')
+    def merge_duplicates(self, request, queryset):
+        merged = 0
+        for candidate in list(queryset.filter(status='open')):
+            # read again for each pair, since an earlier merge may have changed them
+            person = Person.all_objects.get(pk=candidate.person_id)
+            duplicate = Person.all_objects.get(pk=candidate.duplicate_id)
+            if person.is_deleted or duplicate.is_deleted:
+                continue
+            merge_people(person, duplicate, request.user)
+            merged += 1
+        self.message_user(request, f'Merged {merged} duplicates')
+
+    @admin.action(description='Mark as not duplicates')
+    def dismiss_duplicates(self, request, queryset):
+        dismissed = queryset.filter(status='open').update(status='dismissed', reviewed=timezone.now(), reviewed_by=request.user)
+        self.message_user(request, f'Dismissed {dismissed} pairs')
+
+admin.site.register(DuplicateCandidate, DuplicateCandidateAdmin)
+
 admin.site.register(DuesPayment)
 
 admin.site.register(EventType)
@@ -79,7 +120,20 @@ admin.site.register(LocationStateHouse)
 
 admin.site.register(LocationStateSenate)
 
-admin.site.register(History)
+class HistoryChangeList(ChangeList):
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = resolve_history_objects(self.result_list)
+
+class HistoryAdmin(admin.ModelAdmin):
+    list_display=('__str__', 'user', 'when')
+    list_select_related=('user',)
+
+    def get_changelist(self, request, **kwargs):
+        return HistoryChangeList
+
+admin.site.register(History, HistoryAdmin)
 
 
 admin.site.register(Participation)
@@ -105,10 +159,21 @@ admin.site.register(MembershipType)
 admin.site.register(PaymentMethod)
 
 class PersonManager(admin.ModelAdmin):
+    list_filter=('is_deleted',)
+    ordering=('is_deleted', 'name_last', 'name_first')
+    actions=['soft_delete_people', 'restore_people']
 
     def get_queryset(self, request):
         return Person.all_objects.all()
 
+    @admin.action(description='Soft-delete selected people')
+    def soft_delete_people(self, request, queryset):
+        self.message_user(request, f'Soft-deleted {queryset.soft_delete()} people')
+
+    @admin.action(description='Restore selected people')
+    def restore_people(self, request, queryset):
+        self.message_user(request, f'Restored {queryset.restore()} people')
+
 admin.site.register(Person, PersonManager)
 
 class PositionAdmin(admin.ModelAdmin):
@@ -122,6 +187,8 @@ admin.site.register(SubMembership)
 
 admin.site.register(VotingAddress)
 
+admin.site.register(PersonSearch)
+
 admin.site.register(PersonUser)
 
 admin.site.register(RecordactPerson)
@@ -0,0 +1,190 @@
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Prefetch
+from django.http import JsonResponse
+from django.http.response import StreamingHttpResponse
+
+from .lookups import attach_lookups, field_lookup_tables, is_lookup_model
+from .models import ContactEmail, ContactText, ContactVoice
+from .pagination import CURSOR_SALT, cursor_value, keyset_ordering, order_expressions, seek_filter
+
+API_DEFAULT_LIMIT = getattr(settings, 'SDCPEOPLE_API_DEFAULT_LIMIT', 500)
+API_MAX_LIMIT = getattr(settings, 'SDCPEOPLE_API_MAX_LIMIT', 5000)
+
+# how many contacts, positions or subcommittees a list field holds by default
+API_DEFAULT_TOP = 2
+
+class ApiField:
+    """
+    One field a client may ask for: the columns it needs (for only()), the
+    relations to join or prefetch, the lookup foreign keys to set from the
+    lookup tables, and a function of (object, top) giving its value
+    """
+
+    def __init__(self, value, only=(), select_related=(), prefetch_related=(), lookups=()):
+        self.value = value
+        self.only = list(only)
+        self.select_related = list(select_related)
+        self.prefetch_related = list(prefetch_related)
+        self.lookups = list(lookups)
+
+def model_api_fields(model):
+    """
+    Returns an ApiField for each concrete field of a model. A foreign key
+    gives its id as <name>_id, and a foreign key to a lookup model also
+    gives its name as <name>
+    """
+
+    fields = {}
+    for field in model._meta.concrete_fields:
+        if field.is_relation:
+            fields[field.attname] = ApiField(lambda object, top, attname=field.attname: getattr(object, attname), only=[field.name])
+            if is_lookup_model(field.related_model):
+                fields[field.name] = ApiField(lambda object, top, name=field.name: str(getattr(object, name) or ''), only=[field.name], lookups=[field.name])
+        else:
+            fields[field.name] = ApiField(lambda object, top, name=field.name: getattr(object, name), only=[field.name])
+    return fields
+
+def contact_field(related_name, model, value_name):
+    return ApiField(
+        lambda person, top: [getattr(contact, value_name) for contact in getattr(person, related_name).all()][:top],
+        prefetch_related=[Prefetch(related_name, queryset=model.objects.only('person', value_name, 'rank_number'))],
+    )
+
+def person_api_fields(model):
+    return {
+        **model_api_fields(model),
+        'voting_address': ApiField(
+            lambda person, top: str(person.voting_address).replace("\n", " ") if person.voting_address is not None else '',
+            only=['voting_address'],
+            select_related=['voting_address'],
+        ),
+        'voice_numbers': contact_field('contactvoice_set', ContactVoice, 'number'),
+        'text_numbers': contact_field('contacttext_set', ContactText, 'number'),
+        'email_addresses': contact_field('contactemail_set', ContactEmail, 'address'),
+        'positions': ApiField(
+            lambda person, top: [position.title for position in person.positions.all()][:top],
+            prefetch_related=['positions'],
+        ),
+        'subcommittees': ApiField(
+            lambda person, top: [subcommittee.name for subcommittee in person.subcommittees.all()][:top],
+            prefetch_related=['subcommittees'],
+        ),
+    }
+
+class ApiError(Exception):
+    pass
+
+def api_plan(queryset, api_fields, field_names):
+    """
+    Narrows a queryset to what the named fields need, with one only(),
+    select_related() and prefetch_related() for all of them. Returns the
+    queryset and the lookup tables to set on each object
+    """
+
+    unknown = [field_name for field_name in field_names if field_name not in api_fields]
+    if unknown:
+        raise ApiError(f'Unknown fields: {", ".join(unknown)}. Fields are: {", ".join(api_fields)}')
+
+    only = ['pk']
+    select_related = []
+    prefetch_related = []
+    lookups = []
+    for field_name in field_names:
+        api_field = api_fields[field_name]
+        only.extend(api_field.only)
+        select_related.extend(api_field.select_related)
+        prefetch_related.extend(api_field.prefetch_related)
+        lookups.extend(api_field.lookups)
+
+    # joins and prefetches made for the list page would fight with only()
+    queryset = queryset.select_related(None).prefetch_related(None).only(*dict.fromkeys(only))
+    if select_related:
+        queryset = queryset.select_related(*dict.fromkeys(select_related))
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    return queryset, field_lookup_tables(queryset.model, dict.fromkeys(lookups))
+
+def read_api_cursor(token, keyset_length):
+    try:
+        cursor = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ApiError('Bad cursor')
+    if len(cursor.get('values', [])) != keyset_length:
+        raise ApiError('Bad cursor')
+    return cursor
+
+def api_int(value, default, maximum):
+    try:
+        return max(1, min(int(value), maximum)) if value else default
+    except ValueError:
+        raise ApiError(f'Not a number: {value}')
+
+def ndjson_response(request, queryset, api_fields, default_fields):
+    """
+    Streams a queryset as NDJSON, one object per line, with the fields named
+    in ?fields= (comma separated). At most ?limit= objects are sent after
+    ?after=, and the last line is {"next": cursor}, with a cursor for the
+    next page or null at the end. Paging seeks on the queryset's ordering
+    where it can, and on the primary key where it cannot
+    """
+
+    params = request.GET
+    try:
+        field_names = [field_name.strip() for field_name in params.get('fields', '').split(',') if field_name.strip()] or default_fields
+        limit = api_int(params.get('limit'), API_DEFAULT_LIMIT, API_MAX_LIMIT)
+        top = api_int(params.get('top'), API_DEFAULT_TOP, 100)
+
+        keyset = keyset_ordering(queryset)
+        if keyset is None:
+            keyset = [('pk', False)]
+
+        queryset = queryset.order_by(*order_expressions(keyset)).annotate(
+            **{ f'keyset_{indx}':F(path) for indx, (path, descending) in enumerate(keyset) }
+        )
+        if params.get('after'):
+            queryset = queryset.filter(seek_filter(keyset, read_api_cursor(params['after'], len(keyset))['values']))
+
+        queryset, lookup_tables = api_plan(queryset, api_fields, field_names)
+    except ApiError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    def lines():
+        last = None
+        count = 0
+        for object in queryset[:limit + 1].iterator(chunk_size=min(limit + 1, 2000)):
+            if count == limit:
+                yield json.dumps({'next': signing.dumps({
+                    'values': [ cursor_value(getattr(last, f'keyset_{indx}')) for indx in range(len(keyset)) ],
+                }, salt=CURSOR_SALT, compress=True)}) + '\n'
+                return
+            attach_lookups(object, lookup_tables)
+            yield json.dumps({ field_name: api_fields[field_name].value(object, top) for field_name in field_names }, cls=DjangoJSONEncoder) + '\n'
+            last = object
+            count += 1
+        yield json.dumps({'next': None}) + '\n'
+
+    return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+class NdjsonApiMixin:
+    """
+    Turns a vista list view into a read-only NDJSON API. The objects are
+    the ones the list would show with the user's latest vista; see
+    ndjson_response for the parameters
+    """
+
+    api_default_fields = ['id']
+    http_method_names = ['get']
+
+    def get_api_fields(self):
+        return model_api_fields(self.model)
+
+    def vista_cache_enabled(self):
+        return False
+
+    def get(self, request, *args, **kwargs):
+        return ndjson_response(request, self.get_queryset(), self.get_api_fields(), self.api_default_fields)
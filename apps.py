@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SdcpeopleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sdcpeople'
+
+    def ready(self):
+        from . import signals
+        from .metadata import build_registry
+        build_registry()
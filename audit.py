@@ -0,0 +1,159 @@
+import json
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from .models import History
+
+# When True, each changed object gets one History row whose new_value holds
+# a JSON object of {fieldname: [old value, new value]} instead of one row
+# per field
+AUDIT_COMPACT = getattr(settings, 'SDCPEOPLE_AUDIT_COMPACT', False)
+
+COMPACT_FIELDNAME = '*'
+DELETED_FIELDNAME = '-deleted-'
+
+def audit_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)) or hasattr(value, 'all'):
+        values = value.all() if hasattr(value, 'all') else value
+        return ', '.join(str(item) for item in values)
+    return str(value)
+
+def history_changes(history):
+    """
+    Returns a list of (fieldname, old value, new value) for a History row in
+    either storage format
+    """
+
+    if history.fieldname == COMPACT_FIELDNAME:
+        try:
+            changes = json.loads(history.new_value)
+        except ValueError:
+            return [(history.fieldname, history.old_value, history.new_value)]
+        return [(fieldname, values[0], values[1]) for fieldname, values in changes.items()]
+    return [(history.fieldname, history.old_value, history.new_value)]
+
+def resolve_history_objects(histories):
+    """
+    Sets object_display on a page of History rows, loading the objects they
+    name with one in_bulk per model. Returns the rows as a list
+    """
+
+    histories = list(histories)
+
+    objectids = defaultdict(set)
+    for history in histories:
+        if history.objectid is not None:
+            objectids[history.modelname].add(history.objectid)
+
+    displays = {}
+    for modelname, model_objectids in objectids.items():
+        try:
+            model = apps.get_model('sdcpeople', modelname)
+        except LookupError:
+            continue
+        # _base_manager so that soft-deleted people are still named
+        for objectid, object in model._base_manager.in_bulk(model_objectids).items():
+            displays[(modelname, objectid)] = str(object)
+
+    for history in histories:
+        if history.objectid is not None:
+            history.object_display = displays.get((history.modelname, history.objectid))
+
+    return histories
+
+class AuditLog:
+    """
+    Collects the field changes made during a request and writes them as
+    History with one bulk_create, normally after the transaction commits
+    """
+
+    def __init__(self, user, compact=AUDIT_COMPACT):
+        self.user = user
+        self.compact = compact
+        # (modelname, object, object id known now, {fieldname: (old, new)})
+        self.changes = []
+
+    def add_changes(self, modelname, object, changes, objectid=None):
+        if changes:
+            self.changes.append((modelname, object, objectid, changes))
+
+    def add_form(self, form, modelname=None, object=None):
+        """ Adds the changed fields of a valid model form """
+
+        if object is None:
+            object = form.instance
+        if modelname is None:
+            modelname = object.__class__.__name__
+
+        changes = {}
+        for fieldname in form.changed_data:
+            changes[fieldname] = (
+                audit_value(form.initial.get(fieldname)),
+                audit_value(form.cleaned_data.get(fieldname)) or '',
+            )
+
+        self.add_changes(modelname, object, changes)
+        return self
+
+    def add_formset(self, formset, modelname=None):
+        """
+        Adds the changed and deleted forms of a valid inline formset. This
+        must be called before the formset is saved so that deleted objects
+        still have their ids
+        """
+
+        if modelname is None:
+            modelname = formset.model.__name__
+
+        deleted_forms = formset.deleted_forms if formset.can_delete else []
+        for form in formset.forms:
+            if form in deleted_forms:
+                if form.instance.pk is not None:
+                    self.add_changes(modelname, form.instance, {DELETED_FIELDNAME: (str(form.instance), '')}, objectid=form.instance.pk)
+            elif form.has_changed():
+                self.add_form(form, modelname)
+        return self
+
+    def histories(self):
+        histories = []
+        for modelname, object, objectid, changes in self.changes:
+            if objectid is None:
+                objectid = object.pk
+            if self.compact:
+                histories.append(History(
+                    user=self.user,
+                    modelname=modelname,
+                    objectid=objectid,
+                    fieldname=COMPACT_FIELDNAME,
+                    new_value=json.dumps({ fieldname: list(values) for fieldname, values in changes.items() }),
+                ))
+            else:
+                for fieldname, (old_value, new_value) in changes.items():
+                    histories.append(History(
+                        user=self.user,
+                        modelname=modelname,
+                        objectid=objectid,
+                        fieldname=fieldname[:50],
+                        old_value=old_value,
+                        new_value=new_value,
+                    ))
+        return histories
+
+    def save(self):
+        histories = self.histories()
+        self.changes = []
+        return History.objects.bulk_create(histories)
+
+    def save_on_commit(self):
+        """
+        Writes the history once the current transaction commits, or at once
+        when there is no transaction. Object ids are read at that point, so
+        objects created later in the request are recorded with their ids
+        """
+
+        transaction.on_commit(self.save)
@@ -0,0 +1,105 @@
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import DATA_VERSION, bump_version
+from .lists import add_people_to_list
+from .models import BulkRecordAction, MembershipHistory, Person, RecordAction, RecordactPerson, SubMembership
+from .pagination import model_version
+from .quorum import PEOPLE_VERSION
+from .rollups import refresh_voting_address_rollups
+
+BULK_ACTION_BATCH_SIZE = getattr(settings, 'SDCPEOPLE_BULK_ACTION_BATCH_SIZE', 1000)
+
+def record_bulk_action(name, person_ids, details, user):
+    """
+    Records one BulkRecordAction with a RecordAction and RecordactPerson
+    for each person, using bulk inserts. Returns the BulkRecordAction
+    """
+
+    now = timezone.now()
+    bulk_recordact = BulkRecordAction.objects.create(
+        name=name,
+        status=BulkRecordAction.COMPLETE,
+        user=user,
+        rows_done=len(person_ids),
+        started=now,
+        finished=now,
+    )
+    RecordAction.objects.bulk_record(
+        RecordactPerson,
+        [(Person(pk=person_id), details) for person_id in person_ids],
+        user,
+        bulk_recordact,
+        batch_size=BULK_ACTION_BATCH_SIZE,
+    )
+    return bulk_recordact
+
+def set_membership_status(people, membership_status, user):
+    """
+    Gives the people of a queryset a membership status with one UPDATE,
+    adding their membership histories with one bulk insert. People who
+    already have the status are left out. Returns the BulkRecordAction
+    """
+
+    with transaction.atomic():
+        changed = people.exclude(membership_status=membership_status)
+        rows = list(changed.order_by().values_list('pk', 'voting_address_id').distinct())
+        person_ids = [person_id for person_id, voting_address_id in rows]
+
+        Person.all_objects.filter(pk__in=changed.order_by().values('pk')).update(membership_status=membership_status)
+        MembershipHistory.objects.bulk_create([
+            MembershipHistory(person_id=person_id, membership_status=membership_status, effective_date=date.today())
+            for person_id in person_ids
+        ], batch_size=BULK_ACTION_BATCH_SIZE)
+
+        bulk_recordact = record_bulk_action(f'Set Status {membership_status}', person_ids, f'Membership status set to {membership_status}. ', user)
+
+        # an UPDATE sends no post_save, so the rollups and versions it would refresh are refreshed here
+        voting_address_ids = { voting_address_id for person_id, voting_address_id in rows }
+        transaction.on_commit(lambda: refresh_voting_address_rollups(voting_address_ids))
+        transaction.on_commit(lambda: bump_version(PEOPLE_VERSION))
+        transaction.on_commit(lambda: bump_version(model_version(Person)))
+        transaction.on_commit(lambda: bump_version(DATA_VERSION))
+
+    return bulk_recordact
+
+def add_to_savedlist(people, savedlist, user):
+    """ Adds the people of a queryset who are not already on a saved list with one INSERT ... SELECT """
+
+    with transaction.atomic():
+        person_ids = list(people.exclude(listmembership__savedlist=savedlist).order_by().values_list('pk', flat=True).distinct())
+        add_people_to_list(savedlist, Person.all_objects.filter(pk__in=people.order_by().values('pk')))
+        bulk_recordact = record_bulk_action(f'Add to {savedlist}', person_ids, f'Added to saved list {savedlist}. ', user)
+
+    return bulk_recordact
+
+def add_to_subcommittee(people, subcommittee, user):
+    """ Adds the people of a queryset who are not already in a subcommittee with one bulk insert """
+
+    with transaction.atomic():
+        person_ids = list(people.exclude(submembership__subcommittee=subcommittee).order_by().values_list('pk', flat=True).distinct())
+        SubMembership.objects.bulk_create([
+            SubMembership(person_id=person_id, subcommittee=subcommittee) for person_id in person_ids
+        ], batch_size=BULK_ACTION_BATCH_SIZE)
+        bulk_recordact = record_bulk_action(f'Add to {subcommittee}', person_ids, f'Added to subcommittee {subcommittee}. ', user)
+
+        # bulk_create sends no post_save
+        transaction.on_commit(lambda: bump_version(model_version(SubMembership)))
+        transaction.on_commit(lambda: bump_version(DATA_VERSION))
+
+    return bulk_recordact
+
+# action, also the name of the form field choosing its target: (label, function of (people, target, user))
+BULK_PERSON_ACTIONS = {
+    'membership_status': ('Set membership status', set_membership_status),
+    'savedlist': ('Add to saved list', add_to_savedlist),
+    'subcommittee': ('Add to subcommittee', add_to_subcommittee),
+}
+
+def run_bulk_person_action(action, people, target, user):
+    """ Runs a bulk action on the people of a queryset. Returns the BulkRecordAction that records it """
+
+    return BULK_PERSON_ACTIONS[action][1](people, target, user)
@@ -0,0 +1,36 @@
+from django.core.cache import cache
+
+# Cached results are stored under keys that include a version number.
+# Bumping the version makes every key built from it miss, so a change never
+# has to find and delete the entries it invalidates
+
+VERSION_TIMEOUT = None
+
+# bumped whenever any data of this app changes
+DATA_VERSION = 'data'
+
+def version_key(name):
+    return f'sdcpeople:version:{name}'
+
+def get_version(name):
+    version = cache.get(version_key(name))
+    if version is None:
+        version = 1
+        cache.add(version_key(name), version, VERSION_TIMEOUT)
+    return version
+
+def bump_version(name):
+    try:
+        return cache.incr(version_key(name))
+    except ValueError:
+        cache.set(version_key(name), 2, VERSION_TIMEOUT)
+        return 2
+
+def versioned_key(names, *parts):
+    """
+    Returns a cache key that changes whenever any of the named versions is
+    bumped
+    """
+
+    versions = '.'.join(str(get_version(name)) for name in names)
+    return ':'.join(['sdcpeople', *[str(part) for part in parts], versions])
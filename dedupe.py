@@ -0,0 +1,187 @@
+import itertools
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import DATA_VERSION, bump_version
+from .models import (ContactEmail, ContactText, ContactVoice, DuplicateCandidate, History, ListMembership, Participation, Person,
+                     PersonUser, RecordAction, RecordactPerson, SubMembership)
+from .normalize import fold_text
+from .pagination import model_version
+from .quorum import PARTICIPATION_VERSION
+
+# People are compared only with the people who share a blocking key with
+# them, rather than with everyone. Each kind of key adds its weight to the
+# score of a pair that shares it
+
+# kind of blocking key: weight
+MATCH_WEIGHTS = {
+    'voter id': 60,
+    'email': 45,
+    'name': 35,
+    'phone': 30,
+    'address': 20,
+}
+
+# pairs scoring less than this are not queued
+DEDUPE_MIN_SCORE = getattr(settings, 'SDCPEOPLE_DEDUPE_MIN_SCORE', 50)
+
+# a block larger than this, such as everyone at one large address, is too
+# common to say anything and would cost a comparison for every pair
+DEDUPE_MAX_BLOCK = getattr(settings, 'SDCPEOPLE_DEDUPE_MAX_BLOCK', 25)
+
+def name_key(name_last, name_first, name_common):
+    name_last = fold_text(name_last).replace(' ', '')
+    first = fold_text(name_first or name_common)
+    if not name_last or not first:
+        return None
+    return f'{name_last} {first[0]}'
+
+def address_key(street_address):
+    return fold_text(street_address) or None
+
+def blocking_keys():
+    """
+    Returns {(kind, key): set of person ids} for everyone not deleted,
+    read with one query per kind of contact. Phones and emails are keyed
+    by their stored normalized keys
+    """
+
+    blocks = defaultdict(set)
+
+    people = Person.objects.order_by().values_list('pk', 'name_last', 'name_first', 'name_common', 'vb_voter_id', 'voting_address__street_address')
+    for pk, name_last, name_first, name_common, vb_voter_id, street_address in people.iterator():
+        blocks[('name', name_key(name_last, name_first, name_common))].add(pk)
+        blocks[('voter id', vb_voter_id.strip() or None)].add(pk)
+        blocks[('address', address_key(street_address))].add(pk)
+
+    for model in [ContactVoice, ContactText]:
+        for person_id, number_key in model.objects.filter(person__is_deleted=False).order_by().values_list('person_id', 'number_key').iterator():
+            blocks[('phone', number_key)].add(person_id)
+
+    for person_id, email_key_value in ContactEmail.objects.filter(person__is_deleted=False).order_by().values_list('person_id', 'address_key').iterator():
+        blocks[('email', email_key_value)].add(person_id)
+
+    return { block_key: person_ids for block_key, person_ids in blocks.items() if block_key[1] }
+
+def score_pairs(blocks, min_score=None):
+    """
+    Returns {(person id, duplicate id): (score, reasons)} for the pairs
+    within each block that score at least min_score. The person kept is
+    the one entered first
+    """
+
+    min_score = DEDUPE_MIN_SCORE if min_score is None else min_score
+
+    shared = defaultdict(set)
+    for (kind, key), person_ids in blocks.items():
+        if len(person_ids) > DEDUPE_MAX_BLOCK:
+            continue
+        for pair in itertools.combinations(sorted(person_ids), 2):
+            shared[pair].add(kind)
+
+    pairs = {}
+    for pair, kinds in shared.items():
+        score = min(100, sum(MATCH_WEIGHTS[kind] for kind in kinds))
+        if score >= min_score:
+            pairs[pair] = (score, ', '.join(kind for kind in MATCH_WEIGHTS if kind in kinds))
+    return pairs
+
+def find_duplicates(min_score=None):
+    """
+    Replaces the open duplicate candidates with the pairs found now.
+    Pairs already merged or dismissed are left as they were. Returns the
+    number of pairs found
+    """
+
+    pairs = score_pairs(blocking_keys(), min_score)
+
+    with transaction.atomic():
+        DuplicateCandidate.objects.filter(status='open').delete()
+        DuplicateCandidate.objects.bulk_create([
+            DuplicateCandidate(person_id=person_id, duplicate_id=duplicate_id, score=score, reasons=reasons)
+            for (person_id, duplicate_id), (score, reasons) in pairs.items()
+        ], batch_size=1000, ignore_conflicts=True)
+
+    return len(pairs)
+
+# model: the fields that, with the person, make a row the same as another,
+# so the duplicate's copy is dropped rather than moved. Contacts are
+# compared on their normalized keys, so the same phone written two ways is
+# kept once
+MERGE_DISTINCT_FIELDS = {
+    ContactVoice: ['number_key'],
+    ContactText: ['number_key'],
+    ContactEmail: ['address_key'],
+    ListMembership: ['savedlist'],
+    Participation: ['event'],
+    PersonUser: ['user'],
+    SubMembership: ['subcommittee'],
+}
+
+# Person fields copied from the duplicate when the kept person has none
+MERGE_FILL_FIELDS = ['name_middles', 'name_common', 'name_prefix', 'name_suffix', 'voting_address', 'membership_status', 'vb_voter_id', 'vb_campaign_id']
+
+def person_foreign_keys():
+    """ Returns (model, field name) for each foreign key to Person that merging moves """
+
+    return [
+        (related_object.related_model, related_object.field.name)
+        for related_object in Person._meta.related_objects
+        if related_object.one_to_many and related_object.related_model is not DuplicateCandidate
+    ]
+
+def merge_people(person, duplicate, user=None):
+    """
+    Moves everything of duplicate to person with one UPDATE per foreign
+    key, fills person's blank fields from duplicate, soft-deletes
+    duplicate and records the merge. Rows that person already has, such
+    as the same list membership, are dropped rather than moved. Saving
+    the two people rebuilds their search keys and district rollups
+    """
+
+    with transaction.atomic():
+        moved = []
+        for model, field_name in person_foreign_keys():
+            rows = model._base_manager.filter(**{field_name: duplicate})
+            distinct_fields = MERGE_DISTINCT_FIELDS.get(model)
+            if distinct_fields:
+                kept = model._base_manager.filter(**{field_name: person})
+                for distinct_field in distinct_fields:
+                    same_rows = rows.filter(**{f'{distinct_field}__in': kept.values(distinct_field)})
+                    if model._meta.get_field(distinct_field).empty_strings_allowed:
+                        # a blank key, such as for a number too short to be a phone, matches nothing
+                        same_rows = same_rows.exclude(**{distinct_field: ''})
+                    same_rows.delete()
+            if rows.update(**{field_name: person}):
+                moved.append(model)
+
+        positions = Person.positions.through.objects
+        positions.filter(person=duplicate, position__in=positions.filter(person=person).values('position')).delete()
+        if positions.filter(person=duplicate).update(person=person):
+            moved.append(Person.positions.through)
+
+        History.objects.filter(modelname='Person', objectid=duplicate.pk).update(objectid=person.pk)
+
+        for field_name in MERGE_FILL_FIELDS:
+            if not getattr(person, field_name) and getattr(duplicate, field_name):
+                setattr(person, field_name, getattr(duplicate, field_name))
+        person.save()
+        duplicate.delete()
+
+        DuplicateCandidate.objects.filter(Q(person=duplicate) | Q(duplicate=duplicate), status='open').exclude(person=person).delete()
+        DuplicateCandidate.objects.filter(person=person, duplicate=duplicate).update(status='merged', reviewed=timezone.now(), reviewed_by=user)
+
+        RecordAction.objects.bulk_record(RecordactPerson, [(person, f'Merged with {duplicate.pk}: {duplicate}. ')], user, None)
+
+        # the UPDATEs above send no signals, so the versions they would bump are bumped here
+        for model in moved:
+            transaction.on_commit(lambda model=model: bump_version(model_version(model)))
+        if Participation in moved:
+            transaction.on_commit(lambda: bump_version(PARTICIPATION_VERSION))
+        transaction.on_commit(lambda: bump_version(DATA_VERSION))
+
+    return person
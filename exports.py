@@ -0,0 +1,83 @@
+import csv
+
+from django.http.response import StreamingHttpResponse
+
+from .projections import attach_person_lookups, person_lookup_tables, person_projection_queryset
+
+# Rows are pulled from the database in batches of this size. Each batch costs
+# one query for the people plus one per prefetched relation
+PERSON_EXPORT_CHUNK_SIZE = 2000
+
+def _join(values):
+    return ', '.join(str(value) for value in values)
+
+def _voting_address(person):
+    return str(person.voting_address).replace("\n", " ") if person.voting_address is not None else ''
+
+def _location(location):
+    def get_location(person):
+        if person.voting_address is None:
+            return ''
+        value = getattr(person.voting_address, location)
+        return value if value is not None else ''
+    return get_location
+
+# (column name as used in show_columns, header, value getter)
+PERSON_EXPORT_COLUMNS = [
+    ('name_last', 'Last Name', lambda person: person.name_last),
+    ('name_first', 'First Name', lambda person: person.name_first),
+    ('is_quorum', 'Quorum', lambda person: person.membership_status.is_quorum if person.membership_status is not None else ''),
+    ('membership_status', 'Membership Status', lambda person: person.membership_status if person.membership_status is not None else ''),
+    ('positions', 'Positions', lambda person: _join(position.title for position in person.positions.all())),
+    ('submemberships', 'SubCommittees', lambda person: _join(submembership.subcommittee for submembership in person.submembership_set.all())),
+    ('contactvoice', 'Voice', lambda person: _join(contactvoice.number for contactvoice in person.contactvoice_set.all())),
+    ('contacttext', 'Text', lambda person: _join(contacttext.number for contacttext in person.contacttext_set.all())),
+    ('contactemail', 'Email', lambda person: _join(contactemail.address for contactemail in person.contactemail_set.all())),
+    ('voting_address', 'voting address', _voting_address),
+    ('voting_address.locationcity', 'City', _location('locationcity')),
+    ('voting_address.locationcongress', 'Congress', _location('locationcongress')),
+    ('voting_address.locationstatesenate', 'Senate', _location('locationstatesenate')),
+    ('voting_address.locationstatehouse', 'house', _location('locationstatehouse')),
+    ('voting_address.locationmagistrate', 'Magistrate', _location('locationmagistrate')),
+    ('voting_address.locationborough', 'Borough', _location('locationborough')),
+    ('voting_address.locationprecinct', 'precinct', _location('locationprecinct')),
+]
+
+def person_export_rows(queryset, show_columns=None, labels=None, chunk_size=PERSON_EXPORT_CHUNK_SIZE):
+    """
+    Yields the header and then one list per person. The queryset is read
+    with a server-side cursor (where the database supports it) in chunks,
+    and every related value comes from the per-chunk prefetches, so the
+    number of queries depends on the chunk count and not on the row count
+    """
+
+    labels = labels or {}
+    # no show_columns means every column; an empty selection means none
+    columns = [column for column in PERSON_EXPORT_COLUMNS if show_columns is None or column[0] in show_columns]
+
+    yield [labels.get(name, header) for name, header, getter in columns]
+
+    # statuses and districts come from the lookup tables rather than joins
+    lookup_tables = person_lookup_tables()
+    for person in person_projection_queryset(queryset, join_lookups=False).iterator(chunk_size=chunk_size):
+        attach_person_lookups(person, lookup_tables)
+        yield [getter(person) for name, header, getter in columns]
+
+class Echo:
+    """
+    A file-like object that hands back what is written to it, so that
+    csv.writer can be used to produce the lines of a streaming response
+    """
+
+    def write(self, value):
+        return value
+
+def stream_csv(rows, filename):
+
+    writer = csv.writer(Echo())
+
+    return StreamingHttpResponse(
+        (writer.writerow(row) for row in rows),
+        content_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
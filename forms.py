@@ -33,6 +33,13 @@ from .models import (
     VotingAddress
 )
 from django import forms
+from django.db.models import Q
+
+from .bulkactions import BULK_PERSON_ACTIONS
+from .lists import LIST_OPERATIONS
+from .caching import versioned_key
+from .lookups import LookupChoiceField, lookup_formfield_callback, lookup_objects, lookup_version
+from .pagination import model_version
 #from django.forms import forms.ModelForm, forms.inlineformset_factory, Form
 
 class ContactTextForm(forms.ModelForm):
@@ -74,7 +81,11 @@ class ContactEmailForm(forms.ModelForm):
 
 
 class DuesPaymentForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        # Django 4.2 and later read Meta.formfield_callback before the class attribute
+        formfield_callback = lookup_formfield_callback
         model=DuesPayment
         fields = [
             'transaction_date',
@@ -83,7 +94,10 @@ class DuesPaymentForm(forms.ModelForm):
         ]
 
 class EventForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=Event
         fields = [
             'name',
@@ -92,7 +106,10 @@ class EventForm(forms.ModelForm):
         ]
 
 class CommunicationEventForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=CommunicationEvent
         fields = [
             "target",
@@ -167,7 +184,10 @@ class MembershipTypeForm(forms.ModelForm):
         ]
 
 class MembershipStatusForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=MembershipStatus
         fields = [
             'membership_type',
@@ -179,7 +199,10 @@ class MembershipStatusForm(forms.ModelForm):
         ]
 
 class VotingAddressForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=VotingAddress
         fields = [
             'locationcity',
@@ -209,8 +232,45 @@ class SavedListForm(forms.ModelForm):
         ]
 
 
+class SavedListCombineForm(forms.ModelForm):
+    operation = forms.ChoiceField(choices=LIST_OPERATIONS, help_text='How the people of the sources are combined')
+    base = forms.ChoiceField(label='first source', help_text='The people to start with')
+    others = forms.MultipleChoiceField(label='other sources', help_text='The people to combine with the first source')
+
+    class Meta:
+        model=SavedList
+        fields = [
+            'name',
+            'shared',
+        ]
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        savedlists = SavedList.objects.all()
+        if user is not None:
+            savedlists = savedlists.filter(Q(owner=user) | Q(shared=1))
+
+        source_choices = [
+            ('Person List', [('vista:latest', 'The current person list')]),
+            ('Saved Lists', [(f'savedlist:{savedlist.pk}', str(savedlist)) for savedlist in savedlists]),
+            ('Event Participation', [(f'event:{event.pk}', str(event)) for event in Event.objects.select_related('event_type')]),
+            ('Communication Targets', [(f'bulkcommunication:{bulk_communication.pk}', str(bulk_communication)) for bulk_communication in BulkCommunication.objects.order_by('-when')]),
+        ]
+        self.fields['base'].choices = source_choices
+        self.fields['others'].choices = source_choices
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('base') in cleaned_data.get('others', []):
+            raise ValidationError('The first source cannot also be one of the other sources')
+        return cleaned_data
+
 class PersonForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=Person
         fields = [
             'name_prefix',
@@ -244,7 +304,10 @@ class PositionForm(forms.ModelForm):
         ]
 
 class SubMembershipForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=SubMembership
         fields = [
             'person',
@@ -277,7 +340,10 @@ class PaymentMethodForm(forms.ModelForm):
         ]
 
 class ParticipationForm(forms.ModelForm):
+    formfield_callback = lookup_formfield_callback
+
     class Meta:
+        formfield_callback = lookup_formfield_callback
         model=Participation
         fields=[
             'person',
@@ -285,31 +351,106 @@ class ParticipationForm(forms.ModelForm):
             'participation_level',
         ]
 
-def validate_file_single_chunk(file):
-    
-    if file.multiple_chunks():
-        raise ValidationError("The file is too large to process")
-    else:
-        return file
+class JsonChoiceSelect(forms.Select):
+    """
+    A select rendered with only its current option, so that a page of many
+    rows does not repeat every choice in each of them. The page fills in the
+    other options from the cached JSON of PersonFormChoicesJson, under the
+    name given by choice_list
+    """
+
+    def __init__(self, choice_list, attrs=None):
+        super().__init__(attrs)
+        self.choice_list = choice_list
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-choice-list'] = self.choice_list
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        values = [ item for item in value if item ]
+        options = [ self.create_option(name, '', '---------', not values, 0, attrs=attrs) ]
+        for index, item in enumerate(values, start=1):
+            options.append(self.create_option(name, item, item, True, index, attrs=attrs))
+        return [(None, options, 0)]
+
+# choice list name: function returning the objects of a JsonChoiceSelect
+PERSON_FORM_CHOICE_LISTS = {
+    'subcommittee': lambda: lookup_objects(SubCommittee),
+    'position': lambda: lookup_objects(Position),
+    'savedlist': lambda: SavedList.objects.all(),
+}
+
+def person_form_choices_key():
+    """ Returns a cache key for the person form choices that changes when any of them does """
+
+    return versioned_key([lookup_version(SubCommittee), lookup_version(Position), model_version(SavedList)], 'person-form-choices')
+
+class PersonSubMembershipForm(SubMembershipForm):
+    formfield_callback = lookup_formfield_callback
+
+    class Meta(SubMembershipForm.Meta):
+        widgets = {
+            'subcommittee': JsonChoiceSelect('subcommittee'),
+            'position': JsonChoiceSelect('position'),
+        }
+
+class PersonListMembershipForm(ListMembershipForm):
+    class Meta(ListMembershipForm.Meta):
+        widgets = {
+            'savedlist': JsonChoiceSelect('savedlist'),
+        }
 
 class PersonCSVUploadForm(forms.Form):
-    csv_file = forms.FileField(label="File:", help_text='The CSV file to upload', validators=[FileExtensionValidator( ['csv'] ), validate_file_single_chunk ])
+    csv_file = forms.FileField(label="File:", help_text='The CSV file to upload', validators=[FileExtensionValidator( ['csv'] ) ])
     overwrite = forms.BooleanField(label="overwrite", required=False, help_text="Update record if the record is already in the database")
 
-PersonContactVoiceFormset = forms.inlineformset_factory(Person, ContactVoice, form=ContactVoiceForm, extra=10)
-PersonContactTextFormset = forms.inlineformset_factory(Person, ContactText, form=ContactTextForm, extra=10)
-PersonContactEmailFormset = forms.inlineformset_factory(Person, ContactEmail, form=ContactEmailForm, extra=10)
+class PersonBulkActionForm(forms.Form):
+    action = forms.ChoiceField(choices=[(action, label) for action, (label, function) in BULK_PERSON_ACTIONS.items()], help_text='What to do to the people')
+    scope = forms.ChoiceField(choices=[('selected', 'The checked people'), ('vista', 'Everyone in the current list')], initial='selected', help_text='Which people to do it to')
+    membership_status = LookupChoiceField(queryset=MembershipStatus.objects.all(), required=False, help_text='The status to give the people')
+    savedlist = forms.ModelChoiceField(queryset=SavedList.objects.all(), required=False, label='saved list', help_text='The list to add the people to')
+    subcommittee = LookupChoiceField(queryset=SubCommittee.objects.all(), required=False, help_text='The subcommittee to add the people to')
+    search = forms.CharField(required=False, widget=forms.HiddenInput, help_text='The search the current list is narrowed by')
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields['savedlist'].queryset = SavedList.objects.filter(Q(owner=user) | Q(shared=1))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        if action and not cleaned_data.get(action):
+            self.add_error(action, 'Choose this to ' + BULK_PERSON_ACTIONS[action][0].lower())
+
+        # the checked people are not a field, since there may be thousands
+        cleaned_data['people'] = []
+        if cleaned_data.get('scope') == 'selected':
+            try:
+                cleaned_data['people'] = [int(pk) for pk in self.data.getlist('people')]
+            except ValueError:
+                raise ValidationError('The checked people are not valid')
+            if not cleaned_data['people']:
+                raise ValidationError('No people are checked')
+        return cleaned_data
+
+# The person edit page adds new rows itself from each formset's empty_form
+PersonContactVoiceFormset = forms.inlineformset_factory(Person, ContactVoice, form=ContactVoiceForm, extra=0)
+PersonContactTextFormset = forms.inlineformset_factory(Person, ContactText, form=ContactTextForm, extra=0)
+PersonContactEmailFormset = forms.inlineformset_factory(Person, ContactEmail, form=ContactEmailForm, extra=0)
 PersonMembershipApplicationFormset = forms.inlineformset_factory(Person, MembershipApplication, form=MembershipApplicationForm, extra=10)
-PersonDuesPaymentFormset = forms.inlineformset_factory(Person, DuesPayment, form=DuesPaymentForm, extra=10)
-PersonSubMembershipFormset = forms.inlineformset_factory(Person, SubMembership, form=SubMembershipForm, extra=10)
-PersonLinkFormset = forms.inlineformset_factory(Person, Link, form=LinkForm, extra=10)
-PersonParticipationFormset = forms.inlineformset_factory(Person, Participation, form=ParticipationForm, extra=10)
-PersonListMembershipFormset = forms.inlineformset_factory(Person, ListMembership, form=ListMembershipForm, extra=10)
-PersonCommunicationEventFormset = forms.inlineformset_factory(Person, CommunicationEvent, form=CommunicationEventForm, extra=10, fk_name='target')
+PersonDuesPaymentFormset = forms.inlineformset_factory(Person, DuesPayment, form=DuesPaymentForm, extra=10, formfield_callback=lookup_formfield_callback)
+PersonSubMembershipFormset = forms.inlineformset_factory(Person, SubMembership, form=PersonSubMembershipForm, extra=0, formfield_callback=lookup_formfield_callback)
+PersonLinkFormset = forms.inlineformset_factory(Person, Link, form=LinkForm, extra=0)
+PersonParticipationFormset = forms.inlineformset_factory(Person, Participation, form=ParticipationForm, extra=10, formfield_callback=lookup_formfield_callback)
+PersonListMembershipFormset = forms.inlineformset_factory(Person, ListMembership, form=PersonListMembershipForm, extra=0)
+PersonCommunicationEventFormset = forms.inlineformset_factory(Person, CommunicationEvent, form=CommunicationEventForm, extra=10, fk_name='target', formfield_callback=lookup_formfield_callback)
 
-EventParticipationFormset = forms.inlineformset_factory(Event, Participation, form=ParticipationForm, extra=10)
+EventParticipationFormset = forms.inlineformset_factory(Event, Participation, form=ParticipationForm, extra=10, formfield_callback=lookup_formfield_callback)
 
 
 SavedListListMembershipFormset = forms.inlineformset_factory(SavedList, ListMembership, form=ListMembershipForm, extra=5)
 
-SubCommitteeSubMembershipFormset = forms.inlineformset_factory(SubCommittee, SubMembership, form=SubMembershipForm, extra=10)
+SubCommitteeSubMembershipFormset = forms.inlineformset_factory(SubCommittee, SubMembership, form=SubMembershipForm, extra=10, formfield_callback=lookup_formfield_callback)
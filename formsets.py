@@ -0,0 +1,58 @@
+from django.db import transaction
+
+from .caching import DATA_VERSION, bump_version
+from .pagination import model_version
+
+def bulk_save_formset(formset):
+    """
+    Saves a valid inline formset with at most one DELETE, one bulk INSERT
+    and one bulk UPDATE, instead of a query per form. The rows' save() and
+    post_save are not called, so the cached versions that post_save would
+    bump are bumped here. Returns True if any row was written
+    """
+
+    model = formset.model
+    manager = model._default_manager
+    field_names = { field.name for field in model._meta.concrete_fields if not field.primary_key }
+
+    deleted_forms = formset.deleted_forms if formset.can_delete else []
+
+    formset.deleted_objects = []
+    formset.changed_objects = []
+    formset.new_objects = []
+    changed_fields = set()
+
+    for form in formset.initial_forms:
+        if form.instance.pk is None:
+            continue
+        if form in deleted_forms:
+            formset.deleted_objects.append(form.instance)
+        elif form.has_changed():
+            formset.changed_objects.append((form.instance, form.changed_data))
+            changed_fields.update(field_name for field_name in form.changed_data if field_name in field_names)
+
+    for form in formset.extra_forms:
+        if form.has_changed() and form not in deleted_forms:
+            setattr(form.instance, formset.fk.name, formset.instance)
+            formset.new_objects.append(form.instance)
+
+    # rows with normalized keys, such as ContactVoice.number_key, fill them
+    # here since bulk writes do not call save()
+    key_fields = getattr(model, 'key_fields', {})
+    if key_fields:
+        for object in [*formset.new_objects, *[object for object, changed_data in formset.changed_objects]]:
+            object.fill_keys()
+        changed_fields.update(key_fields[field_name] for field_name in list(changed_fields) if field_name in key_fields)
+
+    if formset.deleted_objects:
+        manager.filter(pk__in=[object.pk for object in formset.deleted_objects]).delete()
+    if formset.new_objects:
+        manager.bulk_create(formset.new_objects)
+    if changed_fields:
+        manager.bulk_update([object for object, changed_data in formset.changed_objects], list(changed_fields))
+
+    written = bool(formset.deleted_objects or formset.new_objects or changed_fields)
+    if written:
+        transaction.on_commit(lambda: bump_version(model_version(model)))
+        transaction.on_commit(lambda: bump_version(DATA_VERSION))
+    return written
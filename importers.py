@@ -0,0 +1,367 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .caching import DATA_VERSION, bump_version
+from .lookups import lookup_objects
+from .models import (BulkRecordAction, ContactVoice, LocationBorough, LocationCity, LocationCongress,
+                     LocationMagistrate, LocationPrecinct, LocationStateHouse, LocationStateSenate,
+                     MembershipHistory, MembershipStatus, Person, Position, RecordAction, RecordactPerson,
+                     VotingAddress)
+from .normalize import phone_key
+from .pagination import model_version
+from .quorum import PEOPLE_VERSION
+from .rollups import refresh_district_rollups
+from .search import update_search_keys
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'SDCPEOPLE_IMPORT_BATCH_SIZE', 1000)
+
+LOCATION_COLUMNS = {
+    'city':LocationCity,
+    'borough':LocationBorough,
+    'congress':LocationCongress,
+    'magistrate':LocationMagistrate,
+    'precinct':LocationPrecinct,
+    'statehouse':LocationStateHouse,
+    'statesenate':LocationStateSenate,
+}
+
+PERSON_TEXT_COLUMNS = [
+    'name_prefix',
+    'name_last',
+    'name_first',
+    'name_middles',
+    'name_common',
+    'name_suffix',
+    'vb_campaign_id',
+]
+
+COLUMNS_AVAILABLE = [
+    'full_name',
+    *PERSON_TEXT_COLUMNS,
+    'voting_address',
+    'street_address',
+    'membership_status',
+    'positions',
+    *LOCATION_COLUMNS,
+    'phone',
+]
+
+class ImportRow:
+    """
+    One parsed line of the file, with its lookup values already resolved
+    """
+
+    def __init__(self):
+        self.van_id = ''
+        self.person_values = {}
+        self.street_address = ''
+        self.locations = {}
+        self.membership_status = None
+        self.phone = ''
+        self.positions = []
+        self.details = ''
+        self.person = None
+        self.created = False
+
+class PersonImporter:
+    """
+    Imports people from CSV rows in three stages: each batch of rows is
+    parsed against lookup tables loaded once per import, the people and
+    addresses the batch refers to are fetched with one query each, and
+    then everything is written with bulk_create and bulk_update.
+
+    The first row is the header. The first column is always the voter file
+    VAN ID, and the other columns are matched by name to COLUMNS_AVAILABLE.
+    Rows with no VAN ID add a new person each, unless require_van_id is set,
+    when they are skipped. Rows whose VAN ID belongs to a soft-deleted
+    person are skipped and counted in people_deleted_skipped
+    """
+
+    def __init__(self, user=None, overwrite=False, batch_size=DEFAULT_BATCH_SIZE, bulk_recordact_name='CSV Upload ', bulk_recordact=None, commit_each_batch=False, on_batch=None, require_van_id=False, start_row=0):
+        self.user = user
+        self.overwrite = overwrite
+        self.require_van_id = require_van_id
+        self.batch_size = batch_size
+        self.bulk_recordact_name = bulk_recordact_name
+        self.bulk_recordact = bulk_recordact
+        # By default the whole import is one transaction. Committing each batch
+        # lets progress written by on_batch be seen by other connections
+        self.commit_each_batch = commit_each_batch
+        self.on_batch = on_batch
+        self.data_columns = {}
+        # rows after the header already imported by an earlier run, which are skipped
+        self.rows_done = start_row
+        self.rows_failed = 0
+        self.people_created = 0
+        self.people_updated = 0
+        self.people_deleted_skipped = 0
+
+    def load_lookups(self):
+        self.locations = { col_name: { location.name: location for location in lookup_objects(model) } for col_name, model in LOCATION_COLUMNS.items() }
+        self.membership_statusses = { f'{mstatus.name} {mstatus.membership_type.name}'.lower():mstatus for mstatus in lookup_objects(MembershipStatus) }
+        self.positions = { position.title.lower():position for position in lookup_objects(Position) }
+
+    def read_header(self, header):
+        self.data_columns = {}
+        for col in range(1, len(header)):
+            if header[col].strip() in COLUMNS_AVAILABLE:
+                self.data_columns[header[col].strip()] = col
+
+    def run(self, rows):
+
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            return self
+
+        self.read_header(header)
+        self.load_lookups()
+        rows = islice(rows, self.rows_done, None)
+
+        if self.commit_each_batch:
+            try:
+                self.import_batches(rows)
+            finally:
+                # the batches committed before a failure are kept
+                self.refresh_counts()
+        else:
+            with transaction.atomic():
+                self.import_batches(rows)
+            self.refresh_counts()
+
+        return self
+
+    def refresh_counts(self):
+        # bulk writes send no signals, so recount every district once and
+        # drop the cached quorum counts and list results
+        refresh_district_rollups()
+        bump_version(PEOPLE_VERSION)
+        for model in [Person, VotingAddress, ContactVoice, Person.positions.through, RecordAction, RecordactPerson]:
+            bump_version(model_version(model))
+        bump_version(DATA_VERSION)
+
+    def import_batches(self, rows):
+
+        if self.bulk_recordact is None:
+            self.bulk_recordact = BulkRecordAction.objects.create(name=self.bulk_recordact_name)
+
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+
+            if self.commit_each_batch:
+                with transaction.atomic():
+                    self.import_batch(batch)
+            else:
+                self.import_batch(batch)
+
+            if self.on_batch is not None:
+                self.on_batch(self)
+
+    def parse_row(self, row):
+
+        import_row = ImportRow()
+        import_row.van_id = row[0].strip() if row else ''
+
+        for col_name, col_num in self.data_columns.items():
+            value = row[col_num].strip()
+            if value == '':
+                continue
+
+            import_row.details = import_row.details + col_name + ': ' + value + '; '
+
+            if col_name == 'full_name':
+                name_parts = value.split(', ')
+                import_row.person_values['name_last'] = name_parts[0]
+                name_parts = name_parts[1].split(' ')
+                import_row.person_values['name_first'] = name_parts[0]
+                if len(name_parts) > 1:
+                    import_row.person_values['name_middles'] = name_parts[1]
+            elif col_name in PERSON_TEXT_COLUMNS:
+                import_row.person_values[col_name] = value
+            elif col_name in ['voting_address', 'street_address']:
+                import_row.street_address = value
+            elif col_name == 'phone':
+                import_row.phone = value
+            elif col_name in LOCATION_COLUMNS:
+                if value in self.locations[col_name]:
+                    import_row.locations['location' + col_name] = self.locations[col_name][value]
+            elif col_name == 'membership_status':
+                if value.lower() in self.membership_statusses:
+                    import_row.membership_status = self.membership_statusses[value.lower()]
+            elif col_name == 'positions':
+                for title in value.split(','):
+                    if title.strip().lower() in self.positions:
+                        import_row.positions.append(self.positions[title.strip().lower()])
+
+        return import_row
+
+    def import_batch(self, batch):
+
+        import_rows = []
+        for row in batch:
+            try:
+                import_rows.append(self.parse_row(row))
+            except IndexError:
+                self.rows_failed = self.rows_failed + 1
+
+        self.rows_done = self.rows_done + len(batch)
+
+        import_rows = self.resolve_people(import_rows)
+        if not import_rows:
+            return
+
+        self.write_voting_addresses(import_rows)
+        self.write_people(import_rows)
+        self.write_phones(import_rows)
+        self.write_positions(import_rows)
+
+        update_search_keys({ import_row.person.pk for import_row in import_rows })
+
+        RecordAction.objects.bulk_record(
+            RecordactPerson,
+            [(import_row.person, ('CSV Created. ' if import_row.created else 'CSV Updated. ') + import_row.details) for import_row in import_rows],
+            self.user,
+            self.bulk_recordact,
+            batch_size=self.batch_size
+        )
+
+    def resolve_people(self, import_rows):
+        """
+        Matches rows to existing people by VAN ID and returns only the rows
+        that should be written
+        """
+
+        van_ids = { import_row.van_id for import_row in import_rows if import_row.van_id }
+        # soft-deleted people are matched too, so that their VAN IDs do not
+        # add second people. A person not deleted wins over a deleted one
+        people = { person.vb_voter_id:person for person in Person.all_objects.filter(vb_voter_id__in=van_ids).order_by('-is_deleted') }
+
+        rows_to_write = []
+        for import_row in import_rows:
+            if not import_row.van_id and self.require_van_id:
+                continue
+            if import_row.van_id in people:
+                if people[import_row.van_id].is_deleted:
+                    self.people_deleted_skipped = self.people_deleted_skipped + 1
+                    continue
+                if not self.overwrite:
+                    continue
+                import_row.person = people[import_row.van_id]
+                # the person may have been added by an earlier row of this batch
+                import_row.created = import_row.person.pk is None
+            else:
+                import_row.person = Person(vb_voter_id=import_row.van_id)
+                import_row.created = True
+                if import_row.van_id:
+                    people[import_row.van_id] = import_row.person
+
+            rows_to_write.append(import_row)
+
+        return rows_to_write
+
+    def write_voting_addresses(self, import_rows):
+
+        street_addresses = { import_row.street_address for import_row in import_rows if import_row.street_address }
+        voting_addresses = {}
+        for voting_address in VotingAddress.objects.filter(street_address__in=street_addresses):
+            voting_addresses.setdefault(voting_address.street_address, voting_address)
+
+        new_voting_addresses = []
+        changed_voting_addresses = {}
+        location_fields = set()
+
+        for import_row in import_rows:
+            if not import_row.street_address:
+                continue
+
+            voting_address = voting_addresses.get(import_row.street_address)
+            if voting_address is None:
+                voting_address = VotingAddress(street_address=import_row.street_address)
+                voting_addresses[import_row.street_address] = voting_address
+                new_voting_addresses.append(voting_address)
+
+            for fieldname, location in import_row.locations.items():
+                if getattr(voting_address, fieldname + '_id') != location.pk:
+                    setattr(voting_address, fieldname, location)
+                    location_fields.add(fieldname)
+                    if voting_address.pk is not None:
+                        changed_voting_addresses[voting_address.pk] = voting_address
+
+            import_row.person.voting_address = voting_address
+
+        VotingAddress.objects.bulk_create(new_voting_addresses, batch_size=self.batch_size)
+        if changed_voting_addresses:
+            VotingAddress.objects.bulk_update(changed_voting_addresses.values(), list(location_fields), batch_size=self.batch_size)
+
+    def write_people(self, import_rows):
+
+        new_people = []
+        changed_people = {}
+        changed_fields = set()
+
+        for import_row in import_rows:
+            person = import_row.person
+
+            if import_row.created:
+                new_people.append(person)
+            else:
+                changed_people[person.pk] = person
+
+            for fieldname, value in import_row.person_values.items():
+                setattr(person, fieldname, value)
+                changed_fields.add(fieldname)
+            if import_row.street_address:
+                changed_fields.add('voting_address')
+            if import_row.membership_status is not None:
+                person.membership_status = import_row.membership_status
+                changed_fields.add('membership_status')
+
+        # a second row for a person created in this batch refers to the same object
+        new_people = list({ id(person):person for person in new_people }.values())
+
+        Person.objects.bulk_create(new_people, batch_size=self.batch_size)
+        if changed_people and changed_fields:
+            Person.objects.bulk_update(changed_people.values(), list(changed_fields), batch_size=self.batch_size)
+
+        self.people_created = self.people_created + len(new_people)
+        self.people_updated = self.people_updated + len(changed_people)
+
+        MembershipHistory.objects.record_changes([*new_people, *changed_people.values()], batch_size=self.batch_size)
+
+    def write_phones(self, import_rows):
+
+        # phones are matched on their E.164 keys, so "(555) 555-0100" and
+        # "555.555.0100" are the same phone. Numbers without a key are
+        # matched as written
+        phone_rows = [import_row for import_row in import_rows if import_row.phone]
+        existing_phones = {
+            (person_id, number_key or number) for person_id, number_key, number in ContactVoice.objects.filter(
+                person__in=[import_row.person for import_row in phone_rows if not import_row.created]
+            ).filter(
+                Q(number_key__in=[phone_key(import_row.phone) for import_row in phone_rows]) | Q(number__in=[import_row.phone for import_row in phone_rows])
+            ).values_list('person_id', 'number_key', 'number')
+        }
+
+        new_contact_voices = []
+        for import_row in phone_rows:
+            contact_voice = ContactVoice(person=import_row.person, number=import_row.phone)
+            contact_voice.fill_keys()
+            match_key = (import_row.person.pk, contact_voice.number_key or contact_voice.number)
+            if match_key not in existing_phones:
+                existing_phones.add(match_key)
+                new_contact_voices.append(contact_voice)
+
+        ContactVoice.objects.bulk_create(new_contact_voices, batch_size=self.batch_size)
+
+    def write_positions(self, import_rows):
+
+        PersonPosition = Person.positions.through
+        PersonPosition.objects.bulk_create([
+            PersonPosition(person_id=import_row.person.pk, position_id=position.pk)
+            for import_row in import_rows for position in import_row.positions
+        ], batch_size=self.batch_size, ignore_conflicts=True)
@@ -0,0 +1,73 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from .caching import DATA_VERSION, bump_version
+from .models import ListMembership, Person
+from .pagination import model_version
+
+LIST_OPERATIONS = [
+    ('union', 'Anyone in any of them'),
+    ('intersection', 'Only people in all of them'),
+    ('difference', 'People in the first but in none of the others'),
+]
+
+def savedlist_people(pk):
+    return Person.objects.filter(listmembership__savedlist_id=pk)
+
+def event_people(pk):
+    return Person.objects.filter(participation__event_id=pk)
+
+def bulk_communication_people(pk):
+    return Person.objects.filter(communication_as_target__bulk_communication_id=pk)
+
+# source kind: function returning the people of one source by its id
+PEOPLE_SOURCES = {
+    'savedlist': savedlist_people,
+    'event': event_people,
+    'bulkcommunication': bulk_communication_people,
+}
+
+def person_ids(people):
+    """ Returns a queryset selecting only the ids of people, for use in set queries """
+
+    return people.order_by().values(list_person_id=F('pk'))
+
+def combine_people(operation, base, others):
+    """
+    Combines person querysets with UNION, INTERSECT or EXCEPT. The result
+    is a single query of person ids
+    """
+
+    if operation not in dict(LIST_OPERATIONS):
+        raise ValueError(f'Unknown list operation {operation}')
+
+    return getattr(person_ids(base), operation)(*[person_ids(other) for other in others])
+
+def insert_list_memberships(savedlist, person_id_queryset):
+    """
+    Adds a ListMembership for each id selected by person_id_queryset with
+    one INSERT ... SELECT, so that the people are never loaded into Python.
+    Returns the number of memberships added
+    """
+
+    select_sql, params = person_id_queryset.query.sql_with_params()
+
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote_name(ListMembership._meta.db_table)} '
+            f'({quote_name("person_id")}, {quote_name("savedlist_id")}) '
+            f'SELECT list_people.list_person_id, %s FROM ({select_sql}) list_people',
+            [savedlist.pk, *params]
+        )
+        added = cursor.rowcount
+
+    # a raw INSERT sends no signals
+    transaction.on_commit(lambda: bump_version(model_version(ListMembership)))
+    transaction.on_commit(lambda: bump_version(DATA_VERSION))
+    return added
+
+def add_people_to_list(savedlist, people):
+    """ Adds the people of a queryset who are not already on a saved list """
+
+    return insert_list_memberships(savedlist, person_ids(people.exclude(listmembership__savedlist=savedlist).distinct()))
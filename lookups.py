@@ -0,0 +1,196 @@
+import copy
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.forms import ModelChoiceField, ModelMultipleChoiceField
+from django.forms.models import ModelChoiceIterator
+
+from .caching import get_version
+from .models import (CommunicationResult, EventType, LocationBorough, LocationCity, LocationCongress, LocationMagistrate,
+                     LocationPrecinct, LocationStateHouse, LocationStateSenate, MembershipStatus, MembershipType,
+                     ParticipationLevel, PaymentMethod, Position, SubCommittee)
+
+# Small reference tables that are read far more often than they change.
+# Each process keeps a copy of every table it has read, and checks the
+# table's version in the shared cache before using it, so a change made in
+# any process is seen by all of them
+
+LOOKUP_MODELS = [
+    LocationBorough,
+    LocationCity,
+    LocationCongress,
+    LocationMagistrate,
+    LocationPrecinct,
+    LocationStateHouse,
+    LocationStateSenate,
+    MembershipStatus,
+    MembershipType,
+    Position,
+    SubCommittee,
+    EventType,
+    ParticipationLevel,
+    PaymentMethod,
+    CommunicationResult,
+]
+
+# tables with more rows than this are read from the database as usual
+LOOKUP_MAX_ROWS = getattr(settings, 'SDCPEOPLE_LOOKUP_MAX_ROWS', 5000)
+
+# model label: (version, {pk: object} in Meta ordering)
+LOOKUP_TABLES = {}
+
+def lookup_version(model):
+    return f'lookup:{model._meta.label_lower}'
+
+def is_lookup_model(model):
+    return model in LOOKUP_MODELS
+
+def load_lookup_table(model):
+    related = [field.name for field in model._meta.concrete_fields if field.is_relation]
+    return { object.pk: object for object in model._default_manager.select_related(*related)[:LOOKUP_MAX_ROWS + 1] }
+
+def lookup_table(model):
+    """
+    Returns {pk: object} for a lookup model, in its Meta ordering, or None
+    if the table is too large to keep. The objects are shared and must not
+    be changed
+    """
+
+    label = model._meta.label_lower
+    version = get_version(lookup_version(model))
+
+    table = LOOKUP_TABLES.get(label)
+    if table is None or table[0] != version:
+        table = LOOKUP_TABLES[label] = (version, load_lookup_table(model))
+
+    if len(table[1]) > LOOKUP_MAX_ROWS:
+        return None
+    return table[1]
+
+def dependent_lookup_models(model):
+    """ Returns a lookup model and the lookup models whose rows show it, such as MembershipStatus for MembershipType """
+
+    return [model, *[lookup_model for lookup_model in LOOKUP_MODELS if any(field.is_relation and field.related_model is model for field in lookup_model._meta.concrete_fields)]]
+
+def forget_lookup_table(model):
+    LOOKUP_TABLES.pop(model._meta.label_lower, None)
+
+def lookup_objects(model):
+    """ Returns the rows of a lookup model as a list, in its Meta ordering """
+
+    table = lookup_table(model)
+    if table is None:
+        return list(model._default_manager.all())
+    return list(table.values())
+
+def field_lookup_tables(model, field_names):
+    """ Returns {field name: lookup table} for some foreign keys of a model to lookup models """
+
+    return { field_name: lookup_table(model._meta.get_field(field_name).related_model) for field_name in field_names }
+
+def attach_lookups(object, tables):
+    """
+    Sets the related objects of some foreign keys from tables made by
+    field_lookup_tables, so that reading them costs no query. Keys missing
+    from a table are left to load as usual
+    """
+
+    for field_name, table in tables.items():
+        field = object._meta.get_field(field_name)
+        related_id = getattr(object, field.attname)
+        if related_id is None:
+            field.set_cached_value(object, None)
+        elif table is not None and related_id in table:
+            field.set_cached_value(object, table[related_id])
+
+class LookupChoiceIterator(ModelChoiceIterator):
+    """ Lists the choices of a lookup field from its lookup table """
+
+    def lookup_table(self):
+        if self.queryset.query.has_filters():
+            return None
+        return lookup_table(self.queryset.model)
+
+    def __iter__(self):
+        table = self.lookup_table()
+        if table is None:
+            yield from super().__iter__()
+            return
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for object in table.values():
+            yield self.choice(object)
+
+    def __len__(self):
+        table = self.lookup_table()
+        if table is None:
+            return super().__len__()
+        return len(table) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        table = self.lookup_table()
+        if table is None:
+            return super().__bool__()
+        return self.field.empty_label is not None or bool(table)
+
+class LookupChoiceField(ModelChoiceField):
+    """ A ModelChoiceField for a lookup model that lists and checks its choices without a query """
+
+    iterator = LookupChoiceIterator
+
+    def lookup_table(self):
+        if self.to_field_name or self.queryset.query.has_filters():
+            return None
+        return lookup_table(self.queryset.model)
+
+    def to_python(self, value):
+        table = self.lookup_table()
+        if table is None or value in self.empty_values:
+            return super().to_python(value)
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            pk = self.queryset.model._meta.pk.to_python(value)
+        except ValidationError:
+            pk = None
+        if pk not in table:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return copy.copy(table[pk])
+
+class LookupMultipleChoiceField(ModelMultipleChoiceField):
+    """ A ModelMultipleChoiceField for a lookup model that lists and checks its choices without a query """
+
+    iterator = LookupChoiceIterator
+
+    def lookup_table(self):
+        if self.to_field_name or self.queryset.query.has_filters():
+            return None
+        return lookup_table(self.queryset.model)
+
+    def _check_values(self, value):
+        table = self.lookup_table()
+        if table is None:
+            return super()._check_values(value)
+
+        objects = []
+        for item in value:
+            try:
+                pk = self.queryset.model._meta.pk.to_python(item)
+            except ValidationError:
+                raise ValidationError(self.error_messages['invalid_pk_value'], code='invalid_pk_value', params={'pk': item})
+            if pk not in table:
+                raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': item})
+            if table[pk] not in objects:
+                objects.append(table[pk])
+        return objects
+
+def lookup_formfield_callback(db_field, **kwargs):
+    """ A ModelForm formfield_callback that gives lookup foreign keys their cached choices """
+
+    if db_field.is_relation and is_lookup_model(db_field.related_model):
+        kwargs.setdefault('form_class', LookupMultipleChoiceField if db_field.many_to_many else LookupChoiceField)
+    return db_field.formfield(**kwargs)
@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from sdcpeople.rollups import refresh_district_rollups
+
+class Command(BaseCommand):
+    help = "Recounts the membership rollups of every district, such as when first installing rollups."
+
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        refresh_district_rollups()
+        end_time = timezone.now()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshing district rollups took: {(end_time-start_time).total_seconds()} seconds."
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from sdcpeople.dedupe import DEDUPE_MIN_SCORE, find_duplicates
+
+class Command(BaseCommand):
+    help = "Finds people who may be entered more than once and queues each pair for review as a duplicate candidate."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-score', type=int, default=DEDUPE_MIN_SCORE, help='The lowest score, from 0 to 100, of a pair to queue')
+
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        found = find_duplicates(options['min_score'])
+        end_time = timezone.now()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Found {found} possible duplicates in: {(end_time-start_time).total_seconds()} seconds."
+            )
+        )
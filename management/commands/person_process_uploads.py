@@ -0,0 +1,20 @@
+import time
+from django.core.management import BaseCommand
+
+from sdcpeople.uploads import process_queued_uploads
+
+class Command(BaseCommand):
+    help = "Processes queued person CSV uploads. Use --loop to keep running as a worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action='store_true', help="Keep checking the queue instead of exiting when it is empty")
+        parser.add_argument("--sleep", type=float, default=5, help="Seconds to wait between checks when looping")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_queued_uploads()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} uploads."))
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,27 @@
+import datetime
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from sdcpeople.models import PURGE_BATCH_SIZE, Person
+
+PURGE_AFTER_DAYS = getattr(settings, 'SDCPEOPLE_PURGE_AFTER_DAYS', 365)
+
+class Command(BaseCommand):
+    help = "Deletes for good the people soft-deleted more than some days ago, with everything that cascades from them, in short batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=PURGE_AFTER_DAYS, help='Purge people soft-deleted more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='How many people to delete in each transaction')
+
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        cutoff = start_time - datetime.timedelta(days=options['days'])
+        purged = Person.all_objects.filter(is_deleted=True, deleted_when__lt=cutoff).purge(options['batch_size'])
+        end_time = timezone.now()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {purged} people deleted before {cutoff.date().isoformat()} in: {(end_time-start_time).total_seconds()} seconds."
+            )
+        )
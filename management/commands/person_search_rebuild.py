@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from sdcpeople.search import rebuild_search_keys
+
+class Command(BaseCommand):
+    help = "Rebuilds the person search keys, such as after a bulk import or when first installing search."
+
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        rebuild_search_keys()
+        end_time = timezone.now()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilding search keys took: {(end_time-start_time).total_seconds()} seconds."
+            )
+        )
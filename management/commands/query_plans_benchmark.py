@@ -0,0 +1,70 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from sdcpeople.models import CommunicationEvent, ContactVoice, Event, History, Person, RecordAction
+
+# the models whose Meta.indexes make up the index pack
+INDEX_PACK_MODELS = [Person, Event, CommunicationEvent, RecordAction, History]
+
+# name: a function returning the queryset of a standard workload
+WORKLOADS = {
+    # the default order, which person_live_name_idx serves without a join or a sort
+    'person list': lambda: Person.objects.all()[:30],
+    'person list by name': lambda: Person.objects.order_by('name_last', 'name_first')[:30],
+    'import match on VAN id': lambda: Person.objects.filter(vb_voter_id__in=['100001', '100002', '100003']),
+    'event list': lambda: Event.objects.all()[:30],
+    'communication list': lambda: CommunicationEvent.objects.all()[:30],
+    'record action list': lambda: RecordAction.objects.all()[:30],
+    'history of a person': lambda: History.objects.filter(modelname='Person', objectid=1),
+    'who has a phone number': lambda: ContactVoice.objects.filter(number_key='+15555550100'),
+}
+
+class Command(BaseCommand):
+    help = "Shows the query plan and timing of each standard list and import query without the index pack and with it. The indexes are dropped inside a transaction that is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='How many times to run each query for its timing')
+        parser.add_argument('--workload', action='append', choices=list(WORKLOADS), help='Only run this workload; may be given more than once')
+
+    def measure(self, queryset, repeat):
+        plan = queryset.explain()
+        start_time = time.perf_counter()
+        for indx in range(repeat):
+            list(queryset.all())
+        return plan, (time.perf_counter() - start_time) / repeat * 1000
+
+    def measure_all(self, workloads, repeat):
+        return { name: self.measure(WORKLOADS[name](), repeat) for name in workloads }
+
+    def handle(self, *args, **options):
+        workloads = options['workload'] or list(WORKLOADS)
+        repeat = max(1, options['repeat'])
+
+        before = {}
+        if connection.features.can_rollback_ddl:
+            with transaction.atomic():
+                # the statements alone, since SQLite allows no schema editor in a transaction
+                schema_editor = connection.SchemaEditorClass(connection, atomic=False)
+                for model in INDEX_PACK_MODELS:
+                    for index in model._meta.indexes:
+                        schema_editor.execute(index.remove_sql(model, schema_editor))
+                before = self.measure_all(workloads, repeat)
+                transaction.set_rollback(True)
+        else:
+            self.stdout.write(self.style.WARNING(f"{connection.vendor} cannot roll back dropped indexes, so only the plans with the index pack are shown."))
+
+        after = self.measure_all(workloads, repeat)
+
+        for name in workloads:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, measured in [('without the index pack', before), ('with the index pack', after)]:
+                if name not in measured:
+                    continue
+                plan, milliseconds = measured[name]
+                self.stdout.write(f"  {label}: {milliseconds:.2f} ms")
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        self.stdout.write(self.style.SUCCESS(f"Compared {len(workloads)} workloads on {connection.vendor}."))
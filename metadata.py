@@ -0,0 +1,75 @@
+from django.apps import apps
+from tougshire_vistas.views import make_vista_fields
+
+from .caching import get_version
+from .pagination import model_version
+from .vistas import field_path_models
+
+# Model metadata that list and detail views used to rebuild from _meta on
+# every request. Labels are built once when the app is ready; vista field
+# definitions are built on first use in each process
+
+# model label: {field name: label}
+FIELD_LABELS = {}
+
+# (model label, field names, labels): (choice model versions, vista fields)
+VISTA_FIELDS = {}
+
+def model_field_labels(model):
+    """ Returns the title-cased verbose names of a model's own fields, leaving out reverse relations """
+
+    return { field.name: field.verbose_name.title() for field in model._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+
+def build_registry():
+    FIELD_LABELS.clear()
+    VISTA_FIELDS.clear()
+    for model in apps.get_app_config('sdcpeople').get_models():
+        FIELD_LABELS[model._meta.label_lower] = model_field_labels(model)
+
+def field_labels(model):
+    """ Returns {field name: label} for a model. The dict is shared, so it must not be changed """
+
+    labels = FIELD_LABELS.get(model._meta.label_lower)
+    if labels is None:
+        labels = FIELD_LABELS[model._meta.label_lower] = model_field_labels(model)
+    return labels
+
+def field_label(model, field_name):
+    return field_labels(model).get(field_name, field_name)
+
+def field_columns(model, field_names):
+    """ Returns a column of {'name', 'label'} for each field name """
+
+    return [{ 'name':field_name, 'label':field_label(model, field_name) } for field_name in field_names]
+
+def choice_models(model, field_names):
+    """ Returns the models whose rows may be offered as choices by the fields """
+
+    choice_models = set()
+    for field_name in field_names:
+        path_models = field_path_models(model, field_name)
+        if path_models:
+            choice_models.add(path_models[-1])
+    return sorted(choice_models, key=lambda choice_model: choice_model._meta.label_lower)
+
+def vista_fields(model, field_names, labels=None):
+    """
+    Returns make_vista_fields(model, field_names=field_names), with the
+    labels of {field name: label} put in place of those made. The
+    definitions are kept for the process and made again after a model
+    whose rows they offer as choices changes. They are shared, so they
+    must not be changed
+    """
+
+    labels = labels or {}
+    key = (model._meta.label_lower, tuple(field_names), tuple(sorted(labels.items())))
+    versions = tuple(get_version(model_version(choice_model)) for choice_model in choice_models(model, field_names))
+
+    registered = VISTA_FIELDS.get(key)
+    if registered is None or registered[0] != versions:
+        fields = make_vista_fields(model, field_names=list(field_names))
+        for field_name, label in labels.items():
+            fields[field_name]['label'] = label
+        registered = VISTA_FIELDS[key] = (versions, fields)
+
+    return registered[1]
@@ -0,0 +1,61 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sdcpeople', '0034_alter_savedlist_options_remove_savedlist_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='status',
+            field=models.IntegerField(choices=[(0, 'Complete'), (1, 'Queued'), (2, 'Running'), (3, 'Failed')], default=0, help_text='If this action is waiting to be processed, being processed, or finished', verbose_name='status'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='source_file',
+            field=models.CharField(blank=True, help_text='The stored file that this action is processing, such as an uploaded CSV', max_length=250, verbose_name='source file'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='overwrite',
+            field=models.BooleanField(default=False, help_text='If existing records should be updated by this action', verbose_name='overwrite'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='user',
+            field=models.ForeignKey(blank=True, help_text='The user who started this action', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='rows_done',
+            field=models.IntegerField(default=0, help_text='The number of rows that have been processed', verbose_name='rows done'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='rows_failed',
+            field=models.IntegerField(default=0, help_text='The number of rows that could not be processed', verbose_name='rows failed'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='started',
+            field=models.DateTimeField(blank=True, help_text='When processing started', null=True, verbose_name='started'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='finished',
+            field=models.DateTimeField(blank=True, help_text='When processing finished', null=True, verbose_name='finished'),
+        ),
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='message',
+            field=models.TextField(blank=True, help_text='The error message if this action failed', verbose_name='message'),
+        ),
+    ]
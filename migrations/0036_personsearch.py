@@ -0,0 +1,78 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FTS_TABLE = 'sdcpeople_personsearch_fts'
+TRGM_INDEX = 'sdcpeople_personsearch_key_trgm'
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(search_key, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON sdcpeople_personsearch BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_key) VALUES (new.person_id, new.search_key); END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON sdcpeople_personsearch BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.person_id; "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_key) VALUES (new.person_id, new.search_key); END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON sdcpeople_personsearch BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.person_id; END",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRESQL_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON sdcpeople_personsearch USING gin (search_key gin_trgm_ops)",
+]
+
+POSTGRESQL_DROP = [
+    f"DROP INDEX IF EXISTS {TRGM_INDEX}",
+]
+
+def create_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        for statement in SQLITE_CREATE:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        for statement in POSTGRESQL_CREATE:
+            schema_editor.execute(statement)
+
+def drop_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        for statement in POSTGRESQL_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0035_bulkrecordaction_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonSearch',
+            fields=[
+                ('person', models.OneToOneField(help_text='The person this search key finds', on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='sdcpeople.person')),
+                ('search_key', models.TextField(blank=True, help_text="The person's names, address, phone numbers and email addresses, folded to lowercase without accents or punctuation", verbose_name='search key')),
+            ],
+            options={
+                'ordering': ['person_id'],
+            },
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+    ]
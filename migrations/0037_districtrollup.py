@@ -0,0 +1,32 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0036_personsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistrictRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_field', models.CharField(choices=[('locationcity', 'City or County'), ('locationcongress', 'Congressional District'), ('locationstatesenate', 'State Senatorial District'), ('locationstatehouse', 'House of Delegates District'), ('locationmagistrate', 'Magisterial District'), ('locationborough', 'Borough'), ('locationprecinct', 'Precinct')], help_text='The voting address field for this kind of district', max_length=30, verbose_name='district type')),
+                ('location_id', models.BigIntegerField(help_text='The id of the district', verbose_name='district id')),
+                ('location_name', models.CharField(blank=True, help_text='The name of the district when the counts were taken', max_length=100, verbose_name='district')),
+                ('people', models.IntegerField(default=0, help_text='The number of people with a voting address in this district', verbose_name='people')),
+                ('members', models.IntegerField(default=0, help_text='The number of people whose status counts as a member', verbose_name='members')),
+                ('quorum', models.IntegerField(default=0, help_text='The number of people whose status counts toward quorum', verbose_name='quorum members')),
+                ('voters', models.IntegerField(default=0, help_text='The number of people whose status can vote', verbose_name='voting members')),
+                ('dues_payers', models.IntegerField(default=0, help_text='The number of people whose status pays dues', verbose_name='dues payers')),
+                ('refreshed', models.DateTimeField(auto_now=True, help_text='When these counts were last taken', verbose_name='refreshed')),
+            ],
+            options={
+                'ordering': ['location_field', 'location_name'],
+                'unique_together': {('location_field', 'location_id')},
+            },
+        ),
+    ]
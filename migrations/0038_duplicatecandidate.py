@@ -0,0 +1,34 @@
+# Generated by Django 4.1.7 on 2026-10-18 14:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sdcpeople', '0037_districtrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField(default=0, help_text='How likely the two are the same person, from 0 to 100', verbose_name='score')),
+                ('reasons', models.CharField(blank=True, help_text='What the two people have in common, such as name and phone', max_length=100, verbose_name='reasons')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('merged', 'Merged'), ('dismissed', 'Not a Duplicate')], default='open', help_text='Whether this pair has been reviewed, and what was decided', max_length=20, verbose_name='status')),
+                ('found', models.DateTimeField(auto_now_add=True, help_text='When this pair was found', verbose_name='found')),
+                ('reviewed', models.DateTimeField(blank=True, help_text='When this pair was merged or dismissed', null=True, verbose_name='reviewed')),
+                ('duplicate', models.ForeignKey(help_text='The person who may be a duplicate of the person to keep', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sdcpeople.person')),
+                ('person', models.ForeignKey(help_text='The person to keep if the two are merged', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sdcpeople.person')),
+                ('reviewed_by', models.ForeignKey(blank=True, help_text='The user who merged or dismissed this pair', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['status', '-score', 'found'],
+                'unique_together': {('person', 'duplicate')},
+            },
+        ),
+    ]
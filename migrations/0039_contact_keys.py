@@ -0,0 +1,48 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+from sdcpeople.normalize import email_key, phone_key
+
+BACKFILL_BATCH_SIZE = 2000
+
+def backfill_keys(model, source_field, key_field, normalize):
+    batch = []
+    for contact in model.objects.only('pk', source_field).order_by('pk').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        setattr(contact, key_field, normalize(getattr(contact, source_field)))
+        batch.append(contact)
+        if len(batch) == BACKFILL_BATCH_SIZE:
+            model.objects.bulk_update(batch, [key_field])
+            batch = []
+    model.objects.bulk_update(batch, [key_field])
+
+def fill_contact_keys(apps, schema_editor):
+    backfill_keys(apps.get_model('sdcpeople', 'ContactVoice'), 'number', 'number_key', phone_key)
+    backfill_keys(apps.get_model('sdcpeople', 'ContactText'), 'number', 'number_key', phone_key)
+    backfill_keys(apps.get_model('sdcpeople', 'ContactEmail'), 'address', 'address_key', email_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0038_duplicatecandidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactemail',
+            name='address_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='The email address trimmed and lowercased, for finding who has an address', max_length=250, verbose_name='address key'),
+        ),
+        migrations.AddField(
+            model_name='contacttext',
+            name='number_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='The phone number in E.164 form, such as +15555550100, for finding who has a number', max_length=16, verbose_name='number key'),
+        ),
+        migrations.AddField(
+            model_name='contactvoice',
+            name='number_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='The phone number in E.164 form, such as +15555550100, for finding who has a number', max_length=16, verbose_name='number key'),
+        ),
+        migrations.RunPython(fill_contact_keys, migrations.RunPython.noop),
+    ]
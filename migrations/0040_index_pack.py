@@ -0,0 +1,41 @@
+# Generated by Django 4.1.7 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0039_contact_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['name_last', 'name_first'], name='person_live_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['vb_voter_id'], name='person_vb_voter_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-when'], name='event_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='communicationevent',
+            index=models.Index(fields=['-when'], name='communicationevent_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recordaction',
+            index=models.Index(fields=['-when'], name='recordaction_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['-when'], name='history_when_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['modelname', 'objectid'], name='history_object_idx'),
+        ),
+    ]
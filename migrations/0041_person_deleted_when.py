@@ -0,0 +1,29 @@
+# Generated by Django 4.1.7 on 2026-10-18 17:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def date_deleted_people(apps, schema_editor):
+    # people deleted before this was recorded count as deleted now
+    apps.get_model('sdcpeople', 'Person').objects.filter(is_deleted=True, deleted_when__isnull=True).update(deleted_when=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0040_index_pack'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='deleted_when',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When this person was soft-deleted', null=True, verbose_name='deleted when'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_when'], name='person_deleted_when_idx'),
+        ),
+        migrations.RunPython(date_deleted_people, migrations.RunPython.noop),
+    ]
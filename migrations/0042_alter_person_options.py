@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 18:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0041_person_deleted_when'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='person',
+            options={'ordering': ['name_last', 'name_first']},
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.7 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+def date_running_uploads(apps, schema_editor):
+    # uploads running before progress was dated count as updated when they started
+    apps.get_model('sdcpeople', 'BulkRecordAction').objects.filter(updated__isnull=True).update(updated=models.F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0042_alter_person_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='updated',
+            field=models.DateTimeField(blank=True, help_text='When the worker processing this action last recorded progress', null=True, verbose_name='updated'),
+        ),
+        migrations.RunPython(date_running_uploads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.7 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0043_bulkrecordaction_updated'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='districtrollup',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='districtrollup',
+            constraint=models.UniqueConstraint(fields=('location_field', 'location_id'), name='districtrollup_district_unique'),
+        ),
+    ]
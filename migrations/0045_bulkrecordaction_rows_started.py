@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdcpeople', '0044_districtrollup_district_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkrecordaction',
+            name='rows_started',
+            field=models.IntegerField(default=0, help_text='The number of rows already done when processing last started, such as when resuming', verbose_name='rows started'),
+        ),
+    ]
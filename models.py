@@ -2,10 +2,14 @@ from bdb import effective
 import datetime
 from django.apps import apps
 from xmlrpc.client import Boolean
-from django.db import models
+from django.db import models, transaction
 from django.forms import CharField
 from datetime import date
 from django.conf import settings
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .normalize import email_key, phone_key
 
 class MembershipType(models.Model):
 
@@ -182,6 +186,17 @@ class Position(models.Model):
         ordering = ['-rank_number', 'title']
 
 
+# the VotingAddress foreign keys that people are rolled up by
+DISTRICT_LOCATION_FIELDS = [
+    'locationcity',
+    'locationcongress',
+    'locationstatesenate',
+    'locationstatehouse',
+    'locationmagistrate',
+    'locationborough',
+    'locationprecinct',
+]
+
 class VotingAddress(models.Model):
 
     street_address = models.TextField(
@@ -249,6 +264,14 @@ class VotingAddress(models.Model):
     def __str__(self):
         return self.street_address[:50:]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the districts as loaded, so that a change can update the rollups
+        # of the district that was left as well as the one that was joined
+        instance.loaded_locations = { fieldname: instance.__dict__.get(fieldname + '_id') for fieldname in DISTRICT_LOCATION_FIELDS }
+        return instance
+
 
 class SubCommittee(models.Model):
 
@@ -269,7 +292,59 @@ class SubCommittee(models.Model):
     class Meta:
         ordering = ['-rank_number', 'name']
 
-class NonDeletedPersonManager(models.Manager):
+# sent after people are soft-deleted or restored by one UPDATE, which sends
+# no post_save, with the ids of their voting addresses
+people_deleted_changed = Signal()
+
+PURGE_BATCH_SIZE = getattr(settings, 'SDCPEOPLE_PURGE_BATCH_SIZE', 500)
+
+class PersonQuerySet(models.QuerySet):
+
+    def set_deleted(self, is_deleted, when=None):
+        changed = self.filter(is_deleted=not is_deleted)
+        voting_address_ids = set(changed.order_by().values_list('voting_address_id', flat=True).distinct())
+        updated = changed.update(
+            is_deleted=is_deleted,
+            deleted_when=(when or timezone.now()) if is_deleted else None,
+        )
+        if updated:
+            people_deleted_changed.send(sender=self.model, voting_address_ids=voting_address_ids)
+        return updated
+
+    def soft_delete(self, when=None):
+        """ Marks the people deleted with one UPDATE. Returns the number marked """
+
+        return self.set_deleted(True, when)
+
+class AllPersonQuerySet(PersonQuerySet):
+    """
+    People whether deleted or not. Only these can be restored or purged,
+    since Person.objects never holds a deleted person
+    """
+
+    def restore(self):
+        """ Marks soft-deleted people not deleted with one UPDATE. Returns the number restored """
+
+        return self.set_deleted(False)
+
+    def purge(self, batch_size=None):
+        """
+        Deletes the soft-deleted people for good, with everything that
+        cascades from them, in batches of their own transactions so that
+        no lock is held for long. Returns the number deleted
+        """
+
+        batch_size = batch_size or PURGE_BATCH_SIZE
+        purged = 0
+        while True:
+            with transaction.atomic():
+                pks = list(self.filter(is_deleted=True).order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    return purged
+                self.model.all_objects.filter(pk__in=pks).delete()
+            purged = purged + len(pks)
+
+class NonDeletedPersonManager(models.Manager.from_queryset(PersonQuerySet)):
 
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
@@ -352,41 +427,231 @@ class Person(models.Model):
         default=False,
         help_text='If this object is soft-deleted'
     )
+    deleted_when = models.DateTimeField(
+        'deleted when',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='When this person was soft-deleted'
+    )
 
     class Meta:
-        ordering = ['is_deleted', 'membership_status__is_quorum', 'name_last', 'name_first']
+        # only the columns of person_live_name_idx, so that the index serves
+        # the default order without a join or a sort
+        ordering = ['name_last', 'name_first']
+        indexes = [
+            # lists of people, who are nearly always the ones not deleted, by name
+            models.Index(fields=['name_last', 'name_first'], condition=models.Q(is_deleted=False), name='person_live_name_idx'),
+            # the importer matches each row on its VAN id
+            models.Index(fields=['vb_voter_id'], name='person_vb_voter_id_idx'),
+            # the few soft-deleted people, for purging
+            models.Index(fields=['deleted_when'], condition=models.Q(is_deleted=True), name='person_deleted_when_idx'),
+        ]
 
     def __str__(self):
         if(self.is_deleted):
             return '--deleted-- {} {}'.format(self.name_common if self.name_common else self.name_first, self.name_last)
         return '{} {}'.format(self.name_common if self.name_common else self.name_first, self.name_last)
 
+    # the membership status last written to MembershipHistory, taken from
+    # the values loaded from the database so that save needs no query
+    recorded_membership_status_id = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.recorded_membership_status_id = instance.__dict__.get('membership_status_id', models.DEFERRED)
+        instance.loaded_rollup_values = instance.rollup_values()
+        return instance
+
+    # the values that decide how a person counts in the district rollups
+    loaded_rollup_values = None
+
+    def rollup_values(self):
+        return (
+            self.__dict__.get('voting_address_id', models.DEFERRED),
+            self.__dict__.get('membership_status_id', models.DEFERRED),
+            self.__dict__.get('is_deleted', models.DEFERRED),
+        )
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'membership_status' in fields or 'membership_status_id' in fields:
+            self.recorded_membership_status_id = self.membership_status_id
+
     def save(self, *args, **kwargs):
+        if not self.is_deleted:
+            self.deleted_when = None
+        elif self.deleted_when is None:
+            self.deleted_when = timezone.now()
         super().save(*args, **kwargs)
-        make_history = False
-        if self.membership_status is not None:
-            try:
-                last_membership_history = MembershipHistory.objects.filter(person=self).latest('effective_date')
-                if not last_membership_history.membership_status == self.membership_status:
-                    make_history = True
-            except MembershipHistory.DoesNotExist:
-                make_history = True
-
-        if make_history:
-            MembershipHistory.objects.create(person=self, membership_status=self.membership_status, effective_date=date.today())
+        MembershipHistory.objects.record_changes([self])
 
     def delete(self):
         if(self.is_deleted):
             super().delete()
         else:
+            self.deleted_when = timezone.now()
+            Person.all_objects.filter(pk=self.pk).soft_delete(self.deleted_when)
             self.is_deleted = True
-            self.save()
+            self.loaded_rollup_values = self.rollup_values()
 
     def is_user(self, user):
         return PersonUser.objects.filter(person=self, user=user).exists()
 
     objects = NonDeletedPersonManager()
-    all_objects = models.Manager()
+    all_objects = AllPersonQuerySet.as_manager()
+
+class PersonSearch(models.Model):
+
+    person = models.OneToOneField(
+        Person,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        help_text='The person this search key finds'
+    )
+    search_key = models.TextField(
+        'search key',
+        blank=True,
+        help_text="The person's names, address, phone numbers and email addresses, folded to lowercase without accents or punctuation"
+    )
+
+    class Meta:
+        ordering = ['person_id']
+
+    def __str__(self):
+        return self.search_key[:50:]
+
+class DuplicateCandidate(models.Model):
+
+    person = models.ForeignKey(
+        Person,
+        related_name='+',
+        on_delete=models.CASCADE,
+        help_text='The person to keep if the two are merged'
+    )
+    duplicate = models.ForeignKey(
+        Person,
+        related_name='+',
+        on_delete=models.CASCADE,
+        help_text='The person who may be a duplicate of the person to keep'
+    )
+    score = models.IntegerField(
+        'score',
+        default=0,
+        help_text='How likely the two are the same person, from 0 to 100'
+    )
+    reasons = models.CharField(
+        'reasons',
+        max_length=100,
+        blank=True,
+        help_text='What the two people have in common, such as name and phone'
+    )
+    status = models.CharField(
+        'status',
+        max_length=20,
+        default='open',
+        choices=[
+            ('open', 'Open'),
+            ('merged', 'Merged'),
+            ('dismissed', 'Not a Duplicate'),
+        ],
+        help_text='Whether this pair has been reviewed, and what was decided'
+    )
+    found = models.DateTimeField(
+        'found',
+        auto_now_add=True,
+        help_text='When this pair was found'
+    )
+    reviewed = models.DateTimeField(
+        'reviewed',
+        null=True,
+        blank=True,
+        help_text='When this pair was merged or dismissed'
+    )
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='+',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        help_text='The user who merged or dismissed this pair'
+    )
+
+    class Meta:
+        ordering = ['status', '-score', 'found']
+        unique_together = [['person', 'duplicate']]
+
+    def __str__(self):
+        person = self.person if hasattr(self, 'person') else '<no person>'
+        duplicate = self.duplicate if hasattr(self, 'duplicate') else '<no duplicate>'
+        return f'{person} / {duplicate}: {self.score}'
+
+class DistrictRollup(models.Model):
+
+    location_field = models.CharField(
+        'district type',
+        max_length=30,
+        choices=[
+            ('locationcity', 'City or County'),
+            ('locationcongress', 'Congressional District'),
+            ('locationstatesenate', 'State Senatorial District'),
+            ('locationstatehouse', 'House of Delegates District'),
+            ('locationmagistrate', 'Magisterial District'),
+            ('locationborough', 'Borough'),
+            ('locationprecinct', 'Precinct'),
+        ],
+        help_text='The voting address field for this kind of district'
+    )
+    location_id = models.BigIntegerField(
+        'district id',
+        help_text='The id of the district'
+    )
+    location_name = models.CharField(
+        'district',
+        max_length=100,
+        blank=True,
+        help_text='The name of the district when the counts were taken'
+    )
+    people = models.IntegerField(
+        'people',
+        default=0,
+        help_text='The number of people with a voting address in this district'
+    )
+    members = models.IntegerField(
+        'members',
+        default=0,
+        help_text='The number of people whose status counts as a member'
+    )
+    quorum = models.IntegerField(
+        'quorum members',
+        default=0,
+        help_text='The number of people whose status counts toward quorum'
+    )
+    voters = models.IntegerField(
+        'voting members',
+        default=0,
+        help_text='The number of people whose status can vote'
+    )
+    dues_payers = models.IntegerField(
+        'dues payers',
+        default=0,
+        help_text='The number of people whose status pays dues'
+    )
+    refreshed = models.DateTimeField(
+        'refreshed',
+        auto_now=True,
+        help_text='When these counts were last taken'
+    )
+
+    class Meta:
+        ordering = ['location_field', 'location_name']
+        constraints = [
+            models.UniqueConstraint(fields=['location_field', 'location_id'], name='districtrollup_district_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_location_field_display()}: {self.location_name}'
 
 class SubMembership(models.Model):
 
@@ -426,6 +691,14 @@ class ContactVoice(models.Model):
         max_length=50,
         help_text="The phone number"
     )
+    number_key = models.CharField(
+        'number key',
+        max_length=16,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="The phone number in E.164 form, such as +15555550100, for finding who has a number"
+    )
     label = models.CharField(
         'label',
         max_length=50,
@@ -456,6 +729,16 @@ class ContactVoice(models.Model):
         help_text="Important information about calling, such as \"Don't call before 10:00am\""
     )
 
+    # source field: the key field filled from it on save
+    key_fields = {'number': 'number_key'}
+
+    def fill_keys(self):
+        self.number_key = phone_key(self.number)
+
+    def save(self, *args, **kwargs):
+        self.fill_keys()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.number
 
@@ -474,6 +757,14 @@ class ContactText(models.Model):
         max_length=50,
         help_text="The phone number"
     )
+    number_key = models.CharField(
+        'number key',
+        max_length=16,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="The phone number in E.164 form, such as +15555550100, for finding who has a number"
+    )
     label = models.CharField(
         'label',
         max_length=50,
@@ -498,6 +789,16 @@ class ContactText(models.Model):
         help_text="Important information about texting, such as \"Don't text before 10:00am\""
     )
 
+    # source field: the key field filled from it on save
+    key_fields = {'number': 'number_key'}
+
+    def fill_keys(self):
+        self.number_key = phone_key(self.number)
+
+    def save(self, *args, **kwargs):
+        self.fill_keys()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.number
 
@@ -516,6 +817,14 @@ class ContactEmail(models.Model):
         max_length=250,
         help_text="The email address"
     )
+    address_key = models.CharField(
+        'address key',
+        max_length=250,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="The email address trimmed and lowercased, for finding who has an address"
+    )
     label = models.CharField(
         'label',
         max_length=50,
@@ -540,6 +849,16 @@ class ContactEmail(models.Model):
         help_text="Important information about texting, such as \"Don't text before 10:00am\""
     )
 
+    # source field: the key field filled from it on save
+    key_fields = {'address': 'address_key'}
+
+    def fill_keys(self):
+        self.address_key = email_key(self.address)
+
+    def save(self, *args, **kwargs):
+        self.fill_keys()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.address
 
@@ -569,6 +888,33 @@ class Link(models.Model):
         person = self.person if hasattr(self, 'person') else '<no person>'
         return '%s: %s: %s' % (person, self.title, self.href)
 
+class MembershipHistoryManager(models.Manager):
+
+    def record_changes(self, people, batch_size=None):
+        """
+        Adds one MembershipHistory for each person whose membership status
+        differs from the status last recorded, using one bulk_create
+        """
+
+        histories = []
+        for person in people:
+            if person.membership_status_id is None:
+                continue
+            recorded_membership_status_id = person.recorded_membership_status_id
+            if recorded_membership_status_id is models.DEFERRED:
+                # membership_status was deferred when the person was loaded
+                last_membership_history = self.filter(person=person).order_by('-effective_date', '-pk').first()
+                recorded_membership_status_id = last_membership_history.membership_status_id if last_membership_history is not None else None
+            if person.membership_status_id != recorded_membership_status_id:
+                histories.append(self.model(person=person, membership_status_id=person.membership_status_id, effective_date=date.today()))
+
+        self.bulk_create(histories, batch_size=batch_size)
+
+        for person in people:
+            person.recorded_membership_status_id = person.membership_status_id
+
+        return histories
+
 class MembershipHistory(models.Model):
 
     person = models.ForeignKey(
@@ -592,6 +938,8 @@ class MembershipHistory(models.Model):
         person = self.person if hasattr(self, 'person') else '<no person>'
         return '%s: %s %s' % (person, self.membership_status , self.effective_date)
 
+    objects = MembershipHistoryManager()
+
 class PositionHistory(models.Model):
 
     person = models.ForeignKey(
@@ -722,6 +1070,9 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['-when']
+        indexes = [
+            models.Index(fields=['-when'], name='event_when_idx'),
+        ]
 
     def __str__(self):
         return '%s: %s of %s' % (self.event_type, self.name, self.when)
@@ -842,6 +1193,9 @@ class CommunicationEvent(models.Model):
 
     class Meta:
         ordering = ['-when',]
+        indexes = [
+            models.Index(fields=['-when'], name='communicationevent_when_idx'),
+        ]
 
     def __str__(self):
 
@@ -929,6 +1283,12 @@ class PersonUser(models.Model):
         return '%s : %s' % (person, user)
 
 class BulkRecordAction(models.Model):
+
+    COMPLETE = 0
+    QUEUED = 1
+    RUNNING = 2
+    FAILED = 3
+
     name = models.CharField(
         'bulk action name',
         max_length=100,
@@ -940,10 +1300,109 @@ class BulkRecordAction(models.Model):
         auto_now_add=True,
         help_text='The date this action occured'
     )
+    status = models.IntegerField(
+        'status',
+        choices=[
+            (COMPLETE, 'Complete'),
+            (QUEUED, 'Queued'),
+            (RUNNING, 'Running'),
+            (FAILED, 'Failed'),
+        ],
+        default=COMPLETE,
+        help_text='If this action is waiting to be processed, being processed, or finished'
+    )
+    source_file = models.CharField(
+        'source file',
+        max_length=250,
+        blank=True,
+        help_text='The stored file that this action is processing, such as an uploaded CSV'
+    )
+    overwrite = models.BooleanField(
+        'overwrite',
+        default=False,
+        help_text='If existing records should be updated by this action'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text='The user who started this action'
+    )
+    rows_done = models.IntegerField(
+        'rows done',
+        default=0,
+        help_text='The number of rows that have been processed'
+    )
+    rows_failed = models.IntegerField(
+        'rows failed',
+        default=0,
+        help_text='The number of rows that could not be processed'
+    )
+    rows_started = models.IntegerField(
+        'rows started',
+        default=0,
+        help_text='The number of rows already done when processing last started, such as when resuming'
+    )
+    started = models.DateTimeField(
+        'started',
+        null=True,
+        blank=True,
+        help_text='When processing started'
+    )
+    finished = models.DateTimeField(
+        'finished',
+        null=True,
+        blank=True,
+        help_text='When processing finished'
+    )
+    updated = models.DateTimeField(
+        'updated',
+        null=True,
+        blank=True,
+        help_text='When the worker processing this action last recorded progress'
+    )
+    message = models.TextField(
+        'message',
+        blank=True,
+        help_text='The error message if this action failed'
+    )
 
     def __str__(self):
         return f'{self.name} of {self.when}'
 
+    @property
+    def throughput(self):
+        """ The number of rows processed per second since processing last started """
+        if self.started is None:
+            return 0
+        end = self.finished if self.finished is not None else timezone.now()
+        seconds = (end - self.started).total_seconds()
+        return round((self.rows_done - self.rows_started) / seconds, 1) if seconds > 0 else 0
+
+class RecordActionManager(models.Manager):
+
+    def bulk_record(self, recordactmodel_class, details_by_object, user, bulk_recordact, batch_size=None):
+        """
+        Creates a RecordAction and a link row (such as RecordactPerson) for
+        each (object, details) pair using two bulk inserts in total
+        """
+
+        details_by_object = list(details_by_object)
+
+        recordacts = self.bulk_create([
+            RecordAction(
+                model_name=recordactmodel_class.__name__[len('Recordact'):],
+                details=details,
+                user=user,
+                bulk_recordact=bulk_recordact
+            ) for object, details in details_by_object
+        ], batch_size=batch_size)
+
+        return recordactmodel_class.objects.bulk_create([
+            recordactmodel_class(object=object, recordact=recordact) for (object, details), recordact in zip(details_by_object, recordacts)
+        ], batch_size=batch_size)
+
 class RecordAction(models.Model):
 
     model_name = models.CharField(
@@ -980,8 +1439,13 @@ class RecordAction(models.Model):
         help_text="The bulk action of which this record action is a part, such as a CSV Upload"
     )
 
+    objects = RecordActionManager()
+
     class Meta:
         ordering = ['-when',]
+        indexes = [
+            models.Index(fields=['-when'], name='recordaction_when_idx'),
+        ]
 
     def __str__(self):
 
@@ -1054,19 +1518,28 @@ class History(models.Model):
 
     class Meta:
         ordering = ['-when', 'modelname', 'objectid']
+        indexes = [
+            models.Index(fields=['-when'], name='history_when_idx'),
+            # the history of one object
+            models.Index(fields=['modelname', 'objectid'], name='history_object_idx'),
+        ]
 
-    def __str__(self):
+    # the display string of the changed object, set for a whole page of
+    # rows at once by audit.resolve_history_objects
+    object_display = None
 
-        new_value_trunc = self.new_value[:17:]+'...' if len(self.new_value) > 20 else self.new_value
-        when = self.when if self.when is not None else datetime.datetime.now()
+    def __str__(self):
 
-        try:
-            model = apps.get_model('sdcpeople', self.modelname)
-            object = model.objects.get(pk=self.objectid)
-            return f'{"mdy".format(when.strftime("%Y-%m-%d"))}: {self.modelname}: [{object}] [{self.fieldname}] changed to "{new_value_trunc}"'
+        new_value = self.new_value or ''
+        fieldname = self.fieldname
+        if fieldname == '*':
+            from .audit import history_changes
+            fieldname = ', '.join(change[0] for change in history_changes(self))
+            new_value = ', '.join(str(change[2]) for change in history_changes(self))
 
-        except Exception as e:
-            print (e)
+        new_value_trunc = new_value[:17:]+'...' if len(new_value) > 20 else new_value
+        when = self.when if self.when is not None else datetime.datetime.now()
+        object = f'[{self.object_display}]' if self.object_display is not None else self.objectid
 
-        return f'{"mdy".format(when.strftime("%Y-%m-%d"))}: {self.modelname}: {self.objectid} [{self.fieldname}] changed to "{new_value_trunc}"'
+        return f'{when.strftime("%Y-%m-%d")}: {self.modelname}: {object} [{fieldname}] changed to "{new_value_trunc}"'
 
@@ -0,0 +1,47 @@
+import re
+import unicodedata
+
+def fold_text(text):
+    """
+    Lowercases text, strips accents and turns anything that is not a
+    letter or digit into single spaces, so "O'Brien-Núñez" becomes
+    "o brien nunez"
+    """
+
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    return ' '.join(re.sub(r'[\W_]+', ' ', text.casefold()).split())
+
+def phone_digits(number):
+    """ Returns only the digits of a phone number """
+
+    return re.sub(r'\D', '', str(number or ''))
+
+# the country code of phone numbers written without one
+PHONE_COUNTRY_CODE = '1'
+
+# the digits of a national number, for numbers written without a country code
+PHONE_NATIONAL_DIGITS = 10
+
+def phone_key(number):
+    """
+    Returns a phone number in E.164 form, such as "+15555550100" for
+    "(555) 555-0100", or '' if it is too short or too long to be one
+    """
+
+    # anything after a letter or #, such as "ext 36", is an extension
+    number = re.split(r'[^\W\d_]|#', str(number or ''))[0].strip()
+    digits = phone_digits(number)
+    if not number.startswith('+'):
+        if len(digits) == PHONE_NATIONAL_DIGITS:
+            digits = PHONE_COUNTRY_CODE + digits
+        elif not (len(digits) == PHONE_NATIONAL_DIGITS + len(PHONE_COUNTRY_CODE) and digits.startswith(PHONE_COUNTRY_CODE)):
+            return ''
+    if not 8 <= len(digits) <= 15:
+        return ''
+    return '+' + digits
+
+def email_key(address):
+    """ Returns an email address trimmed and lowercased """
+
+    return str(address or '').strip().lower()
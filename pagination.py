@@ -0,0 +1,268 @@
+import datetime
+import decimal
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+from .caching import versioned_key
+
+COUNT_CACHE_SECONDS = getattr(settings, 'SDCPEOPLE_COUNT_CACHE_SECONDS', 60)
+
+CURSOR_SALT = 'sdcpeople.pagination'
+
+def model_version(model):
+    return f'model:{model._meta.label_lower}'
+
+class CachedCountPaginator(Paginator):
+    """
+    A paginator that keeps the count of each distinct query in the cache,
+    so paging through a list counts it only once. Counts are dropped when
+    one of count_models changes, by default the listed model, or after
+    SDCPEOPLE_COUNT_CACHE_SECONDS
+    """
+
+    def __init__(self, *args, count_models=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_models = count_models
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+
+        sql, params = self.object_list.query.sql_with_params()
+        query_hash = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        count_models = self.count_models or [self.object_list.model]
+        key = versioned_key([model_version(model) for model in count_models], 'count', query_hash)
+
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, COUNT_CACHE_SECONDS)
+        return count
+
+class KeysetPage:
+    """ A page found by seeking from the rows of a neighbouring page instead of an OFFSET """
+
+    def __init__(self, object_list, number, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Page {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+def resolve_field(model, path):
+    """ Returns the model field a lookup path such as 'voting_address__street_address' ends on """
+
+    field = None
+    for part in path.split('__'):
+        if model is None:
+            return None
+        try:
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model if field.is_relation else None
+    return field
+
+def keyset_ordering(queryset):
+    """
+    Returns the ordering of a queryset as a list of (field path, descending),
+    ending with the primary key, or None if the queryset cannot be paged by
+    keyset, such as when it is ordered by an expression or by a relation
+    """
+
+    query = queryset.query
+    if query.combinator or query.distinct_fields or query.low_mark or query.high_mark is not None:
+        return None
+
+    ordering = list(query.order_by) or (list(query.get_meta().ordering) if query.default_ordering else [])
+
+    keyset = []
+    for field_name in ordering:
+        if not isinstance(field_name, str) or field_name == '?':
+            return None
+        descending = field_name.startswith('-')
+        path = field_name.lstrip('-+')
+        field = resolve_field(queryset.model, path)
+        if field is None or field.is_relation:
+            return None
+        if field.primary_key and '__' not in path:
+            path = 'pk'
+        keyset.append((path, descending))
+        if path == 'pk':
+            break
+
+    if not any(path == 'pk' for path, descending in keyset):
+        keyset.append(('pk', False))
+
+    return keyset
+
+def order_expressions(keyset, backward=False):
+    # NULLs are put last when ascending and first when descending on every
+    # database, so that a seek can step over them the same way everywhere
+    expressions = []
+    for path, descending in keyset:
+        if descending != backward:
+            expressions.append(F(path).desc(nulls_first=True))
+        else:
+            expressions.append(F(path).asc(nulls_last=True))
+    return expressions
+
+def seek_filter(keyset, values, backward=False):
+    """ Returns a Q matching the rows after values, or before them when backward """
+
+    after = Q(pk__in=[])
+    equal = Q()
+    for (path, descending), value in zip(keyset, values):
+        ascending = descending == backward
+        if value is None:
+            # NULLs come last when ascending, so nothing of this field follows
+            step = Q(pk__in=[]) if ascending else Q(**{path + '__isnull': False})
+        else:
+            step = Q(**{path + ('__gt' if ascending else '__lt'): value})
+            if ascending:
+                step = step | Q(**{path + '__isnull': True})
+        after = after | (equal & step)
+        equal = equal & (Q(**{path + '__isnull': True}) if value is None else Q(**{path: value}))
+    return after
+
+def cursor_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+class KeysetPaginationMixin:
+    """
+    Pages a ListView by seeking past the last row of the previous page
+    (?after=) or before the first row of the next one (?before=) on the
+    queryset's order_by fields, so that a deep page costs the same as the
+    first. Pages reached by number, and querysets ordered in ways a seek
+    cannot follow, use OFFSET as before. The count is cached
+    """
+
+    paginator_class = CachedCountPaginator
+
+    def get_count_models(self):
+        """ Returns the models whose changes drop the cached count """
+
+        return [self.model]
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, count_models=self.get_count_models(), **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+
+        # lists of cached results are sliced by OFFSET, which costs nothing there
+        if not hasattr(queryset, 'query'):
+            return super().paginate_queryset(queryset, page_size)
+
+        keyset = keyset_ordering(queryset)
+        if keyset is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        queryset = queryset.order_by(*order_expressions(keyset)).annotate(
+            **{ f'keyset_{indx}':F(path) for indx, (path, descending) in enumerate(keyset) }
+        )
+
+        page = None
+        for direction in ['after', 'before']:
+            cursor = self.read_cursor(direction, len(keyset))
+            if cursor is not None:
+                paginator = self.get_paginator(queryset, page_size, orphans=self.get_paginate_orphans(), allow_empty_first_page=self.get_allow_empty())
+                page = self.seek_page(paginator, queryset, keyset, cursor, page_size, backward=direction == 'before')
+                break
+
+        if page is None:
+            paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+
+        self.add_cursors(page, keyset)
+
+        return (page.paginator, page, page.object_list, page.has_other_pages())
+
+    def read_cursor(self, direction, keyset_length):
+        token = self.request.GET.get(direction)
+        if not token:
+            return None
+        try:
+            cursor = signing.loads(token, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if len(cursor.get('values', [])) != keyset_length:
+            return None
+        return cursor
+
+    def seek_page(self, paginator, queryset, keyset, cursor, page_size, backward=False):
+        page_size = int(page_size)
+        queryset = queryset.filter(seek_filter(keyset, cursor['values'], backward))
+        if backward:
+            queryset = queryset.order_by(*order_expressions(keyset, backward=True))
+
+        object_list = list(queryset[:page_size + 1])
+        more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+
+        if backward:
+            object_list.reverse()
+            number = max(cursor['page'], 1)
+            return KeysetPage(object_list, number, paginator, has_next=True, has_previous=more)
+
+        return KeysetPage(object_list, cursor['page'], paginator, has_next=more, has_previous=cursor['page'] > 1)
+
+    def make_cursor(self, obj, keyset, page_number):
+        return signing.dumps({
+            'values': [ cursor_value(getattr(obj, f'keyset_{indx}')) for indx in range(len(keyset)) ],
+            'page': page_number,
+        }, salt=CURSOR_SALT, compress=True)
+
+    def add_cursors(self, page, keyset):
+        page.next_cursor = None
+        page.previous_cursor = None
+        object_list = list(page.object_list)
+        if object_list:
+            if page.has_next():
+                page.next_cursor = self.make_cursor(object_list[-1], keyset, page.next_page_number())
+            if page.has_previous():
+                page.previous_cursor = self.make_cursor(object_list[0], keyset, page.previous_page_number())
+
+    def get_result_count(self, context_data):
+        """ Returns the number of results without counting them again """
+
+        if context_data.get('paginator') is not None:
+            return context_data['paginator'].count
+        return len(context_data['object_list'])
@@ -0,0 +1,70 @@
+from django.db.models import Prefetch
+
+from .lookups import attach_lookups, field_lookup_tables
+from .models import DISTRICT_LOCATION_FIELDS, Person, SubMembership, VotingAddress
+
+# Every FK on VotingAddress, so a person row never lazy-loads its districts
+VOTING_ADDRESS_LOCATIONS = DISTRICT_LOCATION_FIELDS
+
+def person_projection_queryset(queryset, join_lookups=True):
+    """
+    Adds the joins and batched prefetches needed to render a person row
+    (status, address, districts, positions, subcommittees and contacts)
+    without any further per-row queries. With join_lookups False the status
+    and districts are not joined, and are to be set with attach_person_lookups
+    """
+
+    lookups = []
+    if join_lookups:
+        lookups = ['membership_status__membership_type', *['voting_address__' + location for location in VOTING_ADDRESS_LOCATIONS]]
+
+    return queryset.select_related(
+        'voting_address',
+        *lookups
+    ).prefetch_related(
+        'positions',
+        Prefetch('submembership_set', queryset=SubMembership.objects.select_related('subcommittee', 'position')),
+        'contactvoice_set',
+        'contacttext_set',
+        'contactemail_set',
+    )
+
+def person_lookup_tables():
+    """ Returns the lookup tables for attach_person_lookups, read once for many people """
+
+    return field_lookup_tables(Person, ['membership_status']), field_lookup_tables(VotingAddress, VOTING_ADDRESS_LOCATIONS)
+
+def attach_person_lookups(person, tables):
+    """ Sets a person's status and districts from the lookup tables """
+
+    person_tables, voting_address_tables = tables
+    attach_lookups(person, person_tables)
+    if person.voting_address is not None:
+        attach_lookups(person.voting_address, voting_address_tables)
+    return person
+
+class PersonRow:
+    """
+    The values a person list row shows, taken from the prefetched relations
+    and cut to the top entries. Contacts are already ranked by their Meta
+    ordering (highest rank_number first)
+    """
+
+    def __init__(self, person, top_contacts=2, top_positions=3):
+        self.positions = [position.title for position in person.positions.all()][:top_positions]
+        self.subcommittees = [submembership.subcommittee.name for submembership in person.submembership_set.all()][:top_positions]
+        self.voice_numbers = [contactvoice.number for contactvoice in person.contactvoice_set.all()][:top_contacts]
+        self.text_numbers = [contacttext.number for contacttext in person.contacttext_set.all()][:top_contacts]
+        self.email_addresses = [contactemail.address for contactemail in person.contactemail_set.all()][:top_contacts]
+
+def attach_person_rows(people, top_contacts=2, top_positions=3):
+    """
+    Evaluates a projected person queryset (or page) and sets person.row on
+    each person. Returns the people as a list
+    """
+
+    people = list(people)
+    for person in people:
+        person.row = PersonRow(person, top_contacts, top_positions)
+
+    return people
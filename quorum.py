@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import versioned_key
+from .models import Participation, Person
+
+# Quorum is more than this fraction of the quorum members
+QUORUM_FRACTION = getattr(settings, 'SDCPEOPLE_QUORUM_FRACTION', 0.5)
+QUORUM_CACHE_SECONDS = getattr(settings, 'SDCPEOPLE_QUORUM_CACHE_SECONDS', 3600)
+
+# bumped when a person or a membership status changes
+PEOPLE_VERSION = 'quorum:people'
+# bumped when a participation changes
+PARTICIPATION_VERSION = 'quorum:participation'
+
+def quorum_required(quorum_size):
+    return int(quorum_size * QUORUM_FRACTION) + 1 if quorum_size else 0
+
+def membership_counts():
+    """ Counts the members, quorum members and voting members in one query """
+
+    key = versioned_key([PEOPLE_VERSION], 'quorum', 'membership')
+    counts = cache.get(key)
+    if counts is None:
+        counts = Person.objects.order_by().aggregate(
+            members=Count('pk', filter=Q(membership_status__is_member=True)),
+            quorum_size=Count('pk', filter=Q(membership_status__is_quorum=True)),
+            voting_members=Count('pk', filter=Q(membership_status__can_vote=True)),
+        )
+        cache.set(key, counts, QUORUM_CACHE_SECONDS)
+    return counts
+
+def event_presence(event_pk):
+    """
+    Returns the counts and list of the people present at an event, in one
+    query over its participation
+    """
+
+    key = versioned_key([PEOPLE_VERSION, PARTICIPATION_VERSION], 'quorum', 'event', event_pk)
+    presence = cache.get(key)
+    if presence is None:
+        rows = list(
+            Participation.objects.filter(event_id=event_pk, person__is_deleted=False).order_by(
+                'person__name_last', 'person__name_first'
+            ).values(
+                'person_id',
+                'person__name_first',
+                'person__name_common',
+                'person__name_last',
+                'person__membership_status__name',
+                'person__membership_status__is_quorum',
+                'person__membership_status__can_vote',
+            ).distinct()
+        )
+        present = [
+            {
+                'pk': row['person_id'],
+                'name': '{} {}'.format(row['person__name_common'] or row['person__name_first'], row['person__name_last']),
+                'membership_status': row['person__membership_status__name'] or '',
+                'is_quorum': bool(row['person__membership_status__is_quorum']),
+                'can_vote': bool(row['person__membership_status__can_vote']),
+            }
+            for row in rows
+        ]
+        present = list({ person['pk']:person for person in present }.values())
+        presence = {
+            'present': len(present),
+            'present_quorum': sum(1 for person in present if person['is_quorum']),
+            'present_voting': sum(1 for person in present if person['can_vote']),
+            'people': present,
+        }
+        cache.set(key, presence, QUORUM_CACHE_SECONDS)
+    return presence
+
+def event_quorum(event_pk):
+    """ Returns the quorum size, voting members and who is present at an event """
+
+    counts = membership_counts()
+    presence = event_presence(event_pk)
+    required = quorum_required(counts['quorum_size'])
+
+    return {
+        **counts,
+        'quorum_required': required,
+        **presence,
+        'has_quorum': counts['quorum_size'] > 0 and presence['present_quorum'] >= required,
+    }
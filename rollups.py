@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import DISTRICT_LOCATION_FIELDS, DistrictRollup, Person, VotingAddress
+
+ROLLUP_COUNTS = {
+    'people': Count('pk'),
+    'members': Count('pk', filter=Q(membership_status__is_member=True)),
+    'quorum': Count('pk', filter=Q(membership_status__is_quorum=True)),
+    'voters': Count('pk', filter=Q(membership_status__can_vote=True)),
+    'dues_payers': Count('pk', filter=Q(membership_status__pays_dues=True)),
+}
+
+def district_counts(location_field, location_ids=None):
+    """
+    Returns one row of counts per district of one kind, in a single
+    GROUP BY over the people who are not deleted
+    """
+
+    prefix = 'voting_address__' + location_field
+    people = Person.objects.filter(**{prefix + '__isnull': False})
+    if location_ids is not None:
+        people = people.filter(**{prefix + '__in': location_ids})
+
+    return people.order_by().values(prefix, prefix + '__name').annotate(**ROLLUP_COUNTS)
+
+def refresh_district_rollups(districts=None):
+    """
+    Recounts the rollups of the given districts, a dict of location field to
+    district ids, or of every district when districts is None
+    """
+
+    for location_field in DISTRICT_LOCATION_FIELDS:
+        location_ids = None
+        if districts is not None:
+            location_ids = { location_id for location_id in districts.get(location_field, []) if location_id is not None }
+            if not location_ids:
+                continue
+
+        with transaction.atomic():
+            # locking the rollups first makes concurrent refreshes of a district
+            # count one after another, so an older count never overwrites a newer one
+            current_rollups = DistrictRollup.objects.select_for_update().filter(location_field=location_field)
+            if location_ids is not None:
+                current_rollups = current_rollups.filter(location_id__in=location_ids)
+            current_location_ids = set(current_rollups.values_list('location_id', flat=True))
+
+            prefix = 'voting_address__' + location_field
+            rollups = [
+                DistrictRollup(
+                    location_field=location_field,
+                    location_id=row[prefix],
+                    location_name=row[prefix + '__name'] or '',
+                    **{ count_name: row[count_name] for count_name in ROLLUP_COUNTS },
+                )
+                for row in district_counts(location_field, location_ids)
+            ]
+
+            DistrictRollup.objects.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=['location_field', 'location_id'],
+                update_fields=['location_name', *ROLLUP_COUNTS, 'refreshed'],
+            )
+
+            # districts with nobody left in them are dropped
+            DistrictRollup.objects.filter(
+                location_field=location_field,
+                location_id__in=current_location_ids - { rollup.location_id for rollup in rollups },
+            ).delete()
+
+def districts_of_voting_addresses(voting_address_ids):
+    """ Returns the districts of some voting addresses as a dict of location field to ids """
+
+    districts = { location_field: set() for location_field in DISTRICT_LOCATION_FIELDS }
+    voting_address_ids = [ voting_address_id for voting_address_id in voting_address_ids if voting_address_id is not None ]
+    if voting_address_ids:
+        for row in VotingAddress.objects.filter(pk__in=voting_address_ids).values(*[location_field + '_id' for location_field in DISTRICT_LOCATION_FIELDS]):
+            for location_field in DISTRICT_LOCATION_FIELDS:
+                districts[location_field].add(row[location_field + '_id'])
+    return districts
+
+def refresh_voting_address_rollups(voting_address_ids):
+    refresh_district_rollups(districts_of_voting_addresses(voting_address_ids))
+
+def rollup_data(rollup):
+    return {
+        'location_field': rollup.location_field,
+        'location_type': rollup.get_location_field_display(),
+        'location_id': rollup.location_id,
+        'location_name': rollup.location_name,
+        **{ count_name: getattr(rollup, count_name) for count_name in ROLLUP_COUNTS },
+        'refreshed': rollup.refreshed.isoformat() if rollup.refreshed is not None else None,
+    }
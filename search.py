@@ -0,0 +1,90 @@
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Person, PersonSearch
+from .normalize import fold_text, phone_digits
+from .projections import person_projection_queryset
+
+SQLITE_FTS_TABLE = 'sdcpeople_personsearch_fts'
+POSTGRESQL_TRGM_INDEX = 'sdcpeople_personsearch_key_trgm'
+
+SEARCH_KEY_BATCH_SIZE = 1000
+
+def build_search_key(person):
+    """
+    Returns the folded text that a person can be found by. The key starts
+    and ends with a space so that a word prefix can be matched with
+    LIKE '% prefix%'
+    """
+
+    parts = [
+        person.name_first,
+        person.name_common,
+        person.name_middles,
+        person.name_last,
+        person.vb_voter_id,
+    ]
+
+    if person.voting_address is not None:
+        parts.append(person.voting_address.street_address)
+
+    for contact in [*person.contactvoice_set.all(), *person.contacttext_set.all()]:
+        parts.append(phone_digits(contact.number))
+
+    for contactemail in person.contactemail_set.all():
+        parts.append(contactemail.address)
+
+    return ' ' + fold_text(' '.join(part for part in parts if part)) + ' '
+
+def update_search_keys(person_ids):
+    """
+    Rebuilds the search keys of the given people with one upsert per batch
+    """
+
+    person_ids = list(person_ids)
+    for start in range(0, len(person_ids), SEARCH_KEY_BATCH_SIZE):
+        people = person_projection_queryset(Person.all_objects.filter(pk__in=person_ids[start:start + SEARCH_KEY_BATCH_SIZE]))
+        PersonSearch.objects.bulk_create(
+            [PersonSearch(person=person, search_key=build_search_key(person)) for person in people],
+            update_conflicts=True,
+            unique_fields=['person'],
+            update_fields=['search_key'],
+        )
+
+def rebuild_search_keys():
+    update_search_keys(Person.all_objects.values_list('pk', flat=True).iterator())
+
+def sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=%s", [SQLITE_FTS_TABLE])
+        return cursor.fetchone() is not None
+
+def search_people(queryset, text):
+    """
+    Filters a person queryset to the people whose search key has a word
+    starting with each word of text.
+
+    On SQLite this is an FTS5 prefix query. On PostgreSQL it is a LIKE on
+    the folded key, which is served by a pg_trgm GIN index, and results are
+    ordered by trigram similarity. Other databases fall back to LIKE
+    """
+
+    words = fold_text(text).split()
+    if not words:
+        return queryset
+
+    if connection.vendor == 'sqlite' and sqlite_fts_available():
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s', [match]))
+
+    for word in words:
+        queryset = queryset.filter(personsearch__search_key__contains=' ' + word)
+
+    if connection.vendor == 'postgresql':
+        try:
+            from django.contrib.postgres.search import TrigramSimilarity
+        except ImportError:
+            return queryset
+        queryset = queryset.annotate(search_similarity=TrigramSimilarity('personsearch__search_key', ' '.join(words))).order_by('-search_similarity')
+
+    return queryset
@@ -0,0 +1,163 @@
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from tougshire_vistas.models import Vista
+
+from .caching import DATA_VERSION, bump_version
+from .lookups import LOOKUP_MODELS, dependent_lookup_models, forget_lookup_table, lookup_version
+from .models import (DISTRICT_LOCATION_FIELDS, BulkRecordAction, ContactEmail, ContactText, ContactVoice, DistrictRollup, History,
+                     MembershipHistory, MembershipStatus, Participation, Person, RecordAction, RecordactPerson, VotingAddress,
+                     people_deleted_changed)
+from .pagination import model_version
+from .quorum import PARTICIPATION_VERSION, PEOPLE_VERSION
+from .rollups import refresh_district_rollups, refresh_voting_address_rollups
+from .search import update_search_keys
+from .vistas import user_vista_version
+
+# Search keys are rebuilt after the transaction commits, so that a key is
+# never written for a person whose delete is still cascading
+
+@receiver(post_save, sender=Person)
+def person_saved_update_search_key(sender, instance, raw=False, **kwargs):
+    if not raw:
+        person_ids = [instance.pk]
+        transaction.on_commit(lambda: update_search_keys(person_ids))
+
+@receiver(post_save, sender=VotingAddress)
+def voting_address_saved_update_search_keys(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        voting_address_pk = instance.pk
+        transaction.on_commit(lambda: update_search_keys(Person.all_objects.filter(voting_address_id=voting_address_pk).values_list('pk', flat=True)))
+
+@receiver(post_save, sender=ContactVoice)
+@receiver(post_save, sender=ContactText)
+@receiver(post_save, sender=ContactEmail)
+@receiver(post_delete, sender=ContactVoice)
+@receiver(post_delete, sender=ContactText)
+@receiver(post_delete, sender=ContactEmail)
+def contact_changed_update_search_key(sender, instance, raw=False, **kwargs):
+    if not raw:
+        person_ids = [instance.person_id]
+        transaction.on_commit(lambda: update_search_keys(person_ids))
+
+# District rollups are recounted only for the districts a change touches
+
+@receiver(post_save, sender=Person)
+def person_saved_refresh_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded_rollup_values = instance.loaded_rollup_values
+    instance.loaded_rollup_values = instance.rollup_values()
+    if loaded_rollup_values != instance.loaded_rollup_values:
+        voting_address_ids = { instance.voting_address_id }
+        if loaded_rollup_values is not None and loaded_rollup_values[0] is not models.DEFERRED:
+            voting_address_ids.add(loaded_rollup_values[0])
+        transaction.on_commit(lambda: refresh_voting_address_rollups(voting_address_ids))
+
+@receiver(people_deleted_changed, sender=Person)
+def people_deleted_changed_refresh(sender, voting_address_ids, **kwargs):
+    transaction.on_commit(lambda: refresh_voting_address_rollups(voting_address_ids))
+    transaction.on_commit(lambda: bump_version(PEOPLE_VERSION))
+    transaction.on_commit(lambda: bump_version(model_version(Person)))
+    transaction.on_commit(lambda: bump_version(DATA_VERSION))
+
+@receiver(post_save, sender=VotingAddress)
+def voting_address_saved_refresh_rollups(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    loaded_locations = getattr(instance, 'loaded_locations', {})
+    instance.loaded_locations = { fieldname: getattr(instance, fieldname + '_id') for fieldname in DISTRICT_LOCATION_FIELDS }
+    if created:
+        return
+    districts = {
+        fieldname: { loaded_locations.get(fieldname), location_id }
+        for fieldname, location_id in instance.loaded_locations.items()
+        if loaded_locations.get(fieldname) != location_id
+    }
+    if districts:
+        transaction.on_commit(lambda: refresh_district_rollups(districts))
+
+@receiver(post_delete, sender=VotingAddress)
+def voting_address_deleted_refresh_rollups(sender, instance, **kwargs):
+    districts = { fieldname: { getattr(instance, fieldname + '_id') } for fieldname in DISTRICT_LOCATION_FIELDS }
+    transaction.on_commit(lambda: refresh_district_rollups(districts))
+
+@receiver(post_save, sender=MembershipStatus)
+def membership_status_saved_refresh_rollups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(refresh_district_rollups)
+
+# location model: the VotingAddress field that refers to it
+LOCATION_MODEL_FIELDS = { VotingAddress._meta.get_field(location_field).related_model:location_field for location_field in DISTRICT_LOCATION_FIELDS }
+
+def location_saved_rename_rollups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        DistrictRollup.objects.filter(location_field=LOCATION_MODEL_FIELDS[sender], location_id=instance.pk).update(location_name=instance.name)
+
+def location_deleted_remove_rollups(sender, instance, **kwargs):
+    DistrictRollup.objects.filter(location_field=LOCATION_MODEL_FIELDS[sender], location_id=instance.pk).delete()
+
+for location_model in LOCATION_MODEL_FIELDS:
+    post_save.connect(location_saved_rename_rollups, sender=location_model)
+    post_delete.connect(location_deleted_remove_rollups, sender=location_model)
+
+# Cached quorum results are dropped by bumping their versions after commit
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+@receiver(post_save, sender=MembershipStatus)
+@receiver(post_delete, sender=MembershipStatus)
+def membership_changed_bump_quorum(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: bump_version(PEOPLE_VERSION))
+
+@receiver(post_save, sender=Participation)
+@receiver(post_delete, sender=Participation)
+def participation_changed_bump_quorum(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: bump_version(PARTICIPATION_VERSION))
+
+# Cached list counts and vista results are dropped when a model they read
+# changes. The audit and log rows written with nearly every change bump
+# only their own versions, so that writing them drops nothing else
+
+AUDIT_MODELS = [BulkRecordAction, History, MembershipHistory, RecordAction, RecordactPerson]
+
+@receiver(post_save)
+@receiver(post_delete)
+def model_changed_bump_version(sender, raw=False, **kwargs):
+    if not raw and sender._meta.app_label == 'sdcpeople':
+        transaction.on_commit(lambda: bump_version(model_version(sender)))
+        if sender not in AUDIT_MODELS:
+            transaction.on_commit(lambda: bump_version(DATA_VERSION))
+
+@receiver(m2m_changed)
+def relation_changed_bump_version(sender, action, **kwargs):
+    if action in ['post_add', 'post_remove', 'post_clear'] and sender._meta.app_label == 'sdcpeople':
+        transaction.on_commit(lambda: bump_version(model_version(sender)))
+        transaction.on_commit(lambda: bump_version(DATA_VERSION))
+
+# A user's cached vista results and saved-vista menus are dropped when they
+# save or delete a vista
+
+@receiver(post_save, sender=Vista)
+@receiver(post_delete, sender=Vista)
+def vista_changed_bump_version(sender, instance, raw=False, **kwargs):
+    if not raw and instance.user_id is not None:
+        version = user_vista_version(instance.user_id)
+        transaction.on_commit(lambda: bump_version(version))
+
+# Lookup tables are dropped at once in this process, and in every other
+# process by bumping their versions after commit
+
+def lookup_changed_bump_version(sender, raw=False, **kwargs):
+    if raw:
+        return
+    for lookup_model in dependent_lookup_models(sender):
+        forget_lookup_table(lookup_model)
+        version = lookup_version(lookup_model)
+        transaction.on_commit(lambda version=version: bump_version(version))
+
+for lookup_model in LOOKUP_MODELS:
+    post_save.connect(lookup_changed_bump_version, sender=lookup_model)
+    post_delete.connect(lookup_changed_bump_version, sender=lookup_model)
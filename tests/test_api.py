@@ -0,0 +1,77 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from ..api import model_api_fields, ndjson_response, person_api_fields
+from ..lookups import lookup_objects
+from ..models import ContactVoice, MembershipStatus, MembershipType, Person, Position
+
+def read_lines(response):
+    return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+def filter_vista(view):
+    return view.vistaobj['queryset'].filter(name_first='Ann')
+
+class TestNdjsonApi(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.status = status = MembershipStatus.objects.create(name='Active', membership_type=MembershipType.objects.create(name='Member'))
+        self.chair = Position.objects.create(title='Chair')
+        self.people = [Person.objects.create(name_last=f'Last{indx}', name_first=['Ann', 'Bob'][indx % 2], membership_status=status) for indx in range(5)]
+        ContactVoice.objects.create(person=self.people[0], number='555-0100')
+        self.people[0].positions.add(self.chair)
+
+    def get(self, queryset, api_fields, **params):
+        request = RequestFactory().get('/', params)
+        return ndjson_response(request, queryset, api_fields, ['id'])
+
+    def test_pages_follow_the_cursor(self):
+        queryset = Person.objects.order_by('name_last')
+        lines = read_lines(self.get(queryset, model_api_fields(Person), limit=2))
+        self.assertEqual([line['id'] for line in lines[:-1]], [person.pk for person in self.people[:2]])
+
+        seen = [line['id'] for line in lines[:-1]]
+        while lines[-1]['next']:
+            lines = read_lines(self.get(queryset, model_api_fields(Person), limit=2, after=lines[-1]['next']))
+            seen.extend(line['id'] for line in lines[:-1])
+
+        self.assertEqual(seen, [person.pk for person in self.people])
+
+    def test_fields_are_read_in_one_plan(self):
+        lookup_objects(MembershipStatus)
+
+        # the people, and one prefetch for each list field; statuses come from the lookup table
+        with self.assertNumQueries(3):
+            lines = read_lines(self.get(Person.objects.order_by('name_last'), person_api_fields(Person), fields='name_last,membership_status,voice_numbers,positions'))
+
+        self.assertEqual(lines[0], {'name_last': 'Last0', 'membership_status': str(self.status), 'voice_numbers': ['555-0100'], 'positions': ['Chair']})
+        self.assertEqual(lines[-1], {'next': None})
+        self.assertEqual(len(lines), 6)
+
+    def test_unknown_field(self):
+        response = self.get(Person.objects.all(), model_api_fields(Person), fields='name_last,password')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', json.loads(response.content)['error'])
+
+    def test_bad_cursor(self):
+        response = self.get(Person.objects.all(), model_api_fields(Person), after='nonsense')
+
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('sdcpeople.vistas.get_vista_queryset', side_effect=filter_vista)
+    def test_view_uses_the_vista(self, get_vista_queryset):
+        user = get_user_model().objects.create(username='api')
+        user.user_permissions.add(Permission.objects.get(codename='view_person'))
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('sdcpeople:person-api'), {'fields': 'id'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(read_lines(response)[:-1], [{'id': person.pk} for person in self.people if person.name_first == 'Ann'])
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.forms import inlineformset_factory, modelform_factory
+from django.test import TestCase
+
+from ..audit import COMPACT_FIELDNAME, DELETED_FIELDNAME, AuditLog, history_changes, resolve_history_objects
+from ..models import ContactEmail, History, Person
+
+PersonNameForm = modelform_factory(Person, fields=['name_last', 'name_first'])
+EmailFormset = inlineformset_factory(Person, ContactEmail, fields=['address'], extra=1)
+
+class TestAuditLog(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username='auditor')
+        self.person = Person.objects.create(name_last='Last', name_first='First')
+        self.contactemail = ContactEmail.objects.create(person=self.person, address='old@example.com')
+
+    def edit(self, compact):
+        form = PersonNameForm({'name_last': 'Changed', 'name_first': 'First'}, instance=self.person)
+        formset = EmailFormset({
+            'contactemail_set-TOTAL_FORMS': '2',
+            'contactemail_set-INITIAL_FORMS': '1',
+            'contactemail_set-0-id': str(self.contactemail.pk),
+            'contactemail_set-0-address': 'old@example.com',
+            'contactemail_set-0-DELETE': 'on',
+            'contactemail_set-1-address': 'new@example.com',
+        }, instance=self.person)
+        self.assertTrue(form.is_valid())
+        self.assertTrue(formset.is_valid())
+
+        audit = AuditLog(self.user, compact=compact).add_form(form, 'Person').add_formset(formset)
+        form.save()
+        formset.save()
+
+        with self.assertNumQueries(1):
+            audit.save()
+
+    def test_one_row_per_field(self):
+        self.edit(compact=False)
+
+        self.assertEqual(
+            set(History.objects.values_list('modelname', 'fieldname', 'old_value', 'new_value')),
+            {
+                ('Person', 'name_last', 'Last', 'Changed'),
+                ('ContactEmail', DELETED_FIELDNAME, str(self.contactemail), ''),
+                ('ContactEmail', 'address', None, 'new@example.com'),
+            }
+        )
+        self.assertFalse(History.objects.filter(objectid__isnull=True).exists())
+
+    def test_compact_rows(self):
+        self.edit(compact=True)
+
+        history = History.objects.get(modelname='Person')
+        self.assertEqual(history.fieldname, COMPACT_FIELDNAME)
+        self.assertEqual(history_changes(history), [('name_last', 'Last', 'Changed')])
+        self.assertEqual(History.objects.count(), 3)
+
+class TestHistoryDisplay(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        people = [Person.objects.create(name_last=f'Last{indx}', name_first='First') for indx in range(10)]
+        contactemails = [ContactEmail.objects.create(person=person, address=f'{person.pk}@example.com') for person in people]
+        History.objects.bulk_create(
+            [History(modelname='Person', objectid=person.pk, fieldname='name_last', new_value=person.name_last) for person in people]
+            + [History(modelname='ContactEmail', objectid=contactemail.pk, fieldname='address', new_value=contactemail.address) for contactemail in contactemails]
+        )
+
+    def test_page_resolves_in_one_query_per_model(self):
+        histories = list(History.objects.all())
+
+        with self.assertNumQueries(2):
+            resolve_history_objects(histories)
+            displays = [str(history) for history in histories]
+
+        self.assertIn('[First Last0]', ''.join(displays))
+
+    def test_renamed_objects_are_shown_by_their_new_names(self):
+        histories = History.objects.filter(modelname='Person')
+        resolve_history_objects(histories)
+        Person.objects.filter(name_last='Last0').update(name_last='Renamed')
+
+        displays = [history.object_display for history in resolve_history_objects(histories)]
+
+        self.assertIn('First Renamed', displays)
+        self.assertNotIn('First Last0', displays)
+
+    def test_str_makes_no_queries(self):
+        history = History.objects.filter(modelname='Person').first()
+
+        with self.assertNumQueries(0):
+            self.assertIn(f'Person: {history.objectid} [name_last]', str(history))
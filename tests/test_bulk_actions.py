@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..bulkactions import add_to_savedlist, add_to_subcommittee, set_membership_status
+from ..models import (BulkRecordAction, ListMembership, MembershipHistory, MembershipStatus, MembershipType, Person, RecordactPerson,
+                      SavedList, SubCommittee, SubMembership)
+from ..search import rebuild_search_keys
+
+class TestBulkActions(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='organizer')
+        self.status = MembershipStatus.objects.create(name='Active', membership_type=MembershipType.objects.create(name='Member'))
+        self.people = [Person.objects.create(name_last=f'Last{indx}') for indx in range(40)]
+
+    def test_queries_do_not_grow_with_the_people(self):
+        with CaptureQueriesContext(connection) as few:
+            set_membership_status(Person.objects.filter(pk__in=[person.pk for person in self.people[:4]]), self.status, self.user)
+        with CaptureQueriesContext(connection) as many:
+            set_membership_status(Person.objects.filter(pk__in=[person.pk for person in self.people[4:]]), self.status, self.user)
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Person.objects.filter(membership_status=self.status).count(), 40)
+        self.assertEqual(MembershipHistory.objects.filter(membership_status=self.status).count(), 40)
+        self.assertEqual(RecordactPerson.objects.filter(recordact__bulk_recordact__in=BulkRecordAction.objects.all()).count(), 40)
+
+    def test_people_already_added_are_left_out(self):
+        savedlist = SavedList.objects.create(name='Phone Bank')
+        subcommittee = SubCommittee.objects.create(name='Outreach')
+        ListMembership.objects.create(savedlist=savedlist, person=self.people[0])
+        SubMembership.objects.create(subcommittee=subcommittee, person=self.people[0])
+        people = Person.objects.filter(pk__in=[person.pk for person in self.people[:5]])
+
+        self.assertEqual(add_to_savedlist(people, savedlist, self.user).rows_done, 4)
+        self.assertEqual(add_to_subcommittee(people, subcommittee, self.user).rows_done, 4)
+        self.assertEqual(ListMembership.objects.filter(savedlist=savedlist).count(), 5)
+        self.assertEqual(SubMembership.objects.filter(subcommittee=subcommittee).count(), 5)
+
+    def test_view_applies_to_checked_people(self):
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=['change_person', 'view_person']))
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('sdcpeople:person-bulk-action'), {
+            'action': 'membership_status',
+            'membership_status': self.status.pk,
+            'scope': 'selected',
+            'people': [self.people[1].pk, self.people[2].pk],
+        })
+
+        bulk_recordact = BulkRecordAction.objects.get()
+        self.assertRedirects(response, reverse('sdcpeople:person-list-by', kwargs={'by_value':bulk_recordact.pk, 'by_parameter':'recordactperson__recordact__bulk_recordact'}), fetch_redirect_response=False)
+        self.assertEqual(set(Person.objects.filter(membership_status=self.status).values_list('pk', flat=True)), {self.people[1].pk, self.people[2].pk})
+
+    def test_view_needs_a_target(self):
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=['change_person', 'view_person']))
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('sdcpeople:person-bulk-action'), {'action': 'savedlist', 'scope': 'selected', 'people': [self.people[1].pk]})
+
+        self.assertRedirects(response, reverse('sdcpeople:person-list'), fetch_redirect_response=False)
+        self.assertFalse(BulkRecordAction.objects.exists())
+
+    def test_view_applies_to_everyone_in_the_searched_list(self):
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=['change_person', 'view_person']))
+        self.client.force_login(self.user)
+        smiths = [Person.objects.create(name_last='Smith', name_first=name_first) for name_first in ['Ann', 'Bob']]
+        rebuild_search_keys()
+
+        with mock.patch('sdcpeople.views.get_latest_vista', return_value={'queryset': Person.objects.all()}):
+            self.client.post(reverse('sdcpeople:person-bulk-action'), {
+                'action': 'membership_status',
+                'membership_status': self.status.pk,
+                'scope': 'vista',
+                'search': 'smith',
+            })
+
+        self.assertEqual(set(Person.objects.filter(membership_status=self.status).values_list('pk', flat=True)), {person.pk for person in smiths})
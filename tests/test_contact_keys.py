@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..models import ContactEmail, ContactText, ContactVoice, Person
+from ..normalize import email_key, phone_key
+
+class TestKeys(SimpleTestCase):
+
+    def test_phone_key(self):
+        self.assertEqual(phone_key('(555) 555-0100'), '+15555550100')
+        self.assertEqual(phone_key('1.555.555.0100 ext 36'), '+15555550100')
+        self.assertEqual(phone_key('+44 20 7946 0958'), '+442079460958')
+        self.assertEqual(phone_key('555-0100'), '')
+
+    def test_email_key(self):
+        self.assertEqual(email_key(' Ann@Example.COM '), 'ann@example.com')
+
+class TestContactLookup(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='caller')
+        self.user.user_permissions.add(Permission.objects.get(codename='view_person'))
+        self.client.force_login(self.user)
+        self.ann = Person.objects.create(name_last='Smith', name_first='Ann')
+        self.bob = Person.objects.create(name_last='Jones', name_first='Bob')
+        ContactVoice.objects.create(person=self.ann, number='(555) 555-0100')
+        ContactText.objects.create(person=self.bob, number='555.555.0100')
+        ContactEmail.objects.create(person=self.bob, address='Bob@Example.com')
+
+    def test_keys_are_filled_on_save(self):
+        self.assertEqual(ContactVoice.objects.get().number_key, '+15555550100')
+        self.assertEqual(ContactEmail.objects.get().address_key, 'bob@example.com')
+
+    def test_lookup_by_phone(self):
+        response = self.client.get(reverse('sdcpeople:person-contact-lookup'), {'phone': '+1 555 555 0100'})
+
+        self.assertEqual(response.json()['phone'], '+15555550100')
+        self.assertEqual({result['pk'] for result in response.json()['results']}, {self.ann.pk, self.bob.pk})
+
+    def test_lookup_by_email(self):
+        response = self.client.get(reverse('sdcpeople:person-contact-lookup'), {'email': 'BOB@example.com'})
+
+        self.assertEqual([result['pk'] for result in response.json()['results']], [self.bob.pk])
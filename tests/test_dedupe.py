@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..dedupe import blocking_keys, find_duplicates, merge_people, score_pairs
+from ..models import ContactEmail, ContactVoice, DuplicateCandidate, History, ListMembership, Person, Position, RecordactPerson, SavedList
+
+class TestDedupe(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ann = Person.objects.create(name_last="O'Brien", name_first='Ann')
+        self.ann_again = Person.objects.create(name_last='OBrien', name_first='Annie', name_middles='Marie')
+        self.other_ann = Person.objects.create(name_last='Smith', name_first='Ann')
+        ContactVoice.objects.create(person=self.ann, number='(555) 555-0100')
+        ContactVoice.objects.create(person=self.ann_again, number='1-555-555-0100')
+        ContactEmail.objects.create(person=self.other_ann, address='ann@example.com')
+
+    def test_pairs_are_scored_within_blocks(self):
+        pairs = score_pairs(blocking_keys())
+
+        self.assertEqual(list(pairs), [(self.ann.pk, self.ann_again.pk)])
+        self.assertEqual(pairs[(self.ann.pk, self.ann_again.pk)][1], 'name, phone')
+
+    def test_found_pairs_keep_their_review(self):
+        DuplicateCandidate.objects.create(person=self.ann, duplicate=self.ann_again, status='dismissed')
+
+        self.assertEqual(find_duplicates(), 1)
+        self.assertEqual(list(DuplicateCandidate.objects.values_list('status', flat=True)), ['dismissed'])
+
+    def test_merge_moves_everything(self):
+        savedlist = SavedList.objects.create(name='Phone Bank')
+        for person in [self.ann, self.ann_again]:
+            ListMembership.objects.create(savedlist=savedlist, person=person)
+        position = Position.objects.create(title='Chair')
+        self.ann_again.positions.add(position)
+        History.objects.create(modelname='Person', objectid=self.ann_again.pk, fieldname='name_first', new_value='Annie')
+        find_duplicates()
+
+        merge_people(self.ann, self.ann_again)
+
+        self.assertEqual(ContactVoice.objects.filter(person=self.ann).count(), 1)
+        self.assertEqual(ListMembership.objects.filter(person=self.ann).count(), 1)
+        self.assertFalse(ListMembership.objects.filter(person=self.ann_again).exists())
+        self.assertEqual(list(self.ann.positions.all()), [position])
+        self.assertTrue(History.objects.filter(objectid=self.ann.pk, new_value='Annie').exists())
+        self.assertEqual(Person.all_objects.get(pk=self.ann.pk).name_middles, 'Marie')
+        self.assertTrue(Person.all_objects.get(pk=self.ann_again.pk).is_deleted)
+        self.assertEqual(DuplicateCandidate.objects.get().status, 'merged')
+        self.assertTrue(RecordactPerson.objects.filter(object=self.ann).exists())
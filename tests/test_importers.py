@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..importers import PersonImporter
+from ..models import ContactVoice, LocationCity, MembershipHistory, MembershipStatus, MembershipType, Person, Position, RecordactPerson, VotingAddress
+
+HEADER = ['van_id', 'name_last', 'name_first', 'street_address', 'city', 'membership_status', 'positions', 'phone']
+
+# the most queries one batch may cost, whatever its size
+MAX_QUERIES_PER_BATCH = 20
+
+class TestPersonImporter(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='loader')
+        self.city = LocationCity.objects.create(name='Springfield')
+        self.status = MembershipStatus.objects.create(name='Active', membership_type=MembershipType.objects.create(name='Member'))
+        self.chair = Position.objects.create(title='Chair')
+
+    def row(self, van_id, **values):
+        row = {
+            'van_id': van_id,
+            'name_last': f'Last{van_id}',
+            'name_first': 'Ann',
+            'street_address': f'{van_id} Main St',
+            'city': 'Springfield',
+            'membership_status': 'Active Member',
+            'positions': 'Chair',
+            'phone': f'(555) 555-{van_id:0>4}',
+        }
+        row.update(values)
+        return [row[column] for column in HEADER]
+
+    def import_rows(self, rows, **kwargs):
+        return PersonImporter(user=self.user, **kwargs).run([HEADER, *rows])
+
+    def test_existing_people_are_updated_only_with_overwrite(self):
+        importer = self.import_rows([self.row('1')])
+        self.assertEqual((importer.people_created, importer.people_updated), (1, 0))
+
+        importer = self.import_rows([self.row('1', name_first='Anne')])
+        self.assertEqual((importer.people_created, importer.people_updated), (0, 0))
+        self.assertEqual(Person.objects.get(vb_voter_id='1').name_first, 'Ann')
+
+        importer = self.import_rows([self.row('1', name_first='Anne')], overwrite=True)
+        self.assertEqual((importer.people_created, importer.people_updated), (0, 1))
+        self.assertEqual(Person.objects.get(vb_voter_id='1').name_first, 'Anne')
+        self.assertEqual(ContactVoice.objects.count(), 1)
+        self.assertEqual(RecordactPerson.objects.filter(object__vb_voter_id='1').count(), 2)
+
+    def test_duplicate_van_ids_in_a_batch_are_one_person(self):
+        importer = self.import_rows([self.row('1'), self.row('1', name_first='Anne')])
+
+        self.assertEqual(importer.people_created, 1)
+        self.assertEqual(Person.objects.get(vb_voter_id='1').name_first, 'Ann')
+        self.assertEqual(ContactVoice.objects.count(), 1)
+
+    def test_rows_are_matched_to_lookups_and_addresses(self):
+        self.import_rows([
+            self.row('1', positions='Chair, Treasurer'),
+            self.row('2', street_address='1 Main St', city='Shelbyville', membership_status='Lapsed Member'),
+        ])
+
+        # new addresses are added; locations, statuses and positions are only matched, never added
+        voting_address = VotingAddress.objects.get()
+        self.assertEqual(voting_address.street_address, '1 Main St')
+        self.assertEqual(voting_address.locationcity, self.city)
+        first, second = Person.objects.order_by('vb_voter_id')
+        self.assertEqual((first.voting_address, second.voting_address), (voting_address, voting_address))
+        self.assertEqual((first.membership_status, second.membership_status), (self.status, None))
+        self.assertEqual(list(first.positions.all()), [self.chair])
+        self.assertEqual(MembershipHistory.objects.filter(person=first, membership_status=self.status).count(), 1)
+        self.assertEqual((LocationCity.objects.count(), MembershipStatus.objects.count(), Position.objects.count()), (1, 1, 1))
+
+    def test_malformed_rows_are_counted(self):
+        importer = self.import_rows([self.row('1'), ['2', 'Short']])
+
+        self.assertEqual((importer.rows_done, importer.rows_failed), (2, 1))
+        self.assertEqual(list(Person.objects.values_list('vb_voter_id', flat=True)), ['1'])
+
+    def test_deleted_people_are_skipped(self):
+        person = Person.objects.create(name_last='Gone', vb_voter_id='1')
+        person.delete()
+
+        importer = self.import_rows([self.row('1')], overwrite=True)
+
+        self.assertEqual(importer.people_deleted_skipped, 1)
+        self.assertEqual(Person.all_objects.filter(vb_voter_id='1').count(), 1)
+        self.assertTrue(Person.all_objects.get(vb_voter_id='1').is_deleted)
+
+    def test_rows_without_van_ids(self):
+        self.import_rows([self.row('')], require_van_id=True)
+        self.assertFalse(Person.objects.exists())
+
+        self.import_rows([self.row(''), self.row('')])
+        self.assertEqual(Person.objects.count(), 2)
+
+    def test_queries_per_batch(self):
+        # load the lookup tables and district rollups first
+        self.import_rows([self.row('1')])
+
+        with CaptureQueriesContext(connection) as small_batch:
+            self.import_rows([self.row(str(van_id)) for van_id in range(100, 102)], batch_size=10)
+        with CaptureQueriesContext(connection) as large_batch:
+            self.import_rows([self.row(str(van_id)) for van_id in range(200, 210)], batch_size=10)
+        with CaptureQueriesContext(connection) as four_batches:
+            self.import_rows([self.row(str(van_id)) for van_id in range(300, 340)], batch_size=10)
+
+        self.assertEqual(len(small_batch), len(large_batch))
+        self.assertLessEqual((len(four_batches) - len(large_batch)) / 3, MAX_QUERIES_PER_BATCH)
+        self.assertEqual(Person.objects.count(), 53)
@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..models import History, Person
+
+class TestIndexPack(TestCase):
+
+    def test_benchmark_restores_the_indexes(self):
+        stdout = StringIO()
+        call_command('query_plans_benchmark', repeat=1, workload=['person list by name'], stdout=stdout)
+
+        if connection.features.can_rollback_ddl:
+            self.assertIn('without the index pack', stdout.getvalue())
+        self.assertIn('with the index pack', stdout.getvalue())
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Person._meta.db_table)
+        self.assertIn('person_live_name_idx', constraints)
+
+    def test_default_person_order_uses_the_name_index(self):
+        stdout = StringIO()
+        call_command('query_plans_benchmark', repeat=1, workload=['person list'], stdout=stdout)
+
+        # the plans of other databases depend on their statistics
+        if connection.vendor == 'sqlite':
+            plan = stdout.getvalue().split('with the index pack')[1]
+            self.assertIn('person_live_name_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_history_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, History._meta.db_table)
+        self.assertEqual(constraints['history_object_idx']['columns'], ['modelname', 'objectid'])
@@ -0,0 +1,70 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from django.urls import reverse
+
+from ..lists import add_people_to_list, combine_people, event_people, insert_list_memberships, savedlist_people
+from ..models import Event, ListMembership, Participation, Person, SavedList
+from ..search import rebuild_search_keys
+
+class TestAddPeopleToList(TestCase):
+
+    def setUp(self):
+        self.people = [Person.objects.create(name_last=f'Last{indx}', name_first='First' if indx % 2 else 'Other') for indx in range(20)]
+        self.savedlist = SavedList.objects.create(name='Phone Bank')
+
+    def test_one_insert_and_no_duplicates(self):
+        ListMembership.objects.create(savedlist=self.savedlist, person=self.people[1])
+
+        with self.assertNumQueries(1):
+            people_added = add_people_to_list(self.savedlist, Person.objects.filter(name_first='First').order_by('name_last'))
+
+        self.assertEqual(people_added, 9)
+        self.assertEqual(
+            set(ListMembership.objects.filter(savedlist=self.savedlist).values_list('person_id', flat=True)),
+            { person.pk for person in self.people if person.name_first == 'First' }
+        )
+
+    def test_snapshot_keeps_only_the_searched_people(self):
+        user = get_user_model().objects.create(username='organizer')
+        user.user_permissions.add(*Permission.objects.filter(codename__in=['add_savedlist', 'view_savedlist']))
+        self.client.force_login(user)
+        smith = Person.objects.create(name_last='Smith', name_first='Ann')
+        rebuild_search_keys()
+
+        with mock.patch('sdcpeople.views.get_latest_vista', return_value={'queryset': Person.objects.all()}):
+            self.client.post(reverse('sdcpeople:savedlist-from-person-list') + '?search=smith', {'name': 'Smiths', 'shared': 1})
+
+        self.assertEqual(list(ListMembership.objects.filter(savedlist__name='Smiths').values_list('person_id', flat=True)), [smith.pk])
+
+class TestCombinePeople(TestCase):
+
+    def setUp(self):
+        self.people = [Person.objects.create(name_last=f'Last{indx}') for indx in range(6)]
+        self.savedlist = SavedList.objects.create(name='Phone Bank')
+        for person in self.people[:4]:
+            ListMembership.objects.create(savedlist=self.savedlist, person=person)
+        self.event = Event.objects.create(name='Meeting', when=date(2026, 10, 1))
+        for person in self.people[2:]:
+            # twice, to show that people are counted once
+            Participation.objects.create(person=person, event=self.event)
+            Participation.objects.create(person=person, event=self.event)
+
+    def combined_list(self, operation):
+        newlist = SavedList.objects.create(name=operation)
+        people = combine_people(operation, savedlist_people(self.savedlist.pk), [event_people(self.event.pk)])
+        with self.assertNumQueries(1):
+            insert_list_memberships(newlist, people)
+        return set(ListMembership.objects.filter(savedlist=newlist).values_list('person__name_last', flat=True))
+
+    def test_union(self):
+        self.assertEqual(self.combined_list('union'), { person.name_last for person in self.people })
+
+    def test_intersection(self):
+        self.assertEqual(self.combined_list('intersection'), {'Last2', 'Last3'})
+
+    def test_difference(self):
+        self.assertEqual(self.combined_list('difference'), {'Last0', 'Last1'})
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..forms import PersonForm, VotingAddressForm
+from ..lookups import LOOKUP_TABLES, lookup_objects
+from ..models import LocationCity, MembershipStatus, MembershipType, Position
+
+class TestLookupTables(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        LOOKUP_TABLES.clear()
+        self.membership_type = MembershipType.objects.create(name='Regular')
+        self.membership_status = MembershipStatus.objects.create(membership_type=self.membership_type, name='Active')
+        self.position = Position.objects.create(title='Chair')
+        self.locationcity = LocationCity.objects.create(name='Springfield')
+
+    def test_read_once(self):
+        lookup_objects(MembershipStatus)
+
+        with self.assertNumQueries(0):
+            self.assertEqual([str(mstatus) for mstatus in lookup_objects(MembershipStatus)], [str(self.membership_status)])
+
+    def test_changes_are_seen(self):
+        lookup_objects(LocationCity)
+        LocationCity.objects.create(name='Shelbyville')
+
+        self.assertEqual([location.name for location in lookup_objects(LocationCity)], ['Shelbyville', 'Springfield'])
+
+    def test_related_lookup_changes_are_seen(self):
+        lookup_objects(MembershipStatus)
+        self.membership_type.name = 'Honorary'
+        self.membership_type.save()
+
+        self.assertIn('Honorary', str(lookup_objects(MembershipStatus)[0]))
+
+    def test_form_choices(self):
+        str(VotingAddressForm())
+
+        with self.assertNumQueries(0):
+            form = VotingAddressForm()
+            choices = list(form.fields['locationcity'].choices)
+        self.assertEqual(choices[1][1], 'Springfield')
+
+    def test_form_values(self):
+        form = PersonForm({'name_last': 'Smith', 'membership_status': self.membership_status.pk, 'positions': [self.position.pk]})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['membership_status'], self.membership_status)
+        self.assertEqual(form.cleaned_data['positions'], [self.position])
+
+        form = PersonForm({'name_last': 'Smith', 'membership_status': 0})
+        self.assertFalse(form.is_valid())
+        self.assertIn('membership_status', form.errors)
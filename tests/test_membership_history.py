@@ -0,0 +1,39 @@
+from django.test import TestCase
+
+from ..models import MembershipHistory, MembershipStatus, MembershipType, Person
+
+class TestMembershipHistory(TestCase):
+
+    def setUp(self):
+        membership_type = MembershipType.objects.create(name='Regular')
+        self.active = MembershipStatus.objects.create(membership_type=membership_type, name='Active', is_member=True)
+        self.inactive = MembershipStatus.objects.create(membership_type=membership_type, name='Inactive')
+
+    def test_history_follows_status_changes(self):
+        person = Person.objects.create(name_last='Last', membership_status=self.active)
+        person.save()
+        person.membership_status = self.inactive
+        person.save()
+
+        self.assertEqual(
+            list(MembershipHistory.objects.filter(person=person).order_by('pk').values_list('membership_status', flat=True)),
+            [self.active.pk, self.inactive.pk]
+        )
+
+    def test_unchanged_save_makes_no_history_query(self):
+        person = Person.objects.create(name_last='Last', membership_status=self.active)
+        person = Person.objects.get(pk=person.pk)
+
+        # only the UPDATE of the person itself
+        with self.assertNumQueries(1):
+            person.save()
+
+    def test_record_changes_in_bulk(self):
+        people = [Person(name_last=f'Last{indx}', membership_status=self.active) for indx in range(10)]
+        Person.objects.bulk_create(people)
+
+        with self.assertNumQueries(1):
+            MembershipHistory.objects.record_changes(people)
+
+        self.assertEqual(MembershipHistory.objects.count(), 10)
+        self.assertEqual(MembershipHistory.objects.record_changes(people), [])
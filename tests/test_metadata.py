@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase
+
+from ..metadata import choice_models, field_columns, field_labels
+from ..models import Event, MembershipStatus, Person, Position, VotingAddress
+
+class TestMetadata(SimpleTestCase):
+
+    def test_field_labels(self):
+        self.assertIs(field_labels(Person), field_labels(Person))
+        self.assertEqual(field_labels(Person)['name_last'], Person._meta.get_field('name_last').verbose_name.title())
+        self.assertNotIn('contactvoice', field_labels(Person))
+
+    def test_field_columns(self):
+        self.assertEqual(
+            field_columns(VotingAddress, ['locationcity']),
+            [{ 'name':'locationcity', 'label':VotingAddress._meta.get_field('locationcity').verbose_name.title() }]
+        )
+
+    def test_choice_models(self):
+        self.assertEqual(
+            choice_models(Person, ['name_last', 'membership_status__is_member', 'participation__event', 'positions']),
+            [Event, MembershipStatus, Position]
+        )
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.views.generic.list import ListView
+
+from ..models import ListMembership, Person, SavedList
+from ..pagination import CachedCountPaginator, KeysetPaginationMixin, keyset_ordering
+
+class PersonPages(KeysetPaginationMixin, ListView):
+    model = Person
+    paginate_by = 3
+    ordering = ['-name_first', 'name_last']
+
+class TestKeysetPagination(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for indx in range(10):
+            Person.objects.create(name_last=f'Last{indx % 4}', name_first=['Ann', 'Bob', ''][indx % 3])
+        self.expected = list(Person.objects.order_by('-name_first', 'name_last', 'pk').values_list('pk', flat=True))
+
+    def get_page(self, **params):
+        view = PersonPages()
+        view.setup(RequestFactory().get('/', params))
+        view.object_list = view.get_queryset()
+        with CaptureQueriesContext(connection) as context:
+            context_data = view.get_context_data()
+        return context_data['page_obj'], context.captured_queries
+
+    def test_keyset_ordering(self):
+        self.assertEqual(keyset_ordering(Person.objects.order_by('-name_first', 'name_last')), [('name_first', True), ('name_last', False), ('pk', False)])
+        self.assertIsNone(keyset_ordering(Person.objects.order_by('membership_status')))
+
+    def test_pages_follow_the_offset_order(self):
+        page, queries = self.get_page()
+        pks = [person.pk for person in page]
+
+        while page.next_cursor:
+            page, queries = self.get_page(after=page.next_cursor)
+            pks.extend(person.pk for person in page)
+            self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
+
+        self.assertEqual(pks, self.expected)
+        self.assertEqual(page.number, 4)
+        self.assertEqual(page.paginator.count, 10)
+
+    def test_previous_page(self):
+        first_page, queries = self.get_page()
+        second_page, queries = self.get_page(after=first_page.next_cursor)
+        previous_page, queries = self.get_page(before=second_page.previous_cursor)
+
+        self.assertEqual([person.pk for person in previous_page], [person.pk for person in first_page])
+        self.assertEqual(previous_page.number, 1)
+
+    def test_count_is_cached(self):
+        page, queries = self.get_page()
+        page, queries = self.get_page(after=page.next_cursor)
+
+        self.assertFalse(any('COUNT' in query['sql'] for query in queries))
+
+    def test_count_is_dropped_when_a_count_model_changes(self):
+        savedlist = SavedList.objects.create(name='Phone Bank')
+        people = Person.objects.filter(listmembership__savedlist=savedlist).order_by('pk')
+        self.assertEqual(CachedCountPaginator(people, 3, count_models=[Person, ListMembership]).count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ListMembership.objects.create(savedlist=savedlist, person=Person.objects.first())
+
+        self.assertEqual(CachedCountPaginator(people, 3, count_models=[Person, ListMembership]).count, 1)
@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+
+from ..audit import AuditLog
+from ..forms import PersonSubMembershipForm
+from ..models import ContactVoice, History, MembershipStatus, MembershipType, Person, Position, RecordactPerson, SavedList, SubCommittee
+
+FORMSET_PREFIXES = ['contacttext_set', 'contactvoice_set', 'contactemail_set', 'submembership_set', 'listmembership_set', 'link_set']
+
+class TestPersonEdit(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='editor')
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=['change_person', 'view_person']))
+        self.client.force_login(self.user)
+        self.status = MembershipStatus.objects.create(name='Active', membership_type=MembershipType.objects.create(name='Member'))
+        self.person = Person.objects.create(name_last='Smith', membership_status=self.status)
+        self.subcommittee = SubCommittee.objects.create(name='Outreach')
+        self.position = Position.objects.create(title='Chair')
+        SavedList.objects.create(name='Phone Bank')
+
+    def post_data(self, **extra):
+        data = { 'name_last': 'Smith', 'membership_status': self.status.pk }
+        for prefix in FORMSET_PREFIXES:
+            data[f'{prefix}-TOTAL_FORMS'] = 0
+            data[f'{prefix}-INITIAL_FORMS'] = 0
+        data.update(extra)
+        return data
+
+    def test_rows_added_by_the_page_are_saved(self):
+        response = self.client.post(reverse('sdcpeople:person-update', kwargs={'pk':self.person.pk}), self.post_data(**{
+            'contactvoice_set-TOTAL_FORMS': 1,
+            'contactvoice_set-0-number': '555-0100',
+            'contactvoice_set-0-is_mobile': 0,
+            'contactvoice_set-0-rank_number': 0,
+        }))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(ContactVoice.objects.filter(person=self.person).values_list('number', flat=True)), ['555-0100'])
+
+    def test_select_renders_only_its_value(self):
+        form = PersonSubMembershipForm(initial={'subcommittee': self.subcommittee.pk})
+        html = str(form['subcommittee'])
+
+        self.assertIn('data-choice-list="subcommittee"', html)
+        self.assertEqual(html.count('<option'), 2)
+
+    def test_choices(self):
+        url = reverse('sdcpeople:person-form-choices')
+        choices = self.client.get(url).json()
+
+        self.assertEqual(choices['subcommittee'], [[self.subcommittee.pk, 'Outreach']])
+        self.assertEqual(choices['position'], [[self.position.pk, 'Chair']])
+        self.assertEqual([label for pk, label in choices['savedlist']], ['Phone Bank'])
+
+    def test_save_is_all_or_nothing(self):
+        voice = ContactVoice.objects.create(person=self.person, number='555-0100')
+
+        response = self.client.post(reverse('sdcpeople:person-update', kwargs={'pk':self.person.pk}), self.post_data(**{
+            'name_last': 'Jones',
+            'contactvoice_set-TOTAL_FORMS': 2,
+            'contactvoice_set-INITIAL_FORMS': 1,
+            'contactvoice_set-0-id': voice.pk,
+            'contactvoice_set-0-number': '',
+            'contactvoice_set-0-is_mobile': 0,
+            'contactvoice_set-0-rank_number': 0,
+            'contactvoice_set-1-number': '555-0101',
+            'contactvoice_set-1-is_mobile': 0,
+            'contactvoice_set-1-rank_number': 0,
+        }))
+
+        # the person form and the new voice row are valid; only the changed voice row is not
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].is_valid())
+        self.assertFalse(response.context['contactvoices'].is_valid())
+        self.person.refresh_from_db()
+        self.assertEqual(self.person.name_last, 'Smith')
+        self.assertEqual(list(ContactVoice.objects.filter(person=self.person).values_list('number', flat=True)), ['555-0100'])
+        self.assertFalse(History.objects.filter(modelname='Person', objectid=self.person.pk).exists())
+
+    @mock.patch.object(AuditLog, 'save', side_effect=DatabaseError)
+    def test_failed_save_rolls_back_the_person_and_formsets(self, audit_save):
+        voice = ContactVoice.objects.create(person=self.person, number='555-0100')
+
+        # the history is written after the person and the voices, so they are rolled back with it
+        with self.assertRaises(DatabaseError):
+            self.client.post(reverse('sdcpeople:person-update', kwargs={'pk':self.person.pk}), self.post_data(**{
+                'name_last': 'Jones',
+                'contactvoice_set-TOTAL_FORMS': 2,
+                'contactvoice_set-INITIAL_FORMS': 1,
+                'contactvoice_set-0-id': voice.pk,
+                'contactvoice_set-0-number': '555-0199',
+                'contactvoice_set-0-is_mobile': 0,
+                'contactvoice_set-0-rank_number': 0,
+                'contactvoice_set-1-number': '555-0101',
+                'contactvoice_set-1-is_mobile': 0,
+                'contactvoice_set-1-rank_number': 0,
+            }))
+
+        self.assertTrue(audit_save.called)
+        self.person.refresh_from_db()
+        self.assertEqual(self.person.name_last, 'Smith')
+        self.assertEqual(list(ContactVoice.objects.filter(person=self.person).values_list('number', flat=True)), ['555-0100'])
+
+    def test_changes_are_flushed_with_history_and_record_action(self):
+        voice = ContactVoice.objects.create(person=self.person, number='555-0100')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('sdcpeople:person-update', kwargs={'pk':self.person.pk}), self.post_data(**{
+                'name_last': 'Jones',
+                'contactvoice_set-TOTAL_FORMS': 2,
+                'contactvoice_set-INITIAL_FORMS': 1,
+                'contactvoice_set-0-id': voice.pk,
+                'contactvoice_set-0-number': '555-0199',
+                'contactvoice_set-0-is_mobile': 0,
+                'contactvoice_set-0-rank_number': 0,
+                'contactvoice_set-1-number': '555-0101',
+                'contactvoice_set-1-is_mobile': 0,
+                'contactvoice_set-1-rank_number': 0,
+            }))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sorted(ContactVoice.objects.filter(person=self.person).values_list('number', flat=True)), ['555-0101', '555-0199'])
+        self.assertTrue(History.objects.filter(modelname='Person', objectid=self.person.pk, fieldname='name_last').exists())
+        self.assertTrue(History.objects.filter(modelname='ContactVoice', objectid=voice.pk, fieldname='number').exists())
+        self.assertEqual(RecordactPerson.objects.filter(object=self.person).count(), 1)
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+
+from ..exports import person_export_rows
+from ..projections import attach_person_rows, person_projection_queryset
+from ..models import (ContactEmail, ContactText, ContactVoice, ListMembership, LocationCity, LocationPrecinct,
+                      MembershipStatus, MembershipType, Person, Position, SavedList, SubCommittee, SubMembership, VotingAddress)
+
+class PeopleMixin:
+    def setUp(self):
+        membership_type = MembershipType.objects.create(name='Regular')
+        self.membership_status = MembershipStatus.objects.create(membership_type=membership_type, name='Active', is_member=True, is_quorum=True)
+        self.position = Position.objects.create(title='Chair')
+        self.subcommittee = SubCommittee.objects.create(name='Outreach')
+        self.locationcity = LocationCity.objects.create(name='Springfield')
+        self.locationprecinct = LocationPrecinct.objects.create(name='101')
+
+    def make_people(self, count):
+        for indx in range(count):
+            voting_address = VotingAddress.objects.create(
+                street_address=f'{indx} Main St',
+                locationcity=self.locationcity,
+                locationprecinct=self.locationprecinct,
+            )
+            person = Person.objects.create(name_last=f'Last{indx}', name_first='First', membership_status=self.membership_status, voting_address=voting_address)
+            person.positions.add(self.position)
+            SubMembership.objects.create(person=person, subcommittee=self.subcommittee)
+            ContactVoice.objects.create(person=person, number='555-0100')
+            ContactText.objects.create(person=person, number='555-0101')
+            ContactEmail.objects.create(person=person, address=f'person{indx}@example.com')
+
+class TestPersonExportQueries(PeopleMixin, TestCase):
+
+    def count_export_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            rows = list(person_export_rows(Person.objects.all()))
+        return len(context.captured_queries), rows
+
+    def test_query_count_is_constant(self):
+        self.make_people(3)
+        # the first export loads the lookup tables
+        self.count_export_queries()
+        few_queries, few_rows = self.count_export_queries()
+
+        self.make_people(30)
+        many_queries, many_rows = self.count_export_queries()
+
+        self.assertEqual(len(few_rows), 4)
+        self.assertEqual(len(many_rows), 34)
+        self.assertEqual(few_queries, many_queries)
+
+    def test_row_values(self):
+        self.make_people(1)
+        header, row = list(person_export_rows(Person.objects.all()))
+        values = dict(zip(header, row))
+
+        self.assertEqual(values['Positions'], 'Chair')
+        self.assertEqual(values['SubCommittees'], 'Outreach')
+        self.assertEqual(values['Voice'], '555-0100')
+        self.assertEqual(values['Email'], 'person0@example.com')
+        self.assertEqual(str(values['City']), 'Springfield')
+        self.assertEqual(values['Congress'], '')
+
+    def test_shown_columns(self):
+        self.make_people(1)
+
+        self.assertEqual(len(list(person_export_rows(Person.objects.all(), ['name_last']))[0]), 1)
+        self.assertEqual(list(person_export_rows(Person.objects.all(), [])), [[], []])
+
+class TestPersonListRowQueries(PeopleMixin, TestCase):
+
+    row_template = Template(
+        '{% for person in people %}'
+        '{{ person }} {{ person.membership_status }} {{ person.membership_status.is_quorum }} '
+        '{{ person.row.positions.0 }} {{ person.row.subcommittees.0 }} '
+        '{{ person.row.voice_numbers.0 }} {{ person.row.voice_numbers.1 }} {{ person.row.text_numbers.0 }} {{ person.row.email_addresses.0 }} '
+        '{{ person.voting_address }} {{ person.voting_address.locationcity }} {{ person.voting_address.locationprecinct }} {{ person.voting_address.locationcongress }}'
+        '{% endfor %}'
+    )
+
+    def render_page(self, page_size):
+        with CaptureQueriesContext(connection) as context:
+            people = attach_person_rows(person_projection_queryset(Person.objects.all())[:page_size])
+            self.row_template.render(Context({'people': people}))
+        return len(context.captured_queries), people
+
+    def test_page_renders_in_bounded_queries(self):
+        self.make_people(100)
+
+        small_page_queries, people = self.render_page(10)
+        full_page_queries, people = self.render_page(100)
+
+        self.assertEqual(len(people), 100)
+        self.assertEqual(small_page_queries, full_page_queries)
+        # people, positions, submemberships and the three contact tables
+        self.assertLessEqual(full_page_queries, 6)
+
+    def test_row_contacts_are_ranked(self):
+        self.make_people(1)
+        person = Person.objects.get()
+        ContactVoice.objects.create(person=person, number='555-0199', rank_number=1000)
+        ContactVoice.objects.create(person=person, number='555-0198', rank_number=-1)
+
+        people = attach_person_rows(person_projection_queryset(Person.objects.all()))
+
+        self.assertEqual(people[0].row.voice_numbers, ['555-0199', '555-0100'])
+        self.assertEqual(people[0].row.subcommittees, ['Outreach'])
+
+class TestSavedListDetailQueries(PeopleMixin, TestCase):
+
+    def test_page_is_constant(self):
+        user = get_user_model().objects.create(username='viewer')
+        user.user_permissions.add(Permission.objects.get(codename='view_savedlist'))
+        self.client.force_login(user)
+
+        savedlist = SavedList.objects.create(name='Phone Bank')
+
+        def count_page_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse('sdcpeople:savedlist-detail', kwargs={'pk':savedlist.pk}))
+            return len(context.captured_queries), response
+
+        self.make_people(5)
+        ListMembership.objects.bulk_create([ListMembership(savedlist=savedlist, person=person) for person in Person.objects.all()])
+        few_queries, response = count_page_queries()
+
+        self.make_people(60)
+        ListMembership.objects.bulk_create([ListMembership(savedlist=savedlist, person=person) for person in Person.objects.exclude(listmembership__savedlist=savedlist)])
+        many_queries, response = count_page_queries()
+
+        self.assertEqual(response.context['count'], 65)
+        self.assertEqual(len(response.context['people']), 50)
+        self.assertEqual(few_queries, many_queries)
@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Event, MembershipStatus, MembershipType, Participation, Person
+from ..quorum import event_quorum
+
+class TestEventQuorum(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        membership_type = MembershipType.objects.create(name='Regular')
+        self.quorum_status = MembershipStatus.objects.create(membership_type=membership_type, name='Active', is_member=True, is_quorum=True, can_vote=True)
+        self.guest_status = MembershipStatus.objects.create(membership_type=membership_type, name='Guest')
+        self.event = Event.objects.create(name='Meeting', when=date(2026, 10, 1))
+        self.members = [Person.objects.create(name_last=f'Member{indx}', membership_status=self.quorum_status) for indx in range(5)]
+        self.guest = Person.objects.create(name_last='Guest', membership_status=self.guest_status)
+
+    def test_quorum(self):
+        for person in [*self.members[:3], self.guest]:
+            Participation.objects.create(person=person, event=self.event)
+
+        quorum = event_quorum(self.event.pk)
+
+        self.assertEqual(quorum['quorum_size'], 5)
+        self.assertEqual(quorum['quorum_required'], 3)
+        self.assertEqual(quorum['present'], 4)
+        self.assertEqual(quorum['present_quorum'], 3)
+        self.assertTrue(quorum['has_quorum'])
+
+    def test_cached_until_participation_changes(self):
+        Participation.objects.create(person=self.members[0], event=self.event)
+        event_quorum(self.event.pk)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(event_quorum(self.event.pk)['has_quorum'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for person in self.members[1:3]:
+                Participation.objects.create(person=person, event=self.event)
+
+        self.assertTrue(event_quorum(self.event.pk)['has_quorum'])
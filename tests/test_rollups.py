@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from ..models import DistrictRollup, LocationCity, LocationPrecinct, MembershipStatus, MembershipType, Person, VotingAddress
+from ..rollups import refresh_district_rollups
+
+class TestDistrictRollups(TestCase):
+
+    def setUp(self):
+        membership_type = MembershipType.objects.create(name='Regular')
+        self.active = MembershipStatus.objects.create(membership_type=membership_type, name='Active', is_member=True, is_quorum=True, can_vote=True)
+        self.prospect = MembershipStatus.objects.create(membership_type=membership_type, name='Prospect')
+        self.city = LocationCity.objects.create(name='Springfield')
+        self.precinct = LocationPrecinct.objects.create(name='101')
+        self.other_precinct = LocationPrecinct.objects.create(name='102')
+        self.voting_address = VotingAddress.objects.create(street_address='1 Main St', locationcity=self.city, locationprecinct=self.precinct)
+        self.people = [
+            Person.objects.create(name_last=f'Last{indx}', voting_address=self.voting_address, membership_status=self.active if indx < 2 else self.prospect)
+            for indx in range(3)
+        ]
+        refresh_district_rollups()
+
+    def rollup(self, location_field, location):
+        return DistrictRollup.objects.get(location_field=location_field, location_id=location.pk)
+
+    def test_full_refresh(self):
+        rollup = self.rollup('locationprecinct', self.precinct)
+        self.assertEqual((rollup.people, rollup.members, rollup.quorum, rollup.voters, rollup.dues_payers), (3, 2, 2, 2, 0))
+        self.assertEqual(rollup.location_name, '101')
+        self.assertFalse(DistrictRollup.objects.filter(location_field='locationcongress').exists())
+
+    def test_status_change_updates_district(self):
+        person = Person.objects.get(pk=self.people[2].pk)
+        person.membership_status = self.active
+        with self.captureOnCommitCallbacks(execute=True):
+            person.save()
+
+        self.assertEqual(self.rollup('locationcity', self.city).members, 3)
+
+    def test_address_change_updates_both_districts(self):
+        voting_address = VotingAddress.objects.get(pk=self.voting_address.pk)
+        voting_address.locationprecinct = self.other_precinct
+        with self.captureOnCommitCallbacks(execute=True):
+            voting_address.save()
+
+        self.assertFalse(DistrictRollup.objects.filter(location_field='locationprecinct', location_id=self.precinct.pk).exists())
+        self.assertEqual(self.rollup('locationprecinct', self.other_precinct).people, 3)
+
+    def test_refresh_updates_rollups_in_place(self):
+        rollup = self.rollup('locationcity', self.city)
+        Person.objects.filter(pk=self.people[2].pk).update(membership_status=self.active)
+
+        refresh_district_rollups({'locationcity': [self.city.pk]})
+        refresh_district_rollups({'locationcity': [self.city.pk]})
+
+        self.assertEqual(DistrictRollup.objects.filter(location_field='locationcity').count(), 1)
+        self.assertEqual(self.rollup('locationcity', self.city).pk, rollup.pk)
+        self.assertEqual(self.rollup('locationcity', self.city).members, 3)
@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from ..models import ContactEmail, ContactVoice, Person, PersonSearch, VotingAddress
+from ..normalize import fold_text
+from ..search import rebuild_search_keys, search_people
+
+class TestPersonSearch(TestCase):
+
+    def setUp(self):
+        voting_address = VotingAddress.objects.create(street_address='12 Elm St')
+        self.person = Person.objects.create(name_last='Núñez', name_first='José', voting_address=voting_address)
+        ContactVoice.objects.create(person=self.person, number='(555) 010-0100')
+        ContactEmail.objects.create(person=self.person, address='Jose@Example.com')
+        Person.objects.create(name_last='Smith', name_first='Jane')
+        rebuild_search_keys()
+
+    def test_fold_text(self):
+        self.assertEqual(fold_text("O'Brien-Núñez"), 'o brien nunez')
+
+    def test_search_key_is_built(self):
+        search_key = PersonSearch.objects.get(person=self.person).search_key
+        self.assertIn(' nunez ', search_key)
+        self.assertIn(' 5550100100 ', search_key)
+        self.assertIn(' jose example com ', search_key)
+
+    def test_prefix_search(self):
+        self.assertEqual(list(search_people(Person.objects.all(), 'nun jo')), [self.person])
+        self.assertEqual(list(search_people(Person.objects.all(), 'elm')), [self.person])
+        self.assertFalse(search_people(Person.objects.all(), 'nunez jane').exists())
@@ -0,0 +1,50 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import ContactVoice, Person
+
+class TestSoftDelete(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.people = [Person.objects.create(name_last=f'Last{indx}') for indx in range(4)]
+
+    def test_soft_delete_and_restore_are_one_update(self):
+        # the voting addresses for the rollups, and the UPDATE
+        with self.assertNumQueries(2):
+            deleted = Person.objects.filter(pk__in=[person.pk for person in self.people[:3]]).soft_delete()
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(list(Person.objects.all()), [self.people[3]])
+        self.assertEqual(Person.all_objects.filter(is_deleted=True, deleted_when__isnull=False).count(), 3)
+
+        self.assertEqual(Person.all_objects.filter(pk=self.people[0].pk).restore(), 1)
+        self.assertIsNone(Person.objects.get(pk=self.people[0].pk).deleted_when)
+
+    def test_deleted_people_are_restored_only_from_all_objects(self):
+        self.assertFalse(hasattr(Person.objects, 'restore'))
+        self.assertFalse(hasattr(Person.objects.all(), 'restore'))
+
+    def test_delete_is_soft_then_hard(self):
+        person = self.people[0]
+        person.delete()
+        self.assertTrue(Person.all_objects.get(pk=person.pk).is_deleted)
+        self.assertEqual(person.deleted_when, Person.all_objects.get(pk=person.pk).deleted_when)
+
+        person.delete()
+        self.assertFalse(Person.all_objects.filter(pk=person.pk).exists())
+
+    def test_purge_deletes_old_soft_deleted_people_in_batches(self):
+        ContactVoice.objects.create(person=self.people[0], number='555-555-0100')
+        Person.objects.filter(pk__in=[person.pk for person in self.people[:3]]).soft_delete()
+        Person.all_objects.filter(pk__in=[person.pk for person in self.people[:2]]).update(deleted_when=timezone.now() - datetime.timedelta(days=400))
+
+        call_command('person_purge_deleted', days=365, batch_size=1, stdout=StringIO())
+
+        self.assertEqual(set(Person.all_objects.values_list('pk', flat=True)), { person.pk for person in self.people[2:] })
+        self.assertFalse(ContactVoice.objects.exists())
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..importers import PersonImporter
+from ..models import BulkRecordAction, Person
+from ..uploads import process_queued_uploads, process_upload, queue_upload, requeue_stale_uploads
+
+def csv_file(van_ids):
+    return SimpleUploadedFile('people.csv', ''.join(['van_id,name_last\n', *[f'{van_id},Last{van_id}\n' for van_id in van_ids]]).encode())
+
+# the worker runs in the test itself, and so sees the rows it commits
+@mock.patch('sdcpeople.uploads.UPLOAD_WORKER', 'queue')
+@mock.patch('sdcpeople.uploads.UPLOAD_BATCH_SIZE', 2)
+class TestUploads(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.user = get_user_model().objects.create(username='uploader')
+
+    def test_queued_upload_is_claimed_once(self):
+        bulk_recordact = queue_upload(csv_file(range(1, 6)), self.user, False)
+        self.assertEqual(bulk_recordact.status, BulkRecordAction.QUEUED)
+
+        self.assertTrue(process_upload(bulk_recordact.pk))
+        self.assertFalse(process_upload(bulk_recordact.pk))
+
+        bulk_recordact.refresh_from_db()
+        self.assertEqual(bulk_recordact.status, BulkRecordAction.COMPLETE)
+        self.assertEqual((bulk_recordact.rows_done, bulk_recordact.rows_failed), (5, 0))
+        self.assertLessEqual(bulk_recordact.started, bulk_recordact.finished)
+        self.assertEqual(Person.objects.count(), 5)
+        self.assertFalse(default_storage.exists(bulk_recordact.source_file))
+
+    def test_failed_upload_reports_the_batches_kept(self):
+        bulk_recordact = queue_upload(csv_file(range(1, 6)), self.user, False)
+
+        with mock.patch.object(PersonImporter, 'write_positions', side_effect=[None, DatabaseError('disk full')]):
+            process_upload(bulk_recordact.pk)
+
+        bulk_recordact.refresh_from_db()
+        self.assertEqual(bulk_recordact.status, BulkRecordAction.FAILED)
+        self.assertEqual(bulk_recordact.rows_done, 2)
+        self.assertIn('disk full', bulk_recordact.message)
+        self.assertIn('first 2 rows', bulk_recordact.message)
+        self.assertEqual(sorted(Person.objects.values_list('vb_voter_id', flat=True)), ['1', '2'])
+        self.assertTrue(default_storage.exists(bulk_recordact.source_file))
+
+    def test_stale_upload_is_queued_again_and_resumed(self):
+        stale = queue_upload(csv_file(range(1, 5)), self.user, False)
+        running = queue_upload(csv_file(range(11, 15)), self.user, False)
+        # a worker stopped after committing the first batch of the stale upload
+        BulkRecordAction.objects.filter(pk=stale.pk).update(status=BulkRecordAction.RUNNING, started=timezone.now() - timedelta(days=1), updated=timezone.now() - timedelta(days=1), rows_done=2)
+        BulkRecordAction.objects.filter(pk=running.pk).update(status=BulkRecordAction.RUNNING, started=timezone.now(), updated=timezone.now())
+
+        self.assertEqual(process_queued_uploads(), 1)
+
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((stale.status, stale.rows_done, stale.rows_started), (BulkRecordAction.COMPLETE, 4, 2))
+        self.assertEqual(running.status, BulkRecordAction.RUNNING)
+        self.assertEqual(sorted(Person.objects.values_list('vb_voter_id', flat=True)), ['3', '4'])
+
+    def test_long_upload_still_making_progress_is_not_queued_again(self):
+        bulk_recordact = queue_upload(csv_file(range(1, 5)), self.user, False)
+        # started long ago, but its worker committed a batch a moment ago
+        BulkRecordAction.objects.filter(pk=bulk_recordact.pk).update(status=BulkRecordAction.RUNNING, started=timezone.now() - timedelta(days=1), updated=timezone.now(), rows_done=2)
+
+        self.assertEqual(requeue_stale_uploads(), 0)
+        self.assertEqual(process_queued_uploads(), 0)
+
+        bulk_recordact.refresh_from_db()
+        self.assertEqual((bulk_recordact.status, bulk_recordact.rows_done), (BulkRecordAction.RUNNING, 2))
+        self.assertFalse(Person.objects.exists())
+
+    def test_throughput_counts_only_the_rows_since_resuming(self):
+        started = timezone.now()
+        bulk_recordact = BulkRecordAction(rows_started=20, rows_done=30, started=started, finished=started + timedelta(seconds=10))
+
+        self.assertEqual(bulk_recordact.throughput, 1.0)
+
+    def test_status(self):
+        self.user.user_permissions.add(*Permission.objects.filter(codename='view_person'))
+        self.client.force_login(self.user)
+        bulk_recordact = queue_upload(csv_file(range(1, 4)), self.user, False)
+        url = reverse('sdcpeople:person-csvupload-status', kwargs={'pk':bulk_recordact.pk})
+
+        self.assertEqual(self.client.get(url).json()['status'], 'Queued')
+
+        process_upload(bulk_recordact.pk)
+        status = self.client.get(url).json()
+
+        self.assertEqual(status['status'], 'Complete')
+        self.assertTrue(status['is_finished'])
+        self.assertEqual((status['rows_done'], status['rows_failed']), (3, 0))
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+from django.views.generic.list import ListView
+
+from ..models import Event, History, Participation, Person, Position
+from ..vistas import CachedPkList, CachedVistaMixin, vista_models
+
+class PersonVistaList(CachedVistaMixin, ListView):
+    model = Person
+
+    def get_queryset(self):
+        self.vistaobj = {'querydict':QueryDict(), 'queryset':super().get_queryset()}
+        return self.get_cached_vista_queryset()
+
+def filter_vista(view):
+    view.vistaobj['querydict'] = QueryDict('order_by=-name_last')
+    return view.vistaobj['queryset'].filter(name_first='Ann').order_by('-name_last')
+
+class TestCachedVista(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='vista')
+        self.people = [Person.objects.create(name_last=f'Last{indx}', name_first=['Ann', 'Bob'][indx % 2]) for indx in range(6)]
+
+    def get_queryset(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = {}
+        view = PersonVistaList()
+        view.setup(request)
+        return view, view.get_queryset()
+
+    def test_pk_list(self):
+        pks = [person.pk for person in reversed(self.people)]
+        people = CachedPkList(Person.objects.all(), pks)
+
+        self.assertEqual(people.count(), 6)
+        self.assertEqual([person.pk for person in people[1:3]], pks[1:3])
+        self.assertEqual([person.pk for person in people.iterator(chunk_size=4)], pks)
+
+    @mock.patch('sdcpeople.vistas.get_vista_queryset', side_effect=filter_vista)
+    def test_results_are_cached_until_data_changes(self, get_vista_queryset):
+        view, queryset = self.get_queryset()
+        expected = list(Person.objects.filter(name_first='Ann').order_by('-name_last').values_list('pk', flat=True))
+
+        with self.assertNumQueries(0):
+            view, queryset = self.get_queryset()
+        self.assertEqual(get_vista_queryset.call_count, 1)
+        self.assertEqual(queryset.pks, expected)
+        self.assertEqual(view.vistaobj['querydict']['order_by'], '-name_last')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Person.objects.create(name_last='Last9', name_first='Ann')
+
+        view, queryset = self.get_queryset()
+        self.assertEqual(get_vista_queryset.call_count, 2)
+        self.assertEqual(len(queryset), 4)
+
+    @mock.patch('sdcpeople.vistas.get_vista_queryset', side_effect=filter_vista)
+    def test_audit_rows_keep_the_results(self, get_vista_queryset):
+        self.get_queryset()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            History.objects.create(modelname='Person', objectid=self.people[0].pk, fieldname='name_last', new_value='Last0')
+
+        with self.assertNumQueries(0):
+            self.get_queryset()
+        self.assertEqual(get_vista_queryset.call_count, 1)
+
+    def test_vista_models(self):
+        models = vista_models(Person, {'fields': {'name_last': {}, 'participation__event': {}, 'positions': {}}})
+
+        self.assertEqual(models, [Event, Participation, Person, Person.positions.through, Position])
@@ -0,0 +1,151 @@
+import csv
+import io
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .importers import DEFAULT_BATCH_SIZE, PersonImporter
+from .models import BulkRecordAction
+
+# 'thread' processes the queue in a background thread of the web process as
+# soon as an upload is queued. 'queue' only queues it, leaving it for the
+# person_process_uploads management command
+UPLOAD_WORKER = getattr(settings, 'SDCPEOPLE_UPLOAD_WORKER', 'thread')
+
+# the rows imported and committed between progress updates
+UPLOAD_BATCH_SIZE = getattr(settings, 'SDCPEOPLE_UPLOAD_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+# seconds without progress after which an upload still running is taken to
+# be left by a worker that stopped, and is queued again. This must be longer
+# than the slowest batch takes
+UPLOAD_TIMEOUT = getattr(settings, 'SDCPEOPLE_UPLOAD_TIMEOUT', 60 * 60)
+
+UPLOAD_DIRECTORY = 'sdcpeople/uploads/'
+
+def read_csv_rows(name):
+    """
+    Yields the rows of a stored CSV file one at a time, so that the file is
+    never held in memory
+    """
+
+    with default_storage.open(name, 'rb') as stored_file:
+        for row in csv.reader(io.TextIOWrapper(stored_file, encoding='utf-8-sig', newline=''), delimiter=","):
+            yield row
+
+def queue_upload(csv_file, user, overwrite):
+    """
+    Saves an uploaded file chunk by chunk to storage and queues it for
+    processing. Returns the BulkRecordAction that tracks the upload
+    """
+
+    name = default_storage.save(UPLOAD_DIRECTORY + csv_file.name, csv_file)
+
+    bulk_recordact = BulkRecordAction.objects.create(
+        name='CSV Upload ',
+        status=BulkRecordAction.QUEUED,
+        source_file=name,
+        overwrite=overwrite,
+        user=user,
+    )
+
+    if UPLOAD_WORKER == 'thread':
+        transaction.on_commit(lambda: threading.Thread(target=process_uploads_in_thread, daemon=True).start())
+
+    return bulk_recordact
+
+def process_uploads_in_thread():
+    try:
+        process_queued_uploads()
+    finally:
+        connection.close()
+
+def process_upload(bulk_recordact_pk):
+    """
+    Claims a queued upload and imports it, recording progress on the
+    BulkRecordAction after each batch. An upload queued again after its
+    worker stopped resumes after the rows already recorded as done. Returns
+    False if another worker already claimed it
+    """
+
+    close_old_connections()
+
+    now = timezone.now()
+    claimed = BulkRecordAction.objects.filter(pk=bulk_recordact_pk, status=BulkRecordAction.QUEUED).update(
+        status=BulkRecordAction.RUNNING,
+        rows_started=F('rows_done'),
+        started=now,
+        updated=now,
+    )
+    if not claimed:
+        return False
+
+    bulk_recordact = BulkRecordAction.objects.get(pk=bulk_recordact_pk)
+
+    # the progress of the batches committed so far
+    progress = {
+        'rows_done': bulk_recordact.rows_done,
+        'rows_failed': bulk_recordact.rows_failed,
+    }
+
+    def record_progress(importer):
+        progress['rows_done'] = importer.rows_done
+        progress['rows_failed'] = bulk_recordact.rows_failed + importer.rows_failed
+        BulkRecordAction.objects.filter(pk=bulk_recordact.pk).update(updated=timezone.now(), **progress)
+
+    try:
+        PersonImporter(
+            user=bulk_recordact.user,
+            overwrite=bulk_recordact.overwrite,
+            batch_size=UPLOAD_BATCH_SIZE,
+            bulk_recordact=bulk_recordact,
+            commit_each_batch=True,
+            on_batch=record_progress,
+            start_row=bulk_recordact.rows_done,
+        ).run(read_csv_rows(bulk_recordact.source_file))
+    except Exception as e:
+        BulkRecordAction.objects.filter(pk=bulk_recordact.pk).update(
+            status=BulkRecordAction.FAILED,
+            finished=timezone.now(),
+            message=f"{e!r}. The first {progress['rows_done']} rows were imported before the failure and are kept.",
+            **progress,
+        )
+    else:
+        BulkRecordAction.objects.filter(pk=bulk_recordact.pk).update(
+            status=BulkRecordAction.COMPLETE,
+            finished=timezone.now(),
+        )
+        default_storage.delete(bulk_recordact.source_file)
+
+    return True
+
+def requeue_stale_uploads():
+    """
+    Queues again the running uploads whose worker has recorded no progress
+    for longer than UPLOAD_TIMEOUT, such as those left by a worker that
+    stopped. Returns the number queued again
+    """
+
+    return BulkRecordAction.objects.filter(
+        status=BulkRecordAction.RUNNING,
+        updated__lt=timezone.now() - timedelta(seconds=UPLOAD_TIMEOUT),
+    ).exclude(source_file='').update(status=BulkRecordAction.QUEUED)
+
+def process_queued_uploads():
+    """
+    Processes every queued upload, oldest first, after queueing again the
+    stale ones. Returns the number processed
+    """
+
+    requeue_stale_uploads()
+
+    processed = 0
+    for bulk_recordact_pk in BulkRecordAction.objects.filter(status=BulkRecordAction.QUEUED).order_by('when').values_list('pk', flat=True):
+        if process_upload(bulk_recordact_pk):
+            processed = processed + 1
+
+    return processed
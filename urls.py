@@ -13,8 +13,14 @@ urlpatterns = [
     path('person/<int:pk>/delete/', views.PersonDelete.as_view(), name='person-delete'),
     path('person/list/', views.PersonList.as_view(), name='person-list'),
     path('person/list/by/<int:by_value>/<by_parameter>/', views.PersonList.as_view(), name='person-list-by'),
+    path('person/search/', views.PersonSearchJson.as_view(), name='person-search'),
+    path('person/contact-lookup/', views.PersonContactLookupJson.as_view(), name='person-contact-lookup'),
+    path('person/form-choices/', views.PersonFormChoicesJson.as_view(), name='person-form-choices'),
     path('person/csv/', views.PersonCSV.as_view(), name='person-csv'),
+    path('api/person/', views.PersonNdjson.as_view(), name='person-api'),
     path('person/csvupload/', views.PersonCSVUpload.as_view(), name="person-csvupload"),
+    path('person/csvupload/<int:pk>/status/', views.BulkRecordActionStatus.as_view(), name="person-csvupload-status"),
+    path('person/bulk-action/', views.PersonBulkAction.as_view(), name='person-bulk-action'),
     
     path('person/<int:pk>/close/', views.PersonClose.as_view(), name="person-close"),
 
@@ -31,17 +37,22 @@ urlpatterns = [
     path('event/create/', views.EventCreate.as_view(), name='event-create'),
     path('event/<int:pk>/update/', views.EventUpdate.as_view(), name='event-update'),
     path('event/<int:pk>/detail/', views.EventDetail.as_view(), name='event-detail'),
+    path('event/<int:pk>/quorum/', views.EventQuorum.as_view(), name='event-quorum'),
     path('event/<int:pk>/delete/', views.EventDelete.as_view(), name='event-delete'),
     path('event/list/', views.EventList.as_view(), name='event-list'),
+    path('api/event/', views.EventNdjson.as_view(), name='event-api'),
     path('event/<int:pk>/close/', views.EventClose.as_view(), name="event-close"),
 
     path('savedlist/', RedirectView.as_view(url=reverse_lazy('sdcpeople:savedlist-list'))),
     path('savedlist/create/', views.SavedListCreate.as_view(), name='savedlist-create'),
-    path('savedlist/create/', views.SavedListCreate.as_view(), kwargs={'from-person-list':True}, name='savedlist-from-person-list'), 
+    path('savedlist/create/combined/', views.SavedListCombine.as_view(), name='savedlist-combine'),
+    path('savedlist/create/from-person-list/', views.SavedListSnapshot.as_view(), name='savedlist-from-person-list'),
     path('savedlist/<int:pk>/update/', views.SavedListUpdate.as_view(), name='savedlist-update'),
     path('savedlist/<int:pk>/detail/', views.SavedListDetail.as_view(), name='savedlist-detail'),
+    path('savedlist/<int:pk>/csv/', views.SavedListPeopleCSV.as_view(), name='savedlist-people-csv'),
     path('savedlist/<int:pk>/delete/', views.SavedListDelete.as_view(), name='savedlist-delete'),
     path('savedlist/list/', views.SavedListList.as_view(), name='savedlist-list'),
+    path('api/savedlist/', views.SavedListNdjson.as_view(), name='savedlist-api'),
     path('savedlist/<int:pk>/close/', views.SavedListClose.as_view(), name="savedlist-close"),
 
 
@@ -64,6 +75,7 @@ urlpatterns = [
     path('communicationevent/list/', views.CommunicationEventList.as_view(), name='communicationevent-list'),
     path('communicationevent/<int:pk>/close/', views.CommunicationEventClose.as_view(), name="communicationevent-close"),
     path('communicationevent/csv/', views.CommunicationEventCSV.as_view(), name='communicationevent-csv'),
+    path('api/communicationevent/', views.CommunicationEventNdjson.as_view(), name='communicationevent-api'),
 
     path('locationcity/', RedirectView.as_view(url=reverse_lazy('sdcpeople:locationcity-list'))),
     path('locationcity/create/', views.LocationCityCreate.as_view(), name='locationcity-create'),
@@ -123,6 +135,9 @@ urlpatterns = [
     path('participation/list/', views.ParticipationList.as_view(), name='participation-list'),
     path('participation/<int:pk>/close/', views.ParticipationClose.as_view(), name="participation-close"),
 
+    path('district/rollup/', views.DistrictRollupList.as_view(), name='districtrollup-list'),
+    path('district/rollup/json/', views.DistrictRollupJson.as_view(), name='districtrollup-json'),
+
     path('votingaddress/', RedirectView.as_view(url=reverse_lazy('sdcpeople:votingaddress-list'))),
     path('votingaddress/create/', views.VotingAddressCreate.as_view(), name='votingaddress-create'),
     path('votingaddress/create/_/', views.VotingAddressCreate.as_view(), {'popup':True }, name='votingaddress-create-popup'),
@@ -131,5 +146,6 @@ urlpatterns = [
     path('votingaddress/<int:pk>/detail/', views.VotingAddressDetail.as_view(), name='votingaddress-detail'),
     path('votingaddress/<int:pk>/delete/', views.VotingAddressDelete.as_view(), name='votingaddress-delete'),
     path('votingaddress/list/', views.VotingAddressList.as_view(), name='votingaddress-list'),
+    path('api/votingaddress/', views.VotingAddressNdjson.as_view(), name='votingaddress-api'),
     path('votingaddress/<int:pk>/close/', views.VotingAddressClose.as_view(), name="votingaddress-close"),
 ]
@@ -6,20 +6,28 @@ from urllib.parse import urlencode
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.core.exceptions import FieldError, ObjectDoesNotExist
-from django.http import QueryDict
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, QueryDict
 from django.http.response import HttpResponse, HttpResponseRedirect
 from django.shortcuts import redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils.cache import patch_cache_control
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import (CreateView, DeleteView, FormView,
                                        UpdateView,)
 from django.views.generic.list import ListView
-from tougshire_vistas.models import Vista
 from tougshire_vistas.views import (delete_vista,
-                                    get_latest_vista, get_vista_queryset,
+                                    get_latest_vista,
                                     make_vista, retrieve_vista,
-                                    vista_context_data, make_vista_fields)
+                                    vista_context_data)
 
+from .api import NdjsonApiMixin, person_api_fields
+from .audit import AuditLog
+from .bulkactions import run_bulk_person_action
+from .exports import person_export_rows, stream_csv
 from .forms import (BulkCommunicationForm, CommunicationEventForm, EventForm, 
                     EventParticipationFormset, 
                     LocationBoroughForm, LocationCityForm, LocationCongressForm,
@@ -27,17 +35,30 @@ from .forms import (BulkCommunicationForm, CommunicationEventForm, EventForm,
                     LocationStateSenateForm, 
                     ParticipationForm, PersonListMembershipFormset, 
                     #PersonCommunicationEventFormset, PersonCommunicationEventFormset, 
-                    SavedListForm, SavedListListMembershipFormset, PersonCSVUploadForm, PersonContactEmailFormset,
+                    PERSON_FORM_CHOICE_LISTS, person_form_choices_key,
+                    SavedListCombineForm, SavedListForm, SavedListListMembershipFormset, PersonBulkActionForm, PersonCSVUploadForm, PersonContactEmailFormset,
                     PersonContactTextFormset, PersonContactVoiceFormset,
                     #PersonDuesPaymentFormset, 
                     PersonForm, PersonLinkFormset,
                     # PersonMembershipApplicationFormset, 
                     #PersonParticipationFormset,
                     PersonSubMembershipFormset, SubCommitteeForm, SubCommitteeSubMembershipFormset, VotingAddressForm)
-from .models import (BulkCommunication, BulkRecordAction, CommunicationEvent, ContactText, ContactVoice, Event, History, ListMembership, LocationBorough,LocationCity,
+from .formsets import bulk_save_formset
+from .lists import PEOPLE_SOURCES, add_people_to_list, combine_people, insert_list_memberships
+from .lookups import lookup_objects
+from .metadata import field_columns, field_label, field_labels, vista_fields
+from .models import (BulkCommunication, BulkRecordAction, CommunicationEvent, ContactEmail, ContactText, ContactVoice, DistrictRollup, Event, ListMembership, LocationBorough,LocationCity,
                      LocationCongress, LocationMagistrate, LocationPrecinct,
-                     LocationStateHouse, LocationStateSenate, MembershipStatus, Participation, SavedList,
+                     LocationStateHouse, LocationStateSenate, Participation, SavedList,
                      Person, PersonUser, Position, RecordAction, RecordactPerson, SubCommittee, SubMembership, VotingAddress)
+from .normalize import email_key, phone_key
+from .pagination import KeysetPaginationMixin
+from .projections import attach_person_rows, person_projection_queryset
+from .quorum import event_quorum
+from .rollups import rollup_data
+from .search import search_people, update_search_keys
+from .uploads import queue_upload
+from .vistas import CachedVistaMixin
 
 
 def create_recordact(action_details, recordactmodel_class, object, user, bulk_recordact):
@@ -56,98 +77,93 @@ def create_recordact(action_details, recordactmodel_class, object, user, bulk_re
 
     return recordact_model
 
-def update_history(form, modelname, object, user):
-    print ('tp235ki52', form)
-    for fieldname in form.changed_data:
-        try:
-            old_value=str(form.initial[fieldname]),
-        except KeyError:
-            old_value=None
-
-        history = History.objects.create(
-            user=user,
-            modelname=modelname,
-            objectid=object.pk,
-            fieldname=fieldname,
-            old_value=old_value,
-            new_value=str(form.cleaned_data[fieldname])
-        )
+class PersonFormsetsMixin:
+    """
+    Builds the inline formsets of the person edit page once per request, for
+    both the page and the save. The formsets have no extra forms; the page
+    adds rows from each formset's empty_form.
+
+    A POST is saved in one transaction with the person row locked, once the
+    person form and every formset are valid: the person is written once,
+    each formset with bulk queries, and the history and record action
+    before the commit
+    """
+
+    formset_classes = {
+        'contacttexts': PersonContactTextFormset,
+        'contactvoices': PersonContactVoiceFormset,
+        'contactemails': PersonContactEmailFormset,
+        'submemberships': PersonSubMembershipFormset,
+        'listmemberships': PersonListMembershipFormset,
+        'links': PersonLinkFormset,
+    }
+
+    recordact_details = 'Person Updated. '
 
-        history.save()
+    def post(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().post(request, *args, **kwargs)
 
-class PersonCreate(PermissionRequiredMixin, CreateView):
-    permission_required = 'sdcpeople.add_person'
-    model = Person
-    form_class = PersonForm
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'POST' and transaction.get_connection().in_atomic_block:
+            # concurrent edits of one person wait for each other
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def get_formsets(self):
+        if not hasattr(self, 'formsets'):
+            data = self.request.POST if self.request.method == 'POST' else None
+            instance = self.object if self.object is not None else Person()
+            self.formsets = { formset_name: formset_class(data, instance=instance) for formset_name, formset_class in self.formset_classes.items() }
+        return self.formsets
 
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
 
-        if self.request.POST:
-            context_data['contacttexts'] = PersonContactTextFormset(self.request.POST)
-            context_data['contactvoices'] = PersonContactVoiceFormset(self.request.POST)
-            context_data['contactemails'] = PersonContactEmailFormset(self.request.POST)
-            # context_data['membershipapplications'] = PersonMembershipApplicationFormset(self.request.POST)
-            context_data['submemberships'] = PersonSubMembershipFormset(self.request.POST )
-            # context_data['duespayments'] = PersonDuesPaymentFormset(self.request.POST)
-            context_data['links'] = PersonLinkFormset(self.request.POST)
-            # context_data['participations'] = PersonParticipationFormset(self.request.POST)
-            # context_data['communications'] = PersonCommunicationEventFormset(self.request.POST)
-
-        else:
-            context_data['contacttexts'] = PersonContactTextFormset()
-            context_data['contactvoices'] = PersonContactVoiceFormset()
-            context_data['contactemails'] = PersonContactEmailFormset()
-            # context_data['membershipapplications'] = PersonMembershipApplicationFormset()
-            context_data['submemberships'] = PersonSubMembershipFormset()
-            # context_data['duespayments'] = PersonDuesPaymentFormset()
-            context_data['links'] = PersonLinkFormset()
-            # context_data['participations'] = PersonParticipationFormset()
-            # context_data['communications'] = PersonCommunicationEventFormset()
+        context_data.update(self.get_formsets())
+        context_data['form_choices_url'] = reverse('sdcpeople:person-form-choices') + '?' + urlencode({'v': person_form_choices_key()})
 
         return context_data
 
     def form_valid(self, form):
 
-        response = super().form_valid(form)
-
-        self.object = form.save()
+        formset_data = self.get_formsets()
+        if not all([formset.is_valid() for formset in formset_data.values()]):
+            messages.add_message(self.request, messages.WARNING, 'There was a problem with ' + ', '.join(formset_name for formset_name, formset in formset_data.items() if not formset.is_valid()) + ', nothing was saved')
+            return self.form_invalid(form)
 
+        audit = AuditLog(self.request.user).add_form(form, 'Person')
 
-        formset_data = {
-            'contacttexts':PersonContactTextFormset( self.request.POST, instance=self.object ),
-            'contactvoices':PersonContactVoiceFormset( self.request.POST, instance=self.object ),
-            'contactemails':PersonContactEmailFormset( self.request.POST, instance=self.object ),
-            # 'membershipapplications':PersonMembershipApplicationFormset( self.request.POST, instance=self.object ),
-            'submemberships':PersonSubMembershipFormset(self.request.POST, instance=self.object ),
-            # 'duespayments':PersonDuesPaymentFormset( self.request.POST, instance=self.object ),
-            'links':PersonLinkFormset( self.request.POST, instance=self.object ),
-            # 'participations':PersonParticipationFormset( self.request.POST, instance=self.object ),
-            # 'communications':PersonCommunicationEventFormset( self.request.POST, instance=self.object ),
-
-        }
-        recordact_details='Created. '
+        recordact_details = self.recordact_details
         for field in form.changed_data:
             recordact_details = recordact_details + field  + ': ' + str(form.cleaned_data[field]) + ';  '
 
-        for formset_name in formset_data.keys():
+        self.object = form.save()
 
-            if(formset_data[formset_name]).is_valid():
-                formset_data[formset_name].save()
-            else:
-                messages.add_message(self.request, messages.WARNING, 'There was a problem with ' + formset_name + ', ' + formset_name + ' was not saved')
-                print('error saving ' + formset_name + ': ' )
-                print(formset_data[formset_name].errors)
+        for formset_name, formset in formset_data.items():
+            formset.instance = self.object
+            audit.add_formset(formset)
+            if bulk_save_formset(formset):
+                recordact_details = recordact_details + formset_name + ' changed;  '
 
-        #     if formset_data[formset_name].has_changed:
-        #         for form in formset_data[formset_name].changed_objects:
-        #             for field in form.changed_data:
-        #                 recordact_details = recordact_details + formset_name + '.' + field  + ': ' + str(form.cleaned_data[field]) + ';  '
+        person_pk = self.object.pk
+        transaction.on_commit(lambda: update_search_keys([person_pk]))
 
-        # create_recordact(recordact_details,RecordactPerson,self.object,self.request.user,None)
+        audit.save()
+        RecordAction.objects.bulk_record(RecordactPerson, [(self.object, recordact_details)], self.request.user, None)
 
-        return response
+        return HttpResponseRedirect(self.get_success_url())
+
+class PersonCreate(PermissionRequiredMixin, PersonFormsetsMixin, CreateView):
+    permission_required = 'sdcpeople.add_person'
+    model = Person
+    form_class = PersonForm
+
+    formset_classes = { formset_name: formset_class for formset_name, formset_class in PersonFormsetsMixin.formset_classes.items() if formset_name != 'listmemberships' }
+
+    recordact_details = 'Created. '
 
     def get_success_url(self):
 
@@ -156,7 +172,7 @@ class PersonCreate(PermissionRequiredMixin, CreateView):
         else:
             return reverse_lazy('sdcpeople:person-detail', kwargs={'pk': self.object.pk})
 
-class PersonUpdate(PermissionRequiredMixin, UpdateView):
+class PersonUpdate(PermissionRequiredMixin, PersonFormsetsMixin, UpdateView):
     permission_required = 'sdcpeople.change_person'
     model = Person
     form_class = PersonForm
@@ -164,84 +180,6 @@ class PersonUpdate(PermissionRequiredMixin, UpdateView):
     def has_permission(self):
         return super().has_permission() or PersonUser.objects.filter(user=self.request.user, person=self.get_object()).exists()
 
-    def get_context_data(self, **kwargs):
-        context_data = super().get_context_data(**kwargs)
-
-        if self.request.POST:
-            context_data['contacttexts'] = PersonContactTextFormset(self.request.POST, instance=self.object )
-            context_data['contactvoices'] = PersonContactVoiceFormset(self.request.POST, instance=self.object )
-            context_data['contactemails'] = PersonContactEmailFormset(self.request.POST, instance=self.object )
-#            context_data['membershipapplications'] = PersonMembershipApplicationFormset(self.request.POST, instance=self.object )
-            context_data['submemberships'] = PersonSubMembershipFormset(self.request.POST, instance=self.object )
-            context_data['listmemberships'] = PersonListMembershipFormset(self.request.POST, instance=self.object )
-            # context_data['duespayments'] = PersonDuesPaymentFormset(self.request.POST, instance=self.object )
-            context_data['links'] = PersonLinkFormset(self.request.POST, instance=self.object )
-            # context_data['participations]'] = PersonParticipationFormset(self.request.POST, instance=self.object )
-            # context_data['communications]'] = PersonCommunicationEventFormset(self.request.POST, instance=self.object )
-
-        else:
-            context_data['contacttexts'] = PersonContactTextFormset( instance=self.object )
-            context_data['contactvoices'] = PersonContactVoiceFormset( instance=self.object )
-            context_data['contactemails'] = PersonContactEmailFormset( instance=self.object )
-            # context_data['membershipapplications'] = PersonMembershipApplicationFormset( instance=self.object )
-            context_data['submemberships'] = PersonSubMembershipFormset( instance=self.object )
-            context_data['listmemberships'] = PersonListMembershipFormset( instance=self.object )
-            # context_data['duespayments'] = PersonDuesPaymentFormset( instance=self.object )
-            context_data['links'] = PersonLinkFormset( instance=self.object )
-            # context_data['participations'] = PersonParticipationFormset( instance=self.object )
-            # context_data['communications'] = PersonCommunicationEventFormset( instance=self.object )
-
-        return context_data
-
-    def form_valid(self, form):
-
-        update_history(form, 'Person', form.instance, self.request.user)
-
-        response = super().form_valid(form)
-
-        self.object = form.save()
-
-        formset_data = {
-            'contacttexts':PersonContactTextFormset( self.request.POST, instance=self.object ),
-            'contactvoices':PersonContactVoiceFormset( self.request.POST, instance=self.object ),
-            'contactemails':PersonContactEmailFormset( self.request.POST, instance=self.object ),
-            # 'membershipapplications':PersonMembershipApplicationFormset( self.request.POST, instance=self.object ),
-            'submemberships':PersonSubMembershipFormset(self.request.POST, instance=self.object ),
-            'listmemberships':PersonListMembershipFormset(self.request.POST, instance=self.object ),
-            # 'duespayments':PersonDuesPaymentFormset( self.request.POST, instance=self.object ),
-            'links':PersonLinkFormset( self.request.POST, instance=self.object ),
-            # 'participations':PersonParticipationFormset( self.request.POST, instance=self.object ),
-            # 'communications':PersonCommunicationEventFormset( self.request.POST, instance=self.object ),
-
-        }
-
-        recordact_details='Person Updated. '
-        for field in form.changed_data:
-            recordact_details = recordact_details + field  + ': ' + str(form.cleaned_data[field]) + ';  '
-
-
-        for formset_name in formset_data.keys():
-
-            if(formset_data[formset_name]).is_valid():
-                formset_data[formset_name].save()
-            else:
-                messages.add_message(self.request, messages.WARNING, 'There was a problem with ' + formset_name + ', ' + formset_name + ' was not saved')
-                print('error saving ' + formset_name + ': ')
-                print('tp235kj03', formset_data[formset_name])
-
-#                print(formset_data[formset_name].errors)
-                for form in formset_data[formset_name]:
-                    print(form.errors)
-
-            # if formset_data[formset_name].has_changed():
-            #     for form in formset_data[formset_name].changed_objects:
-            #         for field in form.cleaned_data:
-            #             recordact_details = recordact_details + formset_name + '.' + field  + ': ' + str(form.cleaned_data[field]) + ';  '
-
-        # create_recordact(recordact_details,RecordactPerson,self.object,self.request.user, None)
-
-        return response
-
     def get_success_url(self):
         if 'popup' in self.kwargs:
             return reverse_lazy('sdcpeople:person-close', kwargs={'pk': self.object.pk})
@@ -255,8 +193,8 @@ class PersonDetail(PermissionRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['person_labels'] = { field.name: field.verbose_name.title() for field in Person._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
-        context_data['voting_address_labels'] = { field.name: field.verbose_name.title() for field in VotingAddress._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['person_labels'] = field_labels(Person)
+        context_data['voting_address_labels'] = field_labels(VotingAddress)
 
         context_data['is_this_user'] = PersonUser.objects.filter(user=self.request.user, person=self.get_object()).exists()
 
@@ -272,13 +210,13 @@ class PersonDelete(PermissionRequiredMixin, DeleteView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['person_labels'] = { field.name: field.verbose_name.title() for field in Person._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
-        context_data['voting_address_labels'] = { field.name: field.verbose_name.title() for field in VotingAddress._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['person_labels'] = field_labels(Person)
+        context_data['voting_address_labels'] = field_labels(VotingAddress)
 
         return context_data
 
 
-class PersonList(PermissionRequiredMixin, ListView):
+class PersonList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_person'
     model = Person
     paginate_by = 30
@@ -290,7 +228,7 @@ class PersonList(PermissionRequiredMixin, ListView):
             'fields':[],
         }
 
-        self.vista_settings['fields'] = make_vista_fields(Person, field_names=[
+        self.vista_settings['fields'] = vista_fields(Person, [
             'name_prefix',
             'name_last',
             'name_first',
@@ -308,11 +246,11 @@ class PersonList(PermissionRequiredMixin, ListView):
             'is_deleted',
             'listmembership__savedlist',
 
-        ])
-
-        self.vista_settings['fields']['participation__event']['label']="Participation in Event"
-        self.vista_settings['fields']['recordactperson__recordact__bulk_recordact']['label']="Bulk Record Action"
-        self.vista_settings['fields']['listmembership__savedlist']['label']="Saved List"
+        ], labels={
+            'participation__event': "Participation in Event",
+            'recordactperson__recordact__bulk_recordact': "Bulk Record Action",
+            'listmembership__savedlist': "Saved List",
+        })
 
         if 'by_value' in kwargs and 'by_parameter' in kwargs:
 
@@ -344,154 +282,164 @@ class PersonList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        self.search = self.request.GET.get('search', '').strip()
+
+        queryset = self.get_cached_vista_queryset()
+
+        if self.search:
+            queryset = search_people(queryset, self.search)
+
+        return queryset
+
+    def vista_cache_enabled(self):
+        # search results are ranked per search, so they are not kept
+        return not self.search and super().vista_cache_enabled()
 
     def get_paginate_by(self, queryset):
 
         if 'paginate_by' in self.vistaobj['querydict'] and self.vistaobj['querydict']['paginate_by']:
             return self.vistaobj['querydict']['paginate_by']
 
+    def paginate_queryset(self, queryset, page_size):
+        return super().paginate_queryset(person_projection_queryset(queryset), page_size)
+
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
 
+        if not context_data['is_paginated']:
+            context_data['object_list'] = person_projection_queryset(context_data['object_list'])
+        context_data['object_list'] = attach_person_rows(context_data['object_list'])
+
         vista_data = vista_context_data(self.vista_settings, self.vistaobj['querydict'])
 
 
         context_data = {**context_data, **vista_data}
         context_data['vista_default'] = dict(self.vista_defaults)
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='sdcpeople.person').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('sdcpeople.person') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
 
-        context_data['count'] = self.object_list.count()
+        context_data['search'] = self.search
+
+        if self.request.user.has_perm('sdcpeople.change_person'):
+            context_data['bulk_action_form'] = PersonBulkActionForm(user=self.request.user, initial={'search': self.search})
+
+        if self.kwargs.get('by_parameter') == 'recordactperson__recordact__bulk_recordact':
+            context_data['bulk_recordact'] = BulkRecordAction.objects.filter(pk=self.kwargs.get('by_value')).first()
+
+        context_data['count'] = self.get_result_count(context_data)
 
         return context_data
 
-    
-class PersonCSV(PersonList):
+class PersonSearchJson(PermissionRequiredMixin, ListView):
+    permission_required = 'sdcpeople.view_person'
+    model = Person
+    max_results = 20
 
     def get(self, request, *args, **kwargs):
-        self.object_list = self.get_queryset()
-        context = self.get_context_data()
-        response = HttpResponse(
-            content_type='text/csv',
-            headers={'Content-Disposition': 'attachment; filename="sdcvirginia_people.csv"'},
-        )
+        text = request.GET.get('q', '').strip()
+        people = []
+        if text:
+            people = search_people(Person.objects.all(), text).select_related('membership_status')[:self.max_results]
+
+        return JsonResponse({
+            'results': [
+                {
+                    'pk': person.pk,
+                    'name': str(person),
+                    'membership_status': str(person.membership_status or ''),
+                    'url': reverse('sdcpeople:person-detail', kwargs={'pk':person.pk}),
+                }
+                for person in people
+            ]
+        })
 
-        writer = csv.writer(response)
-        vista_data = vista_context_data(self.vista_settings, self.vistaobj['querydict'])
+class PersonContactLookupJson(PermissionRequiredMixin, ListView):
+    """
+    The people with a phone number (?phone=) or email address (?email=),
+    such as for an incoming call or text. The number is normalized the way
+    contacts are, so the lookup is an index seek on the contact keys
+    """
 
-        row=[]
-
-        if not 'show_columns' in vista_data or 'name_last' in vista_data['show_columns']:
-            row.append(context["labels"]["name_last"])
-        if not 'show_columns' in vista_data or 'name_first' in vista_data['show_columns']:
-            row.append(context["labels"]["name_first"])
-        if not 'show_columns' in vista_data or 'is_quorum' in vista_data['show_columns']:
-            row.append("Quorum")
-        if not 'show_columns' in vista_data or 'membership_status' in vista_data['show_columns']:
-            row.append(context["labels"]["membership_status"])
-        if not 'show_columns' in vista_data or 'positions' in vista_data['show_columns']:
-            row.append("Positions")
-        if not 'show_columns' in vista_data or 'submemberships' in vista_data['show_columns']:
-            row.append("SubCommittees")
-        if not 'show_columns' in vista_data or 'contactvoice' in vista_data['show_columns']:
-            row.append("Voice")
-        if not 'show_columns' in vista_data or 'contacttext' in vista_data['show_columns']:
-            row.append("Text")
-        if not 'show_columns' in vista_data or 'contactemail' in vista_data['show_columns']:
-            row.append("Email")
-        if not 'show_columns' in vista_data or 'voting_address' in vista_data['show_columns']:
-            row.append("voting address")
-        if not 'show_columns' in vista_data or 'voting_address.locationcity' in vista_data['show_columns']:
-            row.append("City")
-        if not 'show_columns' in vista_data or 'voting_address.locationcongress' in vista_data['show_columns']:
-            row.append("Congress")
-        if not 'show_columns' in vista_data or 'voting_address.locationstatesenate' in vista_data['show_columns']:
-            row.append("Senate")
-        if not 'show_columns' in vista_data or 'voting_address.locationstatehouse' in vista_data['show_columns']:
-            row.append("house")
-        if not 'show_columns' in vista_data or 'voting_address.locationmagistrate' in vista_data['show_columns']:
-            row.append("Magistrate")
-        if not 'show_columns' in vista_data or 'voting_address.locationborough' in vista_data['show_columns']:
-            row.append("Borough")
-        if not 'show_columns' in vista_data or 'voting_address.locationprecinct' in vista_data['show_columns']:
-            row.append("precinct")
+    permission_required = 'sdcpeople.view_person'
+    model = Person
+    max_results = 20
 
-        writer.writerow(row)
+    def get(self, request, *args, **kwargs):
+        number_key = phone_key(request.GET.get('phone', ''))
+        address_key = email_key(request.GET.get('email', ''))
+
+        matches = Q(pk__in=[])
+        if number_key:
+            matches = matches | Q(pk__in=ContactVoice.objects.filter(number_key=number_key).values('person_id'))
+            matches = matches | Q(pk__in=ContactText.objects.filter(number_key=number_key).values('person_id'))
+        if address_key:
+            matches = matches | Q(pk__in=ContactEmail.objects.filter(address_key=address_key).values('person_id'))
+
+        people = []
+        if number_key or address_key:
+            people = Person.objects.filter(matches).select_related('membership_status')[:self.max_results]
+
+        return JsonResponse({
+            'phone': number_key,
+            'email': address_key,
+            'results': [
+                {
+                    'pk': person.pk,
+                    'name': str(person),
+                    'membership_status': str(person.membership_status or ''),
+                    'url': reverse('sdcpeople:person-detail', kwargs={'pk':person.pk}),
+                }
+                for person in people
+            ]
+        })
 
-        for object in self.object_list:
+class PersonFormChoicesJson(PermissionRequiredMixin, ListView):
+    """
+    The choices of the JsonChoiceSelects on the person edit page. The page
+    asks for them with the current choices key, so the browser may keep the
+    response until a choice changes
+    """
 
-            row=[]
+    permission_required = 'sdcpeople.view_person'
+    model = Person
+    browser_cache_seconds = 86400
 
-            if not 'show_columns' in vista_data or 'name_last' in vista_data['show_columns']:
-                row.append(object.name_last)
-            if not 'show_columns' in vista_data or 'name_first' in vista_data['show_columns']:
-                row.append(object.name_first)
-            if not 'show_columns' in vista_data or 'is_quorum' in vista_data['show_columns']:
-                row.append(object.membership_status.is_quorum)
-            if not 'show_columns' in vista_data or 'membership_status' in vista_data['show_columns']:
-                row.append(object.membership_status)
-            if not 'show_columns' in vista_data or 'positions' in vista_data['show_columns']:
-                positions=''
-                if object.positions.all().exists():
-                    for position in object.positions.all():
-                        positions = positions + position.title + ', '
-                    positions = positions[:-2]
-                row.append(positions)
-            if not 'show_columns' in vista_data or 'submemberships' in vista_data['show_columns']:
-                submemberships=''
-                if object.submembership_set.all().exists():
-                    for submembership in object.submembership_set.all():
-                        submemberships = submemberships + str(submembership.subcommittee) + ', '
-                    submemberships=submemberships[:-2]
-                row.append(submemberships)
-            if not 'show_columns' in vista_data or 'contactvoice' in vista_data['show_columns']:
-                contactvoices=''
-                if object.contactvoice_set.all().exists():
-                    for contactvoice in object.contactvoice_set.all():
-                        contactvoices = contactvoices + str(contactvoice.number) + ', '
-                    contactvoices=contactvoices[:-2]
-                row.append(contactvoices)
-            if not 'show_columns' in vista_data or 'contacttext' in vista_data['show_columns']:
-                contacttexts=''
-                if object.contacttext_set.all().exists():
-                    for contacttext in object.contacttext_set.all():
-                        contacttexts = contacttexts + str(contacttext.number) + ', '
-                    contacttexts=contacttexts[:-2]
-                row.append(contacttexts)
-            if not 'show_columns' in vista_data or 'contacemail' in vista_data['show_columns']:
-                contactemails=''
-                if object.contactemail_set.all().exists():
-                    for contactemail in object.contactemail_set.all():
-                        contactemails = contactemails + str(contactemail.address) + ', '
-                    contactemails=contactemails[:-2]
-                row.append(contactemails)
-            if object.voting_address is not None:
-                if not 'show_columns' in vista_data or 'voting_address' in vista_data['show_columns']:
-                    row.append(str(object.voting_address).replace("\n", " "))
-                if not 'show_columns' in vista_data or 'voting_address.locationcity' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationcity)
-                if not 'show_columns' in vista_data or 'voting_address.locationcongress' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationcongress)
-                if not 'show_columns' in vista_data or 'voting_address.locationstatesenate' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationstatesenate)
-                if not 'show_columns' in vista_data or 'voting_address.locationstatehouse' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationstatehouse)
-                if not 'show_columns' in vista_data or 'voting_address.locationmagistrate' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationmagistrate)
-                if not 'show_columns' in vista_data or 'voting_address.locationborough' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationborough)
-                if not 'show_columns' in vista_data or 'voting_address.locationprecinct' in vista_data['show_columns']:
-                    row.append(object.voting_address.locationprecinct)
+    def get(self, request, *args, **kwargs):
+        key = person_form_choices_key()
 
-            writer.writerow(row)
+        choices = cache.get(key)
+        if choices is None:
+            choices = { choice_list: [[object.pk, str(object)] for object in get_objects()] for choice_list, get_objects in PERSON_FORM_CHOICE_LISTS.items() }
+            cache.set(key, choices, None)
 
+        response = JsonResponse(choices)
+        if request.GET.get('v') == key:
+            patch_cache_control(response, private=True, max_age=self.browser_cache_seconds)
         return response
 
+class PersonCSV(PersonList):
+
+    def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+
+        vista_data = vista_context_data(self.vista_settings, self.vistaobj['querydict'])
+        labels = { key: vista_data['labels'][key] for key in ['name_last', 'name_first', 'membership_status'] if key in vista_data.get('labels', {}) }
+
+        return stream_csv(
+            person_export_rows(self.object_list, vista_data.get('show_columns'), labels),
+            'sdcvirginia_people.csv'
+        )
+
+
+class PersonNdjson(NdjsonApiMixin, PersonList):
+    api_default_fields = ['id', 'name_last', 'name_first', 'membership_status']
+
+    def get_api_fields(self):
+        return person_api_fields(Person)
 
 class PersonClose(PermissionRequiredMixin, DetailView):
     permission_required = 'sdcpeople.view_person'
@@ -519,7 +467,7 @@ class EventCreate(PermissionRequiredMixin, CreateView):
 
         response = super().form_valid(form)
 
-        update_history(form, 'Event', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'Event').save_on_commit()
 
         self.object = form.save()
 
@@ -567,7 +515,7 @@ class EventUpdate(PermissionRequiredMixin, UpdateView):
 
     def form_valid(self, form):
 
-        update_history(form, 'Event', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'Event').save_on_commit()
 
         response = super().form_valid(form)
 
@@ -603,9 +551,17 @@ class EventDetail(PermissionRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        context_data['event_labels'] = { field.name: field.verbose_name.title() for field in SubCommittee._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['event_labels'] = field_labels(Event)
         return context_data
 
+class EventQuorum(PermissionRequiredMixin, DetailView):
+    permission_required = 'sdcpeople.view_event'
+    model = Event
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return JsonResponse(event_quorum(self.object.pk))
+
 class EventDelete(PermissionRequiredMixin, DeleteView):
     permission_required = 'sdcpeople.delete_event'
     model = Event
@@ -613,7 +569,7 @@ class EventDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy('sdcpeople:event-list')
 
 
-class EventList(PermissionRequiredMixin, ListView):
+class EventList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_event'
     model = Event
     paginate_by = 30
@@ -625,7 +581,7 @@ class EventList(PermissionRequiredMixin, ListView):
             'fields':[],
         }
 
-        self.vista_settings['fields'] = make_vista_fields(Event, field_names=[
+        self.vista_settings['fields'] = vista_fields(Event, [
             'name',
             'event_type',
             'when',
@@ -651,7 +607,7 @@ class EventList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        return self.get_cached_vista_queryset()
 
     def get_paginate_by(self, queryset):
 
@@ -666,12 +622,12 @@ class EventList(PermissionRequiredMixin, ListView):
 
         context_data = {**context_data, **vista_data}
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='libtekin.item').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('libtekin.item') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
 
-        context_data['count'] = self.object_list.count()
+        context_data['count'] = self.get_result_count(context_data)
 
         return context_data
 
@@ -796,6 +752,9 @@ class EventCSV(EventList):
         return response
 
 
+class EventNdjson(NdjsonApiMixin, EventList):
+    api_default_fields = ['id', 'name', 'event_type', 'when']
+
 class EventClose(PermissionRequiredMixin, DetailView):
     permission_required = 'sdcpeople.view_event'
     model = Event
@@ -810,22 +769,11 @@ class SavedListCreate(PermissionRequiredMixin, CreateView):
 
         context_data = super().get_context_data(**kwargs)
 
-        if 'from-person-list' in self.kwargs and self.kwargs['from-person-list']:
-            self.person_list = get_latest_vista(self.request.user, Person.objects.all())
-        else:
-            self.person_list = {'querydict': {}, 'queryset':{}}
-
-        formset_initial=[]
-        for person in self.person_list['queryset']:
-
-            formset_initial.append({'person':person})
-        
         if self.request.POST:
             context_data['listmemberships'] = SavedListListMembershipFormset(self.request.POST)
 
         else:
-            context_data['listmemberships'] = SavedListListMembershipFormset(initial=formset_initial)
-            context_data['listmemberships'].extra = len(formset_initial)
+            context_data['listmemberships'] = SavedListListMembershipFormset()
 
         return context_data
 
@@ -859,6 +807,75 @@ class SavedListCreate(PermissionRequiredMixin, CreateView):
         else:
             return reverse_lazy('sdcpeople:savedlist-detail', kwargs={'pk': self.object.pk})
         
+class SavedListSnapshot(PermissionRequiredMixin, CreateView):
+    permission_required = 'sdcpeople.add_savedlist'
+    model = SavedList
+    form_class = SavedListForm
+    template_name = 'sdcpeople/savedlist_snapshot.html'
+
+    def get_person_queryset(self):
+        # the current list is the latest vista narrowed by the search it shows
+        return search_people(get_latest_vista(self.request.user, Person.objects.all())['queryset'], self.request.GET.get('search', '').strip())
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data['search'] = self.request.GET.get('search', '').strip()
+        context_data['person_count'] = self.get_person_queryset().count()
+        return context_data
+
+    def form_valid(self, form):
+
+        form.instance.owner = self.request.user
+
+        with transaction.atomic():
+            response = super().form_valid(form)
+            people_added = add_people_to_list(self.object, self.get_person_queryset())
+
+        messages.info(self.request, f'{people_added} people were added to {self.object}')
+
+        return response
+
+    def get_success_url(self):
+        return reverse_lazy('sdcpeople:savedlist-detail', kwargs={'pk': self.object.pk})
+
+class SavedListCombine(PermissionRequiredMixin, CreateView):
+    permission_required = 'sdcpeople.add_savedlist'
+    model = SavedList
+    form_class = SavedListCombineForm
+    template_name = 'sdcpeople/savedlist_combine.html'
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def get_source_people(self, source):
+        kind, pk = source.split(':')
+        if kind == 'vista':
+            return get_latest_vista(self.request.user, Person.objects.all())['queryset']
+        return PEOPLE_SOURCES[kind](int(pk))
+
+    def form_valid(self, form):
+
+        form.instance.owner = self.request.user
+
+        people = combine_people(
+            form.cleaned_data['operation'],
+            self.get_source_people(form.cleaned_data['base']),
+            [self.get_source_people(source) for source in form.cleaned_data['others']],
+        )
+
+        with transaction.atomic():
+            response = super().form_valid(form)
+            people_added = insert_list_memberships(self.object, people)
+
+        messages.info(self.request, f'{people_added} people were added to {self.object}')
+
+        return response
+
+    def get_success_url(self):
+        return reverse_lazy('sdcpeople:savedlist-detail', kwargs={'pk': self.object.pk})
+
 class SavedListUpdate(PermissionRequiredMixin, UpdateView):
     permission_required = 'sdcpeople.change_savedlist'
     model = SavedList
@@ -880,7 +897,7 @@ class SavedListUpdate(PermissionRequiredMixin, UpdateView):
 
     def form_valid(self, form):
 
-        update_history(form, 'SavedList', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'SavedList').save_on_commit()
 
         response = super().form_valid(form)
 
@@ -909,23 +926,55 @@ class SavedListUpdate(PermissionRequiredMixin, UpdateView):
         else:
             return reverse_lazy('sdcpeople:savedlist-detail', kwargs={'pk': self.object.pk})
 
-class SavedListDetail(PermissionRequiredMixin, DetailView):
+class SavedListPeopleMixin:
+    """ Adds one page of the list's people, with their rows prefetched, to the context """
+
+    paginate_by = 50
+
+    def get_people_queryset(self):
+        return Person.objects.filter(listmembership__savedlist=self.object).order_by('name_last', 'name_first', 'pk').distinct()
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+
+        paginator = Paginator(person_projection_queryset(self.get_people_queryset()), self.paginate_by)
+        page_obj = paginator.get_page(self.request.GET.get('page'))
+
+        context_data['paginator'] = paginator
+        context_data['page_obj'] = page_obj
+        context_data['is_paginated'] = page_obj.has_other_pages()
+        context_data['people'] = attach_person_rows(page_obj.object_list)
+        context_data['count'] = paginator.count
+
+        return context_data
+
+class SavedListDetail(PermissionRequiredMixin, SavedListPeopleMixin, DetailView):
     permission_required = 'sdcpeople.view_savedlist'
     model = SavedList
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        context_data['savedlist_labels'] = { field.name: field.verbose_name.title() for field in SubCommittee._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['savedlist_labels'] = field_labels(SavedList)
         return context_data
 
-class SavedListDelete(PermissionRequiredMixin, DeleteView):
+class SavedListPeopleCSV(PermissionRequiredMixin, DetailView):
+    permission_required = 'sdcpeople.view_savedlist'
+    model = SavedList
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        people = Person.objects.filter(listmembership__savedlist=self.object).order_by('name_last', 'name_first', 'pk').distinct()
+
+        return stream_csv(person_export_rows(people), f'sdcvirginia_list_{self.object.pk}.csv')
+
+class SavedListDelete(PermissionRequiredMixin, SavedListPeopleMixin, DeleteView):
     permission_required = 'sdcpeople.delete_savedlist'
     model = SavedList
     template_name = 'sdcpeople/savedlist_confirm_delete.html'
     success_url = reverse_lazy('sdcpeople:savedlist-list')
 
 
-class SavedListList(PermissionRequiredMixin, ListView):
+class SavedListList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_savedlist'
     model = SavedList
     paginate_by = 30
@@ -937,7 +986,7 @@ class SavedListList(PermissionRequiredMixin, ListView):
             'fields':[],
         }
 
-        self.vista_settings['fields'] = make_vista_fields(SavedList, field_names=[
+        self.vista_settings['fields'] = vista_fields(SavedList, [
             'name',
             'when',
             'listmembership__person',
@@ -962,7 +1011,7 @@ class SavedListList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        return self.get_cached_vista_queryset()
 
     def get_paginate_by(self, queryset):
 
@@ -977,12 +1026,12 @@ class SavedListList(PermissionRequiredMixin, ListView):
 
         context_data = {**context_data, **vista_data}
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='libtekin.item').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('libtekin.item') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
 
-        context_data['count'] = self.object_list.count()
+        context_data['count'] = self.get_result_count(context_data)
 
         return context_data
 
@@ -1107,6 +1156,9 @@ class SavedListCSV(SavedListList):
         return response
 
 
+class SavedListNdjson(NdjsonApiMixin, SavedListList):
+    api_default_fields = ['id', 'name', 'when', 'owner_id', 'shared']
+
 class SavedListClose(PermissionRequiredMixin, DetailView):
     permission_required = 'sdcpeople.view_savedlist'
     model = SavedList
@@ -1134,7 +1186,7 @@ class SubCommitteeCreate(PermissionRequiredMixin, CreateView):
 
         response = super().form_valid(form)
 
-        update_history(form, 'SubCommittee', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'SubCommittee').save_on_commit()
 
         self.object = form.save()
 
@@ -1182,7 +1234,7 @@ class SubCommitteeUpdate(PermissionRequiredMixin, UpdateView):
 
     def form_valid(self, form):
 
-        update_history(form, 'SubCommittee', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'SubCommittee').save_on_commit()
 
         response = super().form_valid(form)
 
@@ -1217,8 +1269,8 @@ class SubCommitteeDetail(PermissionRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['subcommittee_labels'] = { field.name: field.verbose_name.title() for field in SubCommittee._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
-        context_data['submembership_labels'] = { field.name: field.verbose_name.title() for field in SubMembership._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['subcommittee_labels'] = field_labels(SubCommittee)
+        context_data['submembership_labels'] = field_labels(SubMembership)
 
         return context_data
 
@@ -1232,12 +1284,12 @@ class SubCommitteeDelete(PermissionRequiredMixin, DeleteView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['subcommittee_labels'] = { field.name: field.verbose_name.title() for field in SubCommittee._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
-        context_data['submembership_labels'] = { field.name: field.verbose_name.title() for field in SubMembership._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['subcommittee_labels'] = field_labels(SubCommittee)
+        context_data['submembership_labels'] = field_labels(SubMembership)
 
         return context_data
 
-class SubCommitteeList(PermissionRequiredMixin, ListView):
+class SubCommitteeList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_subcommittee'
     model = SubCommittee
     paginate_by = 30
@@ -1249,7 +1301,7 @@ class SubCommitteeList(PermissionRequiredMixin, ListView):
             'fields':[],
         }
 
-        self.vista_settings['fields'] = make_vista_fields(SubCommittee, field_names=[
+        self.vista_settings['fields'] = vista_fields(SubCommittee, [
             'name',
             'submembership__person',
         ])
@@ -1276,7 +1328,7 @@ class SubCommitteeList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        return self.get_cached_vista_queryset()
     
 
     def get_paginate_by(self, queryset):
@@ -1295,12 +1347,12 @@ class SubCommitteeList(PermissionRequiredMixin, ListView):
 
         context_data = {**context_data, **vista_data}
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='libtekin.item').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('libtekin.item') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
 
-        context_data['count'] = self.object_list.count()
+        context_data['count'] = self.get_result_count(context_data)
 
         return context_data
 
@@ -1393,7 +1445,7 @@ class LocationBoroughDetail(PermissionRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['locationborough_labels'] = { field.name: field.verbose_name.title() for field in LocationBorough._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['locationborough_labels'] = field_labels(LocationBorough)
 
         return context_data
 
@@ -1409,7 +1461,7 @@ class LocationBoroughList(PermissionRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        context_data['locationborough_labels'] = { field.name: field.verbose_name.title() for field in LocationBorough._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['locationborough_labels'] = field_labels(LocationBorough)
         return context_data
 
 class LocationBoroughClose(PermissionRequiredMixin, DetailView):
@@ -1448,7 +1500,7 @@ class LocationCityDetail(PermissionRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['locationcity_labels'] = { field.name: field.verbose_name.title() for field in LocationCity._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['locationcity_labels'] = field_labels(LocationCity)
 
         return context_data
 
@@ -1464,7 +1516,7 @@ class LocationCityList(PermissionRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        context_data['locationcity_labels'] = { field.name: field.verbose_name.title() for field in LocationCity._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['locationcity_labels'] = field_labels(LocationCity)
         return context_data
 
 class LocationCityClose(PermissionRequiredMixin, DetailView):
@@ -1502,7 +1554,7 @@ class LocationCongressDetail(PermissionRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
 
         context_data = super().get_context_data(**kwargs)
-        context_data['locationcongress_labels'] = { field.name: field.verbose_name.title() for field in LocationCongress._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['locationcongress_labels'] = field_labels(LocationCongress)
 
         return context_data
 
@@ -1518,7 +1570,7 @@ class LocationCongressList(PermissionRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        context_data['locationcongress_labels'] = { field.name: field.verbose_name.title() for field in LocationCongress._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['locationcongress_labels'] = field_labels(LocationCongress)
         return context_data
 
 class LocationCongressClose(PermissionRequiredMixin, DetailView):
@@ -1660,7 +1712,7 @@ class VotingAddressCreate(PermissionRequiredMixin, CreateView):
 
         response = super().form_valid(form)
 
-        update_history(form, 'VotingAddress', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'VotingAddress').save_on_commit()
 
         return response
 
@@ -1681,7 +1733,7 @@ class VotingAddressUpdate(PermissionRequiredMixin, UpdateView):
 
         response = super().form_valid(form)
 
-        update_history(form, 'VotingAddress', form.instance, self.request.user)
+        AuditLog(self.request.user).add_form(form, 'VotingAddress').save_on_commit()
 
         return response
 
@@ -1705,7 +1757,7 @@ class VotingAddressDelete(PermissionRequiredMixin, UpdateView):
     template_name = 'sdcpeople/votingaddress_confirm_delete.html'
     success_url = reverse_lazy('sdcpeople:votingaddress-list')
 
-class VotingAddressList(PermissionRequiredMixin, ListView):
+class VotingAddressList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_votingaddress'
     model = VotingAddress
     paginate_by = 30
@@ -1720,7 +1772,7 @@ class VotingAddressList(PermissionRequiredMixin, ListView):
             'columns_available':[],
         }
 
-        derived_field_labels={ field.name: field.verbose_name.title() for field in VotingAddress._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        derived_field_labels=field_labels(VotingAddress)
         more_field_labels={
             'voting_address__locationcity__name':'City',
             'voting_address__locationcongress__name':'Congress',
@@ -1800,7 +1852,7 @@ class VotingAddressList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        return self.get_cached_vista_queryset()
     
     def get_paginate_by(self, queryset):
 
@@ -1813,28 +1865,28 @@ class VotingAddressList(PermissionRequiredMixin, ListView):
 
         context_data = super().get_context_data(**kwargs)
 
-        context_data['locationcity'] = LocationCity.objects.all()
-        context_data['locationcongresss'] = LocationCongress.objects.all()
-        context_data['locationstatesenate'] = LocationStateSenate.objects.all()
-        context_data['locationstatehouse'] = LocationStateHouse.objects.all()
-        context_data['locationprecinct'] = LocationPrecinct.objects.all()
-        context_data['locationborough'] = LocationBorough.objects.all()
-        context_data['locationmagistrate'] = LocationMagistrate.objects.all()
+        context_data['locationcity'] = lookup_objects(LocationCity)
+        context_data['locationcongresss'] = lookup_objects(LocationCongress)
+        context_data['locationstatesenate'] = lookup_objects(LocationStateSenate)
+        context_data['locationstatehouse'] = lookup_objects(LocationStateHouse)
+        context_data['locationprecinct'] = lookup_objects(LocationPrecinct)
+        context_data['locationborough'] = lookup_objects(LocationBorough)
+        context_data['locationmagistrate'] = lookup_objects(LocationMagistrate)
 
         context_data['order_by_fields_available'] = []
         for fieldname in self.vista_settings['order_by_fields_available']:
             if fieldname > '' and fieldname[0] == '-':
-                context_data['order_by_fields_available'].append({ 'name':fieldname, 'label':VotingAddress._meta.get_field(fieldname[1:]).verbose_name.title() + ' [Reverse]'})
+                context_data['order_by_fields_available'].append({ 'name':fieldname, 'label':field_label(VotingAddress, fieldname[1:]) + ' [Reverse]'})
             else:
-                context_data['order_by_fields_available'].append({ 'name':fieldname, 'label':VotingAddress._meta.get_field(fieldname).verbose_name.title()})
+                context_data['order_by_fields_available'].append({ 'name':fieldname, 'label':field_label(VotingAddress, fieldname)})
 
-        context_data['columns_available'] = [{ 'name':fieldname, 'label':VotingAddress._meta.get_field(fieldname).verbose_name.title() } for fieldname in self.vista_settings['columns_available']]
+        context_data['columns_available'] = field_columns(VotingAddress, self.vista_settings['columns_available'])
 
         context_data['filterfields_available'] = self.vista_settings['filter_fields_available']
 
         context_data['field_labels'] = self.vista_settings['field_labels']
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='sdcpeople.votingaddress').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('sdcpeople.votingaddress') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
@@ -1856,10 +1908,13 @@ class VotingAddressList(PermissionRequiredMixin, ListView):
 
         context_data['combined_text_search'] = vista_querydict.get('combined_text_search') if 'combined_text_search' in vista_querydict else ''
 
-        context_data['votingaddress_labels'] = { field.name: field.verbose_name.title() for field in VotingAddress._meta.get_fields() if type(field).__name__[-3:] != 'Rel' }
+        context_data['votingaddress_labels'] = field_labels(VotingAddress)
 
         return context_data
 
+class VotingAddressNdjson(NdjsonApiMixin, VotingAddressList):
+    api_default_fields = ['id', 'street_address', 'locationcity', 'locationprecinct']
+
 class VotingAddressClose(PermissionRequiredMixin, DetailView):
     permission_required = 'sdcpeople.view_votingaddress'
     model = VotingAddress
@@ -1874,128 +1929,12 @@ class PersonCSVUpload(PermissionRequiredMixin, FormView):
 
     def form_valid(self, form):
 
-        csv_file=form.cleaned_data['csv_file']
-
-        try:
-            csv_file.seek(0)
-            data = list(csv.reader(io.StringIO(csv_file.read().decode('utf-8')), delimiter=","))
-
-            columns_available=[
-                'full_name',
-                'name_prefix',
-                'name_last',
-                'name_first',
-                'name_middles',
-                'name_common',
-                'name_suffix',
-                'voting_address',
-                'membership_status',
-                'positions',
-                'vb_campaign_id',
-                'city',
-                'congress',
-                'statesenate',
-                'statehouse',
-                'magistrate',
-                'borough',
-                'precinct',
-                'street_address',
-                'phone'
-            ]
-
-            data_columns={}
-            header = data[0]
-            for col in range(1,len(data[0])):
-                if data[0][col] in columns_available:
-                    data_columns[data[0][col]]=col
-
-            data.pop(0)
-
-            self.bulk_recordact = BulkRecordAction.objects.create(
-                name='CSV Upload '
-            )
-
-            for row in data:
-                person = None
-                van_id = row[0]
-                location_models={
-                    'city':LocationCity,
-                    'borough':LocationBorough,
-                    'congress':LocationCongress,
-                    'magistrate':LocationMagistrate,
-                    'precinct':LocationPrecinct,
-                    'statehouse':LocationStateHouse,
-                    'statesenate':LocationStateSenate,
-                }
-                membership_statusses={f'{mstatus.name} {mstatus.membership_type.name}'.lower():mstatus for mstatus in MembershipStatus.objects.all() }             
-                            
-                if van_id > "":
-                    person, person_created = Person.objects.get_or_create(vb_voter_id=van_id)
-                    write_person=False
-                    if person_created:
-                        write_person=True
-                        recordact_details='CSV Created. '
-                    else:
-                        recordact_details='CSV Noted Not Changed. '
-                        if form.cleaned_data['overwrite']:
-                            write_person=True
-                            recordact_details='CSV Updated. '
-                else:
-                    person = Person.objects.create()
-                    write_person=True
-
-                recordact_details=''
-
-                if person is not None:
-                    if write_person:
-                        lazy_set = {}
-                        voting_address = None
-                        phone = None
-
-                        for col_name, col_num in data_columns.items():
-                            row[col_num]=row[col_num].strip()
-                            if(row[col_num])>"":
-                                recordact_details = recordact_details + col_name + ': ' + str(row[col_num]) + '; '
-                                if col_name == 'full_name':
-                                    name_parts = row[col_num].split(', ')
-                                    setattr(person,'name_last',name_parts[0])
-                                    name_parts = name_parts[1].split(' ')
-                                    setattr(person, 'name_first', name_parts[0])
-                                    if len(name_parts) > 1:
-                                        setattr(person, 'name_middles', name_parts[1])
-                                elif col_name == 'voting_address':
-                                    voting_address,created = VotingAddress.objects.get_or_create(street_address=row[col_num])
-                                    setattr(person, 'voting_address', voting_address)
-                                    for key, value in lazy_set:
-                                        if key[:8]=='location':
-                                            setattr(voting_address,key,value)
-                                            lazy_set.pop(key)
-                                elif col_name == 'phone':
-                                    contact_voice,created = ContactVoice.objects.get_or_create(number=row[col_num], person=person)
-                                elif col_name in location_models:
-                                    try:
-                                        location_object = location_models[col_name].objects.get(name=row[col_num])
-                                    
-                                        if voting_address is not None:
-                                            setattr(voting_address,'location'+col_name,location_object)
-                                        else:
-                                            lazy_set['location'+col_name] = location_object
-                                    except location_models[col_name].DoesNotExist:
-                                        pass
-                                elif col_name == 'membership_status':
-                                    if row[col_num].lower() in membership_statusses:
-                                        setattr(person, col_name, membership_statusses[row[col_num].lower()])
-
-                            
-                        if voting_address is not None:
-                            voting_address.save()
-                        person.save()
-
-                        create_recordact(recordact_details,RecordactPerson,person,self.request.user,self.bulk_recordact)
-                            
-        except Exception as e:
-            print("Unable to upload file. " + repr(e), sys.exc_info()[2].tb_lineno)
-            messages.error(self.request,"Unable to upload file. " + repr(e))
+        self.bulk_recordact = queue_upload(
+            form.cleaned_data['csv_file'],
+            self.request.user,
+            form.cleaned_data['overwrite'],
+        )
+        messages.info(self.request, 'The file was uploaded and is being processed')
 
         return super().form_valid(form)
 
@@ -2006,6 +1945,61 @@ class PersonCSVUpload(PermissionRequiredMixin, FormView):
 
         return reverse('sdcpeople:person-list-by', kwargs={'by_value':bulk_recordact_pk, 'by_parameter':'recordactperson__recordact__bulk_recordact'})
 
+class PersonBulkAction(PermissionRequiredMixin, FormView):
+    """
+    Runs a bulk action from the person list on the checked people or on
+    everyone in the user's current list, then shows the people it changed
+    """
+
+    permission_required = 'sdcpeople.change_person'
+    form_class = PersonBulkActionForm
+    http_method_names = ['post']
+    bulk_recordact = None
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def get_person_queryset(self, form):
+        if form.cleaned_data['scope'] == 'vista':
+            # the current list is the latest vista narrowed by the search it shows
+            return search_people(get_latest_vista(self.request.user, Person.objects.all())['queryset'], form.cleaned_data['search'])
+        return Person.objects.filter(pk__in=form.cleaned_data['people'])
+
+    def form_valid(self, form):
+        action = form.cleaned_data['action']
+
+        with transaction.atomic():
+            self.bulk_recordact = run_bulk_person_action(action, self.get_person_queryset(form), form.cleaned_data[action], self.request.user)
+
+        messages.info(self.request, f'{self.bulk_recordact.name}: {self.bulk_recordact.rows_done} people were changed')
+
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        for field, errors in form.errors.items():
+            messages.add_message(self.request, messages.WARNING, ' '.join(errors))
+        return redirect('sdcpeople:person-list')
+
+    def get_success_url(self):
+        return reverse('sdcpeople:person-list-by', kwargs={'by_value':self.bulk_recordact.pk, 'by_parameter':'recordactperson__recordact__bulk_recordact'})
+
+class BulkRecordActionStatus(PermissionRequiredMixin, DetailView):
+    permission_required = 'sdcpeople.view_person'
+    model = BulkRecordAction
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return JsonResponse({
+            'status': self.object.get_status_display(),
+            'is_finished': self.object.status in [BulkRecordAction.COMPLETE, BulkRecordAction.FAILED],
+            'rows_done': self.object.rows_done,
+            'rows_failed': self.object.rows_failed,
+            'throughput': self.object.throughput,
+            'message': self.object.message,
+        })
+
 
 class CommunicationEventCreate(PermissionRequiredMixin, CreateView):
     permission_required = 'sdcpeople.add_communicationevent'
@@ -2042,7 +2036,7 @@ class CommunicationEventDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy('sdcpeople:communicationevent-list')
 
 
-class CommunicationEventList(PermissionRequiredMixin, ListView):
+class CommunicationEventList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_communicationevent'
     model = CommunicationEvent
     paginate_by = 30
@@ -2054,7 +2048,7 @@ class CommunicationEventList(PermissionRequiredMixin, ListView):
             'fields':[],
         }
 
-        self.vista_settings['fields'] = make_vista_fields(CommunicationEvent, field_names=[
+        self.vista_settings['fields'] = vista_fields(CommunicationEvent, [
             "target",
             "volunteer",
             "details",
@@ -2081,7 +2075,7 @@ class CommunicationEventList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        return self.get_cached_vista_queryset()
 
         queryset = super().get_queryset()
 
@@ -2144,12 +2138,12 @@ class CommunicationEventList(PermissionRequiredMixin, ListView):
 
         context_data = {**context_data, **vista_data}
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='libtekin.item').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('libtekin.item') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
 
-        context_data['count'] = self.object_list.count()
+        context_data['count'] = self.get_result_count(context_data)
 
         return context_data
 
@@ -2197,6 +2191,9 @@ class CommunicationEventCSV(CommunicationEventList):
         return response
 
 
+class CommunicationEventNdjson(NdjsonApiMixin, CommunicationEventList):
+    api_default_fields = ['id', 'target_id', 'volunteer_id', 'when', 'result']
+
 class CommunicationEventClose(PermissionRequiredMixin, DetailView):
     permission_required = 'sdcpeople.view_communicationevent'
     model = CommunicationEvent
@@ -2237,7 +2234,7 @@ class BulkCommunicationDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy('sdcpeople:bulkcommunication-list')
 
 
-class BulkCommunicationList(PermissionRequiredMixin, ListView):
+class BulkCommunicationList(PermissionRequiredMixin, CachedVistaMixin, KeysetPaginationMixin, ListView):
     permission_required = 'sdcpeople.view_bulkcommunication'
     model = BulkCommunication
     paginate_by = 30
@@ -2249,7 +2246,7 @@ class BulkCommunicationList(PermissionRequiredMixin, ListView):
             'fields':[],
         }
 
-        self.vista_settings['fields'] = make_vista_fields(BulkCommunication, field_names=[
+        self.vista_settings['fields'] = vista_fields(BulkCommunication, [
             "name",
             "when",
         ])
@@ -2273,7 +2270,7 @@ class BulkCommunicationList(PermissionRequiredMixin, ListView):
 
         self.vistaobj = {'querydict':QueryDict(), 'queryset':queryset}
 
-        return get_vista_queryset( self )
+        return self.get_cached_vista_queryset()
     
         queryset = super().get_queryset()
 
@@ -2337,12 +2334,12 @@ class BulkCommunicationList(PermissionRequiredMixin, ListView):
 
         context_data = {**context_data, **vista_data}
 
-        context_data['vistas'] = Vista.objects.filter(user=self.request.user, model_name='libtekin.item').all() # for choosing saved vistas
+        context_data['vistas'] = self.get_vista_menu('libtekin.item') # for choosing saved vistas
 
         if self.request.POST.get('vista_name'):
             context_data['vista_name'] = self.request.POST.get('vista_name')
 
-        context_data['count'] = self.object_list.count()
+        context_data['count'] = self.get_result_count(context_data)
 
         return context_data
 
@@ -2351,3 +2348,25 @@ class BulkCommunicationClose(PermissionRequiredMixin, DetailView):
     permission_required = 'sdcpeople.view_bulkcommunication'
     model = BulkCommunication
     template_name = 'sdcpeople/bulkcommunication_closer.html'
+
+class DistrictRollupList(PermissionRequiredMixin, ListView):
+    permission_required = 'sdcpeople.view_person'
+    model = DistrictRollup
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        self.location_field = self.request.GET.get('location_field', '')
+        if self.location_field:
+            queryset = queryset.filter(location_field=self.location_field)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data['location_fields'] = DistrictRollup._meta.get_field('location_field').choices
+        context_data['location_field'] = self.location_field
+        return context_data
+
+class DistrictRollupJson(DistrictRollupList):
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'districts': [rollup_data(rollup) for rollup in self.get_queryset()]})
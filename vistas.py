@@ -0,0 +1,183 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from tougshire_vistas.models import Vista
+from tougshire_vistas.views import get_vista_queryset
+
+from .caching import versioned_key
+from .pagination import model_version
+
+VISTA_CACHE_SECONDS = getattr(settings, 'SDCPEOPLE_VISTA_CACHE_SECONDS', 300)
+
+# results longer than this are not cached, and are filtered again each time
+VISTA_CACHE_MAX_ROWS = getattr(settings, 'SDCPEOPLE_VISTA_CACHE_MAX_ROWS', 10000)
+
+# POST keys that make the vista machinery create, change or delete a vista
+VISTA_ACTIONS = ['delete_vista', 'vista_query_submitted', 'retrieve_vista']
+
+def user_vista_version(user_id):
+    return f'vista:user:{user_id}'
+
+def field_path_models(model, field_path):
+    """
+    Returns the models that a field path such as 'participation__event'
+    passes through from model, with the through models of many-to-many
+    fields
+    """
+
+    models = []
+    for field_name in field_path.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        if field.many_to_many:
+            models.append(field.through if hasattr(field, 'through') else field.remote_field.through)
+        model = field.related_model
+        models.append(model)
+    return models
+
+def vista_models(model, vista_settings):
+    """
+    Returns the models whose changes can change the results of a vista of
+    model: model itself and those reached by the fields it can filter or
+    search
+    """
+
+    field_paths = [*vista_settings.get('fields', {}), *vista_settings.get('text_fields_available', []), *vista_settings.get('filter_fields_available', [])]
+    models = { model }
+    for field_path in field_paths:
+        models.update(field_path_models(model, field_path))
+    return sorted(models, key=lambda model: model._meta.label_lower)
+
+class CachedPkList:
+    """
+    The results of a vista as a cached list of primary keys. Slicing or
+    iterating loads only the rows needed, in the cached order, from the
+    queryset it was made with. select_related and prefetch_related are
+    passed on to that queryset, so paginators and projections can use a
+    CachedPkList as they would the queryset itself
+    """
+
+    ordered = True
+
+    def __init__(self, queryset, pks):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.pks = pks
+
+    def __repr__(self):
+        return f'<CachedPkList {self.model._meta.label} ({len(self.pks)})>'
+
+    def _clone(self, queryset):
+        return CachedPkList(queryset, self.pks)
+
+    def select_related(self, *fields):
+        return self._clone(self.queryset.select_related(*fields))
+
+    def prefetch_related(self, *lookups):
+        return self._clone(self.queryset.prefetch_related(*lookups))
+
+    def all(self):
+        return self
+
+    def count(self):
+        return len(self.pks)
+
+    def exists(self):
+        return bool(self.pks)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def __bool__(self):
+        return bool(self.pks)
+
+    def load(self, pks):
+        """ Returns the objects of some pks in the order given """
+
+        objects = self.queryset.order_by().in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.load(self.pks[index])
+        return self.load([self.pks[index]])[0]
+
+    def iterator(self, chunk_size=2000):
+        for start in range(0, len(self.pks), chunk_size):
+            yield from self.load(self.pks[start:start + chunk_size])
+
+    def __iter__(self):
+        return self.iterator()
+
+class CachedVistaMixin:
+    """
+    Keeps each user's vista results for a list view in the cache: the parsed
+    querydict and the primary keys it selected, so that paging and reloading
+    a list neither rereads the latest vista nor filters again. The results
+    are dropped when the listed model or a model its vista fields reach
+    changes, or when the user saves or deletes a vista
+    """
+
+    def vista_cache_enabled(self):
+        if any(action in self.request.POST for action in VISTA_ACTIONS):
+            return False
+        if 'query' in self.request.session:
+            return False
+        return True
+
+    def get_count_models(self):
+        # a count is dropped with the vista results it counts
+        return vista_models(self.model, getattr(self, 'vista_settings', {}))
+
+    def get_vista_cache_key(self):
+        kwargs = sorted((key, str(value)) for key, value in self.kwargs.items())
+        kwargs_hash = hashlib.md5(str(kwargs).encode()).hexdigest()
+        model_versions = [model_version(model) for model in vista_models(self.model, getattr(self, 'vista_settings', {}))]
+        return versioned_key(
+            [user_vista_version(self.request.user.pk), *model_versions],
+            'vista', self.request.user.pk, self.model._meta.label_lower, kwargs_hash
+        )
+
+    def get_cached_vista_queryset(self):
+        """
+        Returns the vista results from the cache as a CachedPkList, or runs
+        get_vista_queryset and caches what it returns
+        """
+
+        if not self.vista_cache_enabled():
+            return get_vista_queryset(self)
+
+        base_queryset = self.vistaobj['queryset']
+        key = self.get_vista_cache_key()
+
+        cached = cache.get(key)
+        if cached is not None:
+            self.vistaobj = {'querydict':cached['querydict'], 'queryset':base_queryset}
+            return CachedPkList(base_queryset, cached['pks'])
+
+        queryset = get_vista_queryset(self)
+
+        pks = list(dict.fromkeys(queryset.values_list('pk', flat=True)[:VISTA_CACHE_MAX_ROWS + 1]))
+        if len(pks) > VISTA_CACHE_MAX_ROWS:
+            return queryset
+
+        cache.set(key, {'querydict':self.vistaobj['querydict'], 'pks':pks}, VISTA_CACHE_SECONDS)
+        return CachedPkList(base_queryset, pks)
+
+    def get_vista_menu(self, model_name):
+        """ Returns the user's saved vistas of a model, for choosing one """
+
+        key = versioned_key([user_vista_version(self.request.user.pk)], 'vista-menu', self.request.user.pk, model_name)
+
+        vistas = cache.get(key)
+        if vistas is None:
+            vistas = list(Vista.objects.filter(user=self.request.user, model_name=model_name).all())
+            cache.set(key, vistas, VISTA_CACHE_SECONDS)
+        return vistas